@@ -0,0 +1,198 @@
+"""
+Asyncio engine publishing many articles of many blogs concurrently (`python async_engine.py`).
+
+Each article is a spool job driven through its stages by a coroutine. The stages are the bots' own
+synchronous code (run_job_stages), run on worker threads with asyncio.to_thread: the engine needs no
+new HTTP dependency and keeps every behaviour of the bots (retries, rate limits, caches, metrics).
+What it adds is the scheduling:
+
+* one asyncio.Semaphore per API host bounds the requests in flight (ASYNC_MISTRAL_CONCURRENCY,
+  ASYNC_HASHNODE_CONCURRENCY, ASYNC_NEWSAPI_CONCURRENCY); blogs on the same host share it;
+* per blog, the choice of the subject (fetch_news, build_prompt) is serialized so that no two jobs
+  pick the same keyword or news, and so are the near-duplicate check and the publication, as in
+  the batch mode; generations run concurrently;
+* cancellation is cooperative: Ctrl+C, SIGTERM or --deadline stop every job at its next stage
+  boundary (a second Ctrl+C cancels the waiting jobs at once). A stage already running on a thread
+  finishes in the background and is saved in the spool, so the next run resumes the job.
+
+Usage:
+    python async_engine.py [--config blogs.json] [--only french] [--count 10] [--deadline 600]
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import blog_runner
+import inventory
+import mistral_auth
+import spool
+
+ASYNC_CONCURRENCY = {
+    "mistral": int(os.getenv("ASYNC_MISTRAL_CONCURRENCY", "8")),
+    "hashnode": int(os.getenv("ASYNC_HASHNODE_CONCURRENCY", "4")),
+    "newsapi": int(os.getenv("ASYNC_NEWSAPI_CONCURRENCY", "2")),
+}
+# Stage -> (API called by the stage, bot setting holding its URL); the other stages are local
+STAGE_APIS = {
+    "fetch_news": ("newsapi", "NEWSAPI_BASE_URL"),
+    "generate": ("mistral", "MISTRAL_API_BASE_URL"),
+    "publish": ("hashnode", "HASHNODE_API_URL"),
+}
+PREPARE_STAGES = ("fetch_news", "build_prompt")
+FINAL_STAGES = ("postprocess", "publish")
+
+class StageFailed(Exception):
+    """A stage ended with the bots' sys.exit(): its job stops, the others go on."""
+
+def _run_stage(module, job, stage):
+    # SystemExit must not reach the event loop, which would stop every job
+    try:
+        module.run_job_stages(job, stage)
+    except SystemExit:
+        raise StageFailed(stage) from None
+
+def _failed_job_state(job):
+    """What becomes of a job after a failed stage, moving it to failed/ once out of attempts."""
+    if not job.is_pending:
+        return f"dropped (moved to {spool.FAILED_DIR_NAME}/)"  # Rejected as a near-duplicate
+    attempts = job.data["attempts"]
+    if attempts >= spool.SPOOL_MAX_ATTEMPTS:
+        job.abandon()
+        return f"failed {attempts} times, moved to {spool.FAILED_DIR_NAME}/"
+    return f"it stays in the spool (attempt {attempts}/{spool.SPOOL_MAX_ATTEMPTS})"
+
+class Engine:
+    def __init__(self, modules):
+        self.modules = modules
+        self.host_semaphores = {}
+        self.prepare_locks = {name: asyncio.Lock() for name in modules}
+        self.final_locks = {name: asyncio.Lock() for name in modules}
+        self.stopping = asyncio.Event()
+        self.tasks = []
+
+    def stop(self, reason="interrupted"):
+        if self.stopping.is_set():
+            print("🛑 Cancelling the waiting jobs now.")
+            for task in self.tasks:
+                task.cancel()
+            return
+        print(f"🛑 Stopping ({reason}): every job ends at its next stage boundary...")
+        self.stopping.set()
+
+    def _semaphore(self, module, stage):
+        api, url_setting = STAGE_APIS[stage]
+        key = (api, urlsplit(getattr(module, url_setting, "")).netloc)
+        if key not in self.host_semaphores:
+            self.host_semaphores[key] = asyncio.Semaphore(ASYNC_CONCURRENCY[api])
+        return self.host_semaphores[key]
+
+    async def _stage(self, module, job, stage):
+        """Runs one stage if needed. Returns False when the engine is stopping."""
+        if job.is_done(stage) or stage not in module.PIPELINE_STAGES:
+            return True
+        if self.stopping.is_set():
+            return False
+        if stage in STAGE_APIS:
+            async with self._semaphore(module, stage):
+                if self.stopping.is_set():
+                    return False
+                await asyncio.to_thread(_run_stage, module, job, stage)
+        else:
+            await asyncio.to_thread(_run_stage, module, job, stage)
+        return True
+
+    async def run_job(self, blog_name, job):
+        """Drives one job to publication. Returns True (published), False (failed) or None (stopped)."""
+        module = self.modules[blog_name]
+        job.start_attempt()
+        try:
+            async with self.prepare_locks[blog_name]:
+                for stage in PREPARE_STAGES:
+                    if not await self._stage(module, job, stage):
+                        return None
+            if not await self._stage(module, job, "generate"):
+                return None
+            async with self.final_locks[blog_name]:
+                # Checked again here: another job of this run may have published a close article meanwhile
+                if job.is_done("postprocess") and not await asyncio.to_thread(inventory.is_still_distinct, job):
+                    return False
+                for stage in FINAL_STAGES:
+                    if not await self._stage(module, job, stage):
+                        return None
+        except StageFailed as e:
+            print(f"⚠️ [{blog_name}] Job {job.id} failed at stage '{e}', {_failed_job_state(job)}.")
+            return False
+        job.finish()
+        return True
+
+    async def run(self, jobs, deadline=None):
+        """Runs (blog name, job) pairs concurrently. Returns {blog name: [results]}."""
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=sum(ASYNC_CONCURRENCY.values()) + 2 * len(self.modules)))
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass  # Not available on Windows
+        if deadline:
+            loop.call_later(deadline, self.stop, f"{deadline:g}s deadline reached")
+
+        self.tasks = [asyncio.create_task(self.run_job(name, job)) for name, job in jobs]
+        outcomes = await asyncio.gather(*self.tasks, return_exceptions=True)
+        results = {}
+        for (name, _), outcome in zip(jobs, outcomes):
+            results.setdefault(name, []).append(None if isinstance(outcome, BaseException) else outcome)
+        return results
+
+def select_jobs(blog_name, count):
+    """
+    The unfinished jobs of the spool first, stocked articles still distinct from the published
+    posts included (inventory.is_still_distinct drops the others), then new jobs.
+    """
+    jobs = []
+    for job in spool.pending_jobs(blog_name):
+        if len(jobs) == count:
+            break
+        if not job.is_done("postprocess") or inventory.is_still_distinct(job):
+            jobs.append(job)
+    return jobs + [spool.create_job(blog_name) for _ in range(count - len(jobs))]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Publishes the blogs of blogs.json with the asyncio engine.")
+    parser.add_argument("--config", default=blog_runner.DEFAULT_CONFIG_PATH, help="Blog configuration file (default: blogs.json).")
+    parser.add_argument("--only", help="Comma-separated blog names to run (default: every enabled blog).")
+    parser.add_argument("--count", type=int, help="Articles per blog (default: `count` of blogs.json).")
+    parser.add_argument("--deadline", type=float, help="Stop starting new stages after this many seconds.")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    blogs = blog_runner.select_blogs(blog_runner.load_config(args.config), args.only)
+    if not blogs:
+        print("⚠️ No blog to publish.")
+        sys.exit(0)
+
+    modules = {blog["name"]: blog_runner.load_bot(blog) for blog in blogs}
+    for module in modules.values():
+        module.check_api_keys()
+    if mistral_auth.MISTRAL_AUTH_PROBE:
+        next(iter(modules.values())).test_mistral_auth()
+
+    jobs = [(blog["name"], job) for blog in blogs for job in select_jobs(blog["name"], args.count or blog.get("count", 1))]
+    print(f"\n⚡ Async engine: {len(jobs)} article(s) on {len(blogs)} blog(s), "
+          f"up to {ASYNC_CONCURRENCY['mistral']} generation(s) at a time.")
+    results = asyncio.run(Engine(modules).run(jobs, args.deadline))
+
+    incomplete = False
+    for name, outcomes in results.items():
+        published, failed = outcomes.count(True), outcomes.count(False)
+        stopped = len(outcomes) - published - failed
+        print(f"📊 [{name}] {published} published, {failed} failed, {stopped} stopped.")
+        incomplete = incomplete or published < len(outcomes)
+    if incomplete:
+        sys.exit(1)
+    print("\n🎉 Every article was published!")
@@ -0,0 +1,186 @@
+"""
+Offline benchmarks of the bots against the local API stubs (stub_servers.py), without any paid call.
+
+Each scenario starts the stub server with its own settings (latency, streaming, share of 429
+responses...), then runs blog_runner.py (or async_engine.py) in a subprocess with the API base URLs pointed at the stub,
+a fresh cache folder and N articles per blog of blogs.json. The metrics recorded by the run
+(metrics.py) give the throughput, the p50/p95 latency of the generation, the publication and the
+HTTP requests, and the number of retries.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--articles 5] [--scenario baseline,streaming] [--json results.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import stub_servers
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (stub settings, extra environment of the bots)
+SCENARIOS = {
+    "baseline": ({}, {}),
+    "streaming": ({}, {"MISTRAL_STREAMING": "1"}),
+    "slow_mistral": ({"mistral_latency": 2.0}, {}),
+    "mistral_429": ({"mistral_429_rate": 0.2}, {}),
+    "hashnode_429": ({"hashnode_429_rate": 0.2}, {}),
+    # Same as baseline with the client-side token buckets of rate_limit.py at their defaults
+    "client_rate_limit": ({}, {"RATE_LIMIT_MISTRAL_PER_MINUTE": "60", "RATE_LIMIT_HASHNODE_PER_MINUTE": "60"}),
+    # slow_mistral run by the asyncio engine instead of blog_runner.py
+    "async_slow_mistral": ({"mistral_latency": 2.0}, {}),
+    # Stock refill through the stub Batch API; its first request fails, so a second run resubmits it
+    "batch_refill": ({"batch_failed_requests": 1}, {"MISTRAL_BATCH_POLL_SECONDS": "0.2"}),
+}
+# Scenarios run by other commands than blog_runner.py (`{articles}` is replaced), run in sequence
+SCENARIO_COMMANDS = {
+    "async_slow_mistral": [["async_engine.py"]],
+    "batch_refill": [["inventory.py", "--batch", "--target", "{articles}"]] * 2,
+}
+
+BASE_ENVIRONMENT = {
+    "GITHUB_REPOSITORY": "benchmark/hashnode-bots",
+    "MISTRAL_AUTH_PROBE": "0",
+    "METRICS_ENABLED": "1",
+    # Measures the bots, not the client-side throttling (see the client_rate_limit scenario)
+    "RATE_LIMIT_MISTRAL_PER_MINUTE": "0",
+    "RATE_LIMIT_HASHNODE_PER_MINUTE": "0",
+}
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def write_config(path, articles, base_url):
+    """Copy of blogs.json with `articles` articles per blog, no stock and its news feeds on the stub server."""
+    with open(os.path.join(REPO_DIR, "blogs.json"), encoding="utf-8") as f:
+        config = json.load(f)
+    for blog in config["blogs"]:
+        blog["count"] = articles
+        blog.pop("inventory", None)
+        for source in blog.get("news", {}).get("sources", []):
+            if source["type"] == "rss":
+                source["url"] = f"{base_url}/feeds/rss.xml"
+            elif source["type"] == "hn":
+                source["url"] = f"{base_url}/hn/search"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    return sum(1 for blog in config["blogs"] if blog.get("enabled", True)) * articles
+
+def read_metrics(cache_dir):
+    events = []
+    path = os.path.join(cache_dir, "metrics.jsonl")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            events = [json.loads(line) for line in f if line.strip()]
+    return events
+
+def count_stocked(cache_dir):
+    """Articles in stock (spool jobs carrying their `inventory` description)."""
+    stocked = 0
+    for folder, _, files in os.walk(os.path.join(cache_dir, "spool")):
+        if os.path.basename(folder) == "failed":
+            continue
+        for file_name in files:
+            with open(os.path.join(folder, file_name), encoding="utf-8") as f:
+                stocked += "inventory" in json.load(f).get("artifacts", {})
+    return stocked
+
+def run_scenario(name, articles):
+    stub_settings, environment = SCENARIOS[name]
+    server, base_url = stub_servers.start(stub_servers.StubConfig(**stub_settings))
+    work_dir = tempfile.mkdtemp(prefix=f"bench-{name}-")
+    try:
+        config_path = os.path.join(work_dir, "blogs.json")
+        expected = write_config(config_path, articles, base_url)
+        env = {**os.environ, **BASE_ENVIRONMENT, **stub_servers.bot_environment(base_url), **environment}
+        env["HASHNODE_BOT_CACHE_DIR"] = os.path.join(work_dir, "cache")
+
+        print(f"⏱️ Scenario {name}: {expected} article(s)...")
+        started_at = time.monotonic()
+        with open(os.path.join(work_dir, "run.log"), "w", encoding="utf-8") as log:
+            for command in SCENARIO_COMMANDS.get(name, [["blog_runner.py"]]):
+                process = subprocess.run(
+                    [sys.executable, *(arg.format(articles=articles) for arg in command), "--config", config_path],
+                    cwd=REPO_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+                )
+        wall = time.monotonic() - started_at
+
+        events = read_metrics(env["HASHNODE_BOT_CACHE_DIR"])
+        spans = [e for e in events if e.get("event") == "span"]
+        http = [e for e in events if e.get("event") == "http"]
+        if SCENARIO_COMMANDS.get(name, [[""]])[0][0] == "inventory.py":
+            published = count_stocked(env["HASHNODE_BOT_CACHE_DIR"])  # Stocked, not published
+        else:
+            published = sum(1 for e in spans if e["name"] == "publish_article" and e["status"] == "ok" and e.get("parent") != "publish_article")
+
+        def durations(span_name):
+            return [e["duration"] for e in spans if e["name"] == span_name and e["status"] == "ok"]
+
+        result = {
+            "scenario": name,
+            "exit_code": process.returncode,
+            "articles": expected,
+            "published": published,
+            "wall_seconds": round(wall, 2),
+            "articles_per_minute": round(published / wall * 60, 2) if wall else None,
+            "generate_p50": _percentile(durations("generate_article"), 0.5),
+            "generate_p95": _percentile(durations("generate_article"), 0.95),
+            "publish_p50": _percentile(durations("publish_article"), 0.5),
+            "publish_p95": _percentile(durations("publish_article"), 0.95),
+            "http_requests": len(http),
+            "http_p95": _percentile([e["duration"] for e in http], 0.95),
+            "http_429": sum(1 for e in http if e["status"] == 429),
+            "retries": int(sum(e["value"] for e in events if e.get("event") == "counter" and e["name"] == "http_retries_total")),
+            "stub_requests": dict(server.state.requests),
+        }
+        if process.returncode != 0:
+            print(f"⚠️ Scenario {name} exited with code {process.returncode}, see the tail of its log:")
+            with open(os.path.join(work_dir, "run.log"), encoding="utf-8") as log:
+                print("".join(log.readlines()[-10:]))
+        return result
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def _format(value, digits=2):
+    return "-" if value is None else f"{value:.{digits}f}"
+
+def print_report(results):
+    print(f"\n{'scenario':<18}{'published':>10}{'wall s':>9}{'art/min':>9}{'gen p50':>9}{'gen p95':>9}"
+          f"{'pub p50':>9}{'pub p95':>9}{'http p95':>9}{'429s':>6}{'retries':>8}")
+    for r in results:
+        print(f"{r['scenario']:<18}{r['published']:>6}/{r['articles']:<3}{r['wall_seconds']:>9.1f}{_format(r['articles_per_minute'], 1):>9}"
+              f"{_format(r['generate_p50']):>9}{_format(r['generate_p95']):>9}{_format(r['publish_p50']):>9}{_format(r['publish_p95']):>9}"
+              f"{_format(r['http_p95']):>9}{r['http_429']:>6}{r['retries']:>8}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmarks the bots against local API stubs.")
+    parser.add_argument("--articles", type=int, default=3, help="Articles per blog in each scenario (default: 3).")
+    parser.add_argument("--scenario", help=f"Comma-separated scenarios (default: all of {', '.join(SCENARIOS)}).")
+    parser.add_argument("--json", help="Also write the results to this JSON file, to compare runs.")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    names = [name.strip() for name in args.scenario.split(",")] if args.scenario else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"❌ Unknown scenario(s) : {', '.join(unknown)}")
+        sys.exit(1)
+
+    results = [run_scenario(name, args.articles) for name in names]
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+    if any(r["exit_code"] != 0 for r in results):
+        sys.exit(1)
@@ -0,0 +1,377 @@
+"""
+Local stub of the APIs used by the bots, for offline benchmarks (see run_benchmarks.py).
+
+A single HTTP server emulates:
+* Mistral AI `POST /v1/chat/completions`, regular or streamed (SSE, `stream: true`);
+* the Mistral AI Batch API: `POST /v1/files`, `POST /v1/batch/jobs`, `GET /v1/batch/jobs/<id>`
+  (SUCCESS after a few polls) and `GET /v1/files/<id>/content` (JSONL results, the first
+  `batch_failed_requests` requests of the server failing with a 500);
+* Hashnode GraphQL `POST /graphql`: `me { publications }` and `publishPost`;
+* NewsAPI `GET /v2/everything`, with cover images served from `/images/<n>.jpg`;
+* an RSS 2.0 feed `GET /feeds/rss.xml`, an Atom feed `GET /feeds/atom.xml` and the Hacker News
+  search API `GET /hn/search`, whose items partly repeat the NewsAPI news (merge tests). The feeds
+  do not change while the server runs and honour If-None-Match / If-Modified-Since with a 304.
+
+StubConfig sets the latency of each API, the per-chunk delay of streamed completions and the
+share of requests answered with 429 (with a Retry-After header). Articles are made of random words
+so that the near-duplicate check of the bots never rejects them.
+
+Standalone use (e.g. to run a bot by hand against it):
+    python benchmarks/stub_servers.py --port 8770
+"""
+import argparse
+import email.policy
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+WORDS = (
+    "cloud data model latency cache network security team product code service platform user "
+    "system design release pipeline metric test agent query index storage cluster region edge "
+    "browser mobile api runtime compiler kernel protocol token budget review incident deploy"
+).split()
+
+@dataclass
+class StubConfig:
+    mistral_latency: float = 0.2        # Seconds before the completion (or the first chunk)
+    mistral_chunk_delay: float = 0.002  # Seconds between two streamed chunks
+    mistral_429_rate: float = 0.0       # Share of Mistral AI requests answered with 429
+    hashnode_latency: float = 0.05
+    hashnode_429_rate: float = 0.0
+    newsapi_latency: float = 0.05
+    feeds_latency: float = 0.05         # RSS/Atom feeds and Hacker News
+    retry_after: float = 1              # Retry-After header of the 429 responses
+    batch_polls: int = 2                # Polls of a batch job before it succeeds
+    batch_failed_requests: int = 1      # Batch requests answered with a 500 (the first ones of the server)
+    article_words: int = 400
+    news_count: int = 50
+    seed: int = 1
+
+class StubState:
+    def __init__(self, config):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.counter = 0
+        self.requests = {}
+        self.started_at = datetime.now(timezone.utc).replace(microsecond=0)
+        self.files = {}
+        self.batch_jobs = {}
+        self.batch_failures_left = config.batch_failed_requests
+
+    def next_id(self, api):
+        with self.lock:
+            self.counter += 1
+            self.requests[api] = self.requests.get(api, 0) + 1
+            return self.counter
+
+    def take_batch_failure(self):
+        with self.lock:
+            if self.batch_failures_left > 0:
+                self.batch_failures_left -= 1
+                return True
+            return False
+
+    def roll(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+    def article(self, number):
+        with self.lock:
+            words = [self.random.choice(WORDS) for _ in range(self.config.article_words)]
+        paragraphs = [" ".join(words[i:i + 60]).capitalize() + "." for i in range(0, len(words), 60)]
+        return f"# Benchmark article {number}\n\n" + "\n\n".join(paragraphs)
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def _rate_limited(self, rate):
+        if rate and self.state.roll(rate):
+            self._send(429, {"message": "Rate limit exceeded"}, headers={"Retry-After": f"{self.state.config.retry_after:g}"})
+            return True
+        return False
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        if path == "/v1/files":
+            self._upload_file()
+            return
+        body = self._read_json()
+        if path == "/v1/chat/completions":
+            self._chat_completion(body)
+        elif path == "/v1/batch/jobs":
+            self._create_batch_job(body)
+        elif path == "/graphql":
+            self._graphql(body)
+        else:
+            self._send(404, {"message": f"Unknown path {path}"})
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/v2/everything":
+            self._news()
+        elif path in ("/feeds/rss.xml", "/feeds/atom.xml"):
+            self._feed(path.endswith("atom.xml"))
+        elif path == "/hn/search":
+            self._hacker_news()
+        elif path.startswith("/v1/batch/jobs/"):
+            self._batch_job(path.rsplit("/", 1)[1])
+        elif path.startswith("/v1/files/") and path.endswith("/content"):
+            self._file_content(path.split("/")[3])
+        elif path.startswith("/images/"):
+            self._send(200, b"\xff\xd8\xff", content_type="image/jpeg")
+        else:
+            self._send(404, {"message": f"Unknown path {path}"})
+
+    do_HEAD = do_GET
+
+    def _chat_completion(self, body):
+        config = self.state.config
+        number = self.state.next_id("mistral")
+        time.sleep(config.mistral_latency)
+        if self._rate_limited(config.mistral_429_rate):
+            return
+        content = self.state.article(number)
+        usage = {"prompt_tokens": len(str(body.get("messages"))) // 4, "completion_tokens": len(content) // 4}
+        if not body.get("stream"):
+            self._send(200, {
+                "id": f"cmpl-{number}", "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        tokens = content.split(" ")
+        for index, token in enumerate(tokens):
+            last = index == len(tokens) - 1
+            chunk = {"choices": [{"index": 0, "delta": {"content": token + ("" if last else " ")}, "finish_reason": "stop" if last else None}]}
+            if last:
+                chunk["usage"] = usage
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+            time.sleep(config.mistral_chunk_delay)
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    # --- Batch API ---
+
+    def _upload_file(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        message = BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode() + self.rfile.read(length)
+        )
+        content = next((part.get_payload(decode=True) for part in message.iter_parts() if part.get_filename()), b"")
+        file_id = f"file-{self.state.next_id('batch')}"
+        self.state.files[file_id] = content
+        self._send(200, {"id": file_id, "object": "file", "bytes": len(content), "purpose": "batch"})
+
+    def _create_batch_job(self, body):
+        input_files = body.get("input_files") or []
+        if not input_files or input_files[0] not in self.state.files:
+            self._send(404, {"message": "Unknown input file"})
+            return
+        job_id = f"batch-{self.state.next_id('batch')}"
+        total = len([line for line in self.state.files[input_files[0]].splitlines() if line.strip()])
+        job = {"id": job_id, "status": "QUEUED", "input_files": input_files, "model": body.get("model"),
+               "total_requests": total, "succeeded_requests": 0, "failed_requests": 0, "output_file": None}
+        self.state.batch_jobs[job_id] = dict(job, polls=0)
+        self._send(200, job)
+
+    def _batch_job(self, job_id):
+        job = self.state.batch_jobs.get(job_id)
+        if job is None:
+            self._send(404, {"message": f"Unknown batch job {job_id}"})
+            return
+        with self.state.lock:
+            job["polls"] += 1
+            ready = job["status"] != "SUCCESS" and job["polls"] > self.state.config.batch_polls
+            if not ready and job["status"] == "QUEUED":
+                job["status"] = "RUNNING"
+        if ready:
+            self._finish_batch_job(job)
+        self._send(200, {k: v for k, v in job.items() if k != "polls"})
+
+    def _finish_batch_job(self, job):
+        lines, failed = [], 0
+        for line in self.state.files[job["input_files"][0]].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            number = self.state.next_id("mistral")
+            if self.state.take_batch_failure():
+                failed += 1
+                response = {"status_code": 500, "body": {"message": "Internal server error"}}
+            else:
+                content = self.state.article(number)
+                response = {"status_code": 200, "body": {
+                    "id": f"cmpl-{number}", "model": job["model"],
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": len(str(request["body"].get("messages"))) // 4, "completion_tokens": len(content) // 4},
+                }}
+            lines.append(json.dumps({"id": f"req-{number}", "custom_id": request["custom_id"], "response": response}))
+        output_id = f"file-{self.state.next_id('batch')}"
+        self.state.files[output_id] = "\n".join(lines).encode("utf-8")
+        job.update(status="SUCCESS", output_file=output_id, succeeded_requests=len(lines) - failed, failed_requests=failed)
+
+    def _file_content(self, file_id):
+        if file_id not in self.state.files:
+            self._send(404, {"message": f"Unknown file {file_id}"})
+            return
+        self._send(200, self.state.files[file_id], content_type="application/x-ndjson")
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _graphql(self, body):
+        config = self.state.config
+        number = self.state.next_id("hashnode")
+        time.sleep(config.hashnode_latency)
+        if self._rate_limited(config.hashnode_429_rate):
+            return
+        query = body.get("query", "")
+        if "publishPost" in query:
+            title = body["variables"]["input"]["title"]
+            self._send(200, {"data": {"publishPost": {"post": {
+                "id": f"post-{number}", "title": title, "slug": f"post-{number}", "url": f"https://stub.hashnode.dev/post-{number}",
+            }}}})
+        else:
+            self._send(200, {"data": {"me": {"publications": {"edges": [{"node": {"id": "stub-publication"}}]}}}})
+
+    def _news(self):
+        config = self.state.config
+        self.state.next_id("newsapi")
+        time.sleep(config.newsapi_latency)
+        host = f"http://{self.headers.get('Host')}"
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self._send(200, {"status": "ok", "totalResults": config.news_count, "articles": [{
+            "source": {"id": None, "name": "Stub News"},
+            "title": f"Stub news {n}",
+            "description": f"Description of stub news {n}.",
+            "content": f"Content of stub news {n}.",
+            "url": f"https://news.example.com/{n}",
+            "urlToImage": f"{host}/images/{n}.jpg",
+            "publishedAt": now,
+        } for n in range(config.news_count)]})
+
+    def _feed_items(self):
+        """Every other NewsAPI news (with tracking parameters in its URL) plus news of its own."""
+        config = self.state.config
+        self.state.next_id("feeds")
+        time.sleep(config.feeds_latency)
+        now = self.state.started_at
+        return [(f"Stub news {n}", f"https://news.example.com/{n}?utm_source=rss", now) for n in range(0, config.news_count, 2)] + \
+               [(f"Stub feed story {n}", f"https://feed.example.com/{n}", now) for n in range(config.news_count // 2)]
+
+    def _feed(self, atom):
+        items = self._feed_items()
+        last_modified = format_datetime(self.state.started_at, usegmt=True)
+        etag = f'"{hashlib.sha1(f"{atom}{last_modified}".encode()).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag or self.headers.get("If-Modified-Since") == last_modified:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        headers = {"ETag": etag, "Last-Modified": last_modified}
+        if atom:
+            entries = "".join(
+                f"<entry><title>{escape(title)}</title><link href=\"{escape(url)}\"/><updated>{moment.isoformat()}</updated>"
+                f"<summary type=\"html\">{escape(f'<p>Summary of {title}.</p>')}</summary></entry>"
+                for title, url, moment in items
+            )
+            body = f'<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom"><title>Stub Atom</title>{entries}</feed>'
+            self._send(200, body.encode("utf-8"), content_type="application/atom+xml", headers=headers)
+            return
+        entries = "".join(
+            f"<item><title>{escape(title)}</title><link>{escape(url)}</link><pubDate>{format_datetime(moment)}</pubDate>"
+            f"<description>{escape(f'<p>Summary of {title}.</p>')}</description></item>"
+            for title, url, moment in items
+        )
+        body = f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>Stub RSS</title>{entries}</channel></rss>'
+        self._send(200, body.encode("utf-8"), content_type="application/rss+xml", headers=headers)
+
+    def _hacker_news(self):
+        self._send(200, {"hits": [{
+            "objectID": str(index), "title": title, "url": url, "created_at": moment.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "points": 100 + index, "num_comments": index,
+        } for index, (title, url, moment) in enumerate(self._feed_items())]})
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients closing their keep-alive connections at exit are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+def start(config=None, port=0):
+    """Starts the stub server in a background thread. Returns (server, base URL)."""
+    server = StubServer(("127.0.0.1", port), StubHandler)
+    server.state = StubState(config or StubConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def bot_environment(base_url):
+    """Environment variables pointing the bots to the stub server."""
+    return {
+        "MISTRAL_API_BASE_URL": f"{base_url}/v1/chat/completions",
+        "MISTRAL_BATCH_API_URL": f"{base_url}/v1",
+        "HASHNODE_API_URL": f"{base_url}/graphql",
+        "NEWSAPI_BASE_URL": f"{base_url}/v2/everything",
+        "MISTRAL_API_KEY": "stub-mistral-key",
+        "HASHNODE_API_KEY": "stub-hashnode-key",
+        "NEWSAPI_API_KEY": "stub-newsapi-key",
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs the API stub server in the foreground.")
+    parser.add_argument("--port", type=int, default=8770)
+    for name, value in asdict(StubConfig()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = vars(parser.parse_args())
+    port = args.pop("port")
+    server, base_url = start(StubConfig(**args), port)
+    print(f"🧪 Stub server listening on {base_url}")
+    for name, value in bot_environment(base_url).items():
+        print(f"   export {name}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,113 @@
+"""
+Multi-blog runner: publishes every blog listed in blogs.json from a single process.
+
+Each entry names the bot script implementing it (hashnode_bot, english_hashnode_bot,
+tech_news_hashnode_bot) and the settings passed to its configure() function: publication ID,
+model, prompt templates, keywords and news source. Every entry gets its own instance of the
+bot module, so two blogs can share a script; all of them share the HTTP connection pools,
+the caches and a single authentication check. Blogs are run concurrently.
+
+Usage:
+    python blog_runner.py [--config blogs.json] [--only french,english] [--concurrency 3]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import mistral_auth
+
+DEFAULT_CONFIG_PATH = "blogs.json"
+BOTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_config(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ ERROR : unable to read the blog configuration {path} : {e}")
+        sys.exit(1)
+    for blog in config.get("blogs", []):
+        if not blog.get("name") or not blog.get("bot"):
+            print(f"❌ ERROR : every blog of {path} needs a 'name' and a 'bot' : {blog}")
+            sys.exit(1)
+    return config
+
+def select_blogs(config, only=None):
+    """Enabled blogs of `config`, restricted to the comma-separated names of `only` if given."""
+    blogs = [blog for blog in config.get("blogs", []) if blog.get("enabled", True)]
+    if only:
+        selected = {name.strip() for name in only.split(",")}
+        blogs = [blog for blog in blogs if blog["name"] in selected]
+    return blogs
+
+def load_bot(blog):
+    """Loads a fresh instance of the bot module of `blog` and applies its settings."""
+    path = os.path.join(BOTS_DIR, f"{blog['bot']}.py")
+    spec = importlib.util.spec_from_file_location(f"blog_{blog['name']}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.configure(blog)
+    return module
+
+def run_blog(module, blog):
+    """Publishes `count` articles on one blog. Returns True on success."""
+    count = blog.get("count", 1)
+    try:
+        if count > 1 and hasattr(module, "run_batch"):
+            module.run_batch(count, blog.get("concurrency", 4))
+        else:
+            for _ in range(count):
+                module.run_next_job()
+        return True
+    except SystemExit:
+        # The bots exit on errors: only this blog is marked as failed
+        return False
+    except Exception as e:
+        print(f"❌ [{blog['name']}] Unexpected error : {e}")
+        return False
+
+def run_blogs(blogs, concurrency):
+    modules = {blog["name"]: load_bot(blog) for blog in blogs}
+    for module in modules.values():
+        module.check_api_keys()
+    if mistral_auth.MISTRAL_AUTH_PROBE:
+        # Same Mistral AI key for every blog: probe it once
+        next(iter(modules.values())).test_mistral_auth()
+
+    workers = max(1, min(concurrency, len(blogs)))
+    print(f"\n📚 Publishing {len(blogs)} blog(s) with {workers} worker(s): {', '.join(modules)}")
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_blog, modules[blog["name"]], blog): blog["name"] for blog in blogs}
+        for future in as_completed(futures):
+            name = futures[future]
+            if future.result():
+                print(f"✅ [{name}] done.")
+            else:
+                print(f"⚠️ [{name}] failed, see the log above.")
+                failed.append(name)
+    return failed
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Publishes every blog of blogs.json from a single process.")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH, help="Blog configuration file (default: blogs.json).")
+    parser.add_argument("--only", help="Comma-separated blog names to run (default: every enabled blog).")
+    parser.add_argument("--concurrency", type=int, help="Number of blogs processed at the same time (default: from the config, else 3).")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = load_config(args.config)
+    blogs = select_blogs(config, args.only)
+    if not blogs:
+        print("⚠️ No blog to publish.")
+        sys.exit(0)
+
+    failed = run_blogs(blogs, args.concurrency or config.get("concurrency", 3))
+    if failed:
+        print(f"\n❌ {len(failed)} blog(s) failed : {', '.join(failed)}")
+        sys.exit(1)
+    print("\n🎉 Every blog was published successfully!")
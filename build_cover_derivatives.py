@@ -0,0 +1,112 @@
+"""
+Offline build stage for the cover images.
+
+Creates Hashnode-sized derivatives of every image of `covers/` in `covers/optimized/`:
+center-cropped to the 1600x840 cover aspect ratio (never upscaled), as WebP, progressive JPEG
+fallback and, when the local Pillow build supports it, AVIF. A manifest
+(`covers/optimized/manifest.json`) maps each original to its derivatives; the bots use it to
+publish the derivative URL instead of the full-size original.
+
+Only covers whose content changed since the last build are re-encoded.
+
+Usage (requires Pillow, which the bots themselves do not need):
+    pip install Pillow
+    python build_cover_derivatives.py [--force]
+Then commit the `covers/optimized/` folder so the files are served by raw.githubusercontent.com
+(the build_covers.yml workflow does both whenever covers are pushed).
+"""
+import argparse
+import json
+import os
+import sys
+
+import cover_manifest
+
+COVER_IMAGES_DIR = "covers"
+TARGET_WIDTH, TARGET_HEIGHT = 1600, 840
+WEBP_QUALITY = 75
+JPEG_QUALITY = 72
+AVIF_QUALITY = 55
+
+def crop_to_cover(image):
+    """Center-crops `image` to the target aspect ratio, then downsizes it to at most 1600x840."""
+    from PIL import Image
+
+    width, height = image.size
+    target_ratio = TARGET_WIDTH / TARGET_HEIGHT
+    if width / height > target_ratio:
+        new_width = round(height * target_ratio)
+        left = (width - new_width) // 2
+        image = image.crop((left, 0, left + new_width, height))
+    else:
+        new_height = round(width / target_ratio)
+        top = (height - new_height) // 2
+        image = image.crop((0, top, width, top + new_height))
+
+    if image.width > TARGET_WIDTH:
+        image = image.resize((TARGET_WIDTH, TARGET_HEIGHT), Image.LANCZOS)
+    return image
+
+def build_derivatives(covers_path, force=False):
+    try:
+        from PIL import Image, features
+    except ImportError:
+        print("❌ ERROR : Pillow is required to build the cover derivatives (pip install Pillow).")
+        sys.exit(1)
+
+    output_dir = os.path.join(covers_path, cover_manifest.DERIVATIVES_SUBDIR)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, cover_manifest.DERIVATIVES_MANIFEST)
+    derivatives = cover_manifest.load_derivatives(covers_path) if not force else {}
+    with_avif = features.check("avif")
+
+    covers = cover_manifest.load_manifest(covers_path)["entries"]
+    built = skipped = 0
+    for filename, entry in sorted(covers.items()):
+        previous = derivatives.get(filename)
+        if previous and previous.get("source_sha256") == entry["sha256"]:
+            skipped += 1
+            continue
+
+        stem = os.path.splitext(filename)[0]
+        with Image.open(os.path.join(covers_path, filename)) as source:
+            image = crop_to_cover(source.convert("RGB"))
+
+        outputs = {
+            "webp": (f"{stem}.webp", dict(format="WEBP", quality=WEBP_QUALITY, method=6)),
+            "jpeg": (f"{stem}.jpg", dict(format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)),
+        }
+        if with_avif:
+            outputs["avif"] = (f"{stem}.avif", dict(format="AVIF", quality=AVIF_QUALITY))
+
+        record = {"source_sha256": entry["sha256"], "width": image.width, "height": image.height}
+        for fmt, (name, options) in outputs.items():
+            path = os.path.join(output_dir, name)
+            image.save(path, **options)
+            record[fmt] = {"path": f"{cover_manifest.DERIVATIVES_SUBDIR}/{name}", "bytes": os.path.getsize(path)}
+        derivatives[filename] = record
+        built += 1
+
+    # Drop derivatives of covers that no longer exist
+    for filename in [name for name in derivatives if name not in covers]:
+        for fmt in ("webp", "jpeg", "avif"):
+            if fmt in derivatives[filename]:
+                stale_path = os.path.join(covers_path, derivatives[filename][fmt]["path"])
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+        del derivatives[filename]
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(derivatives, f, indent=2, sort_keys=True)
+
+    original_bytes = sum(covers[name]["bytes"] for name in derivatives)
+    webp_bytes = sum(record["webp"]["bytes"] for record in derivatives.values())
+    print(f"✅ {built} cover(s) encoded, {skipped} unchanged.")
+    if original_bytes:
+        print(f"📉 Originals: {original_bytes / 1024:.0f} KB, WebP derivatives: {webp_bytes / 1024:.0f} KB ({100 * webp_bytes / original_bytes:.0f}%).")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds Hashnode-sized WebP/JPEG derivatives of the cover images.")
+    parser.add_argument("--force", action="store_true", help="Re-encode every cover, even unchanged ones.")
+    args = parser.parse_args()
+    build_derivatives(os.path.join(os.getenv('GITHUB_WORKSPACE', '.'), COVER_IMAGES_DIR), force=args.force)
@@ -0,0 +1,108 @@
+"""
+Small on-disk cache helpers shared by the Hashnode bots.
+
+Everything is stored as JSON files in a single cache folder (`.cache/` at the root of the
+repository by default) so that it can be persisted between GitHub Actions runs with
+actions/cache.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+CACHE_DIR = os.getenv("HASHNODE_BOT_CACHE_DIR") or os.path.join(os.getenv('GITHUB_WORKSPACE', '.'), ".cache")
+
+_write_lock = threading.Lock()
+
+def cache_path(name):
+    """
+    Returns the absolute path of a file inside the cache folder, creating the folder (and the
+    subfolders of `name`, e.g. "spool/french/job.json") if needed.
+    """
+    path = os.path.join(CACHE_DIR, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def fingerprint(secret):
+    """Short, non-reversible identifier for a secret (API key), safe to store on disk."""
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:16]
+
+def load_json(name, default=None):
+    """Loads a JSON cache file, returning `default` if it is missing or unreadable."""
+    try:
+        with open(cache_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def save_json(name, data):
+    """Atomically writes a JSON cache file (write to a temporary file, then rename)."""
+    path = cache_path(name)
+    with _write_lock:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+class TTLCache:
+    """
+    Key/value cache persisted in one JSON file, where every entry expires after `ttl_seconds`.
+    """
+
+    def __init__(self, name, ttl_seconds):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = load_json(self.name, default={}) or {}
+        return self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None or time.time() - entry.get("stored_at", 0) > self.ttl_seconds:
+                return default
+            return entry.get("value")
+
+    def set(self, key, value):
+        with self._lock:
+            entries = self._load()
+            entries[key] = {"value": value, "stored_at": time.time()}
+            self._prune(entries)
+            self._save(entries)
+
+    def set_many(self, items):
+        with self._lock:
+            entries = self._load()
+            now = time.time()
+            for key, value in items.items():
+                entries[key] = {"value": value, "stored_at": now}
+            self._prune(entries)
+            self._save(entries)
+
+    def delete(self, key):
+        with self._lock:
+            entries = self._load()
+            if entries.pop(key, None) is not None:
+                self._save(entries)
+
+    def _prune(self, entries):
+        now = time.time()
+        for key in [k for k, e in entries.items() if now - e.get("stored_at", 0) > self.ttl_seconds]:
+            del entries[key]
+
+    def _save(self, entries):
+        try:
+            save_json(self.name, entries)
+        except OSError as e:
+            print(f"⚠️ Unable to write cache file '{self.name}': {e}")
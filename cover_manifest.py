@@ -0,0 +1,228 @@
+"""
+Persistent manifest of the cover images shared by the Hashnode bots.
+
+The manifest (`.cache/covers_manifest.json`) records, for every image of the covers folder,
+its SHA-256, format, dimensions, byte size and usage counters. It is only rescanned when the
+folder's mtime changes, and unchanged files (same size and mtime) are not re-read.
+
+Covers are served in least-recently-used order: the manifest keeps a rotation list whose
+first entry is always the next cover to use, so selection never needs to list the folder.
+
+If a perceptual-hash index exists (see cover_phash.py), covers that look like one of the
+most recently published ones are skipped.
+
+When optimized derivatives were built with build_cover_derivatives.py, cover_url_path()
+points to the WebP (or JPEG) derivative instead of the full-size original.
+"""
+import hashlib
+import json
+import os
+import random
+import struct
+import threading
+import time
+
+import cover_phash
+from cache_store import load_json, save_json
+
+MANIFEST_NAME = "covers_manifest.json"
+MANIFEST_VERSION = 1
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+DERIVATIVES_SUBDIR = "optimized"
+DERIVATIVES_MANIFEST = "manifest.json"
+DERIVATIVE_FORMATS = ("webp", "jpeg")  # Order of preference for the published cover URL
+
+_manifest_lock = threading.Lock()
+
+# --- Image header parsing (no external dependency) ---
+
+def _jpeg_size(f):
+    f.seek(2)
+    while True:
+        marker_start = f.read(1)
+        while marker_start and marker_start != b'\xff':
+            marker_start = f.read(1)
+        marker = f.read(1)
+        while marker == b'\xff':
+            marker = f.read(1)
+        if not marker:
+            return None
+        code = marker[0]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) != 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        # SOF0..SOF15 markers (except DHT, JPG and DAC) carry the frame dimensions
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            data = f.read(5)
+            if len(data) != 5:
+                return None
+            height, width = struct.unpack('>HH', data[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+def read_image_info(path):
+    """
+    Returns (format, width, height) by reading the file header, or None if the file is not a
+    PNG, JPEG, GIF or WebP image we can decode.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(32)
+        if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+            width, height = struct.unpack('>II', head[16:24])
+            return 'png', width, height
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            width, height = struct.unpack('<HH', head[6:10])
+            return 'gif', width, height
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            chunk = head[12:16]
+            if chunk == b'VP8 ':
+                width, height = struct.unpack('<HH', head[26:30])
+                return 'webp', width & 0x3FFF, height & 0x3FFF
+            if chunk == b'VP8L':
+                bits = struct.unpack('<I', head[21:25])[0]
+                return 'webp', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b'VP8X':
+                width = int.from_bytes(head[24:27], 'little') + 1
+                height = int.from_bytes(head[27:30], 'little') + 1
+                return 'webp', width, height
+            return None
+        if head.startswith(b'\xff\xd8'):
+            size = _jpeg_size(f)
+            if size:
+                return 'jpeg', size[0], size[1]
+    return None
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# --- Manifest maintenance ---
+
+def _empty_manifest():
+    return {"version": MANIFEST_VERSION, "covers_path": None, "dir_mtime_ns": None, "entries": {}, "rotation": []}
+
+def _scan(manifest, covers_path):
+    """Incrementally refreshes the manifest entries from the covers folder."""
+    entries = manifest["entries"]
+    seen = set()
+    for filename in sorted(os.listdir(covers_path)):
+        if not filename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        path = os.path.join(covers_path, filename)
+        if not os.path.isfile(path):
+            continue
+        stat = os.stat(path)
+        entry = entries.get(filename)
+        if entry and entry.get("bytes") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            seen.add(filename)
+            continue
+
+        info = read_image_info(path)
+        if info is None:
+            print(f"⚠️ Cover '{filename}' is not a readable image, it is excluded from the manifest.")
+            continue
+        previous = entry or {}
+        entries[filename] = {
+            "sha256": _sha256(path),
+            "format": info[0],
+            "width": info[1],
+            "height": info[2],
+            "bytes": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "uses": previous.get("uses", 0),
+            "last_used": previous.get("last_used"),
+        }
+        seen.add(filename)
+
+    for filename in [name for name in entries if name not in seen]:
+        del entries[filename]
+
+    # Keep the existing rotation order; new covers (never used) go first, in random order.
+    rotation = [name for name in manifest["rotation"] if name in entries]
+    known = set(rotation)
+    new_covers = [name for name in sorted(entries) if name not in known]
+    random.shuffle(new_covers)
+    manifest["rotation"] = new_covers + rotation
+
+def load_manifest(covers_path):
+    """Loads the manifest, rescanning the covers folder only if its mtime changed."""
+    manifest = load_json(MANIFEST_NAME)
+    if not manifest or manifest.get("version") != MANIFEST_VERSION:
+        manifest = _empty_manifest()
+
+    covers_path = os.path.abspath(covers_path)
+    dir_mtime_ns = os.stat(covers_path).st_mtime_ns
+    if manifest["covers_path"] != covers_path or manifest["dir_mtime_ns"] != dir_mtime_ns:
+        _scan(manifest, covers_path)
+        manifest["covers_path"] = covers_path
+        manifest["dir_mtime_ns"] = dir_mtime_ns
+        save_json(MANIFEST_NAME, manifest)
+    return manifest
+
+def select_cover(covers_path):
+    """
+    Returns the filename of the least recently used cover and records its use,
+    or None if the folder contains no valid image.
+    """
+    with _manifest_lock:
+        manifest = load_manifest(covers_path)
+        rotation = manifest["rotation"]
+        if not rotation:
+            return None
+
+        position = 0
+        index = cover_phash.load_index(covers_path)
+        if index:
+            # The tail of the rotation holds the most recently used covers
+            entries = manifest["entries"]
+            recent = [name for name in reversed(rotation) if entries[name]["last_used"]][:cover_phash.COVER_DEDUP_RECENT]
+            recent_set = set(recent)
+            for i, candidate in enumerate(rotation):
+                if candidate in recent_set:
+                    continue
+                if not cover_phash.is_too_similar(candidate, recent, index):
+                    position = i
+                    break
+
+        filename = rotation.pop(position)
+        rotation.append(filename)
+        entry = manifest["entries"][filename]
+        entry["uses"] += 1
+        entry["last_used"] = time.time()
+        save_json(MANIFEST_NAME, manifest)
+        return filename
+
+# --- Optimized derivatives ---
+
+def load_derivatives(covers_path):
+    """Loads the derivatives manifest written by build_cover_derivatives.py ({} if there is none)."""
+    path = os.path.join(covers_path, DERIVATIVES_SUBDIR, DERIVATIVES_MANIFEST)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def cover_url_path(covers_path, filename):
+    """
+    Path of the file to publish for a cover, relative to the covers folder: the preferred
+    derivative if it exists, was built from the current version of the original and is
+    lighter than it, otherwise the original itself.
+    """
+    record = load_derivatives(covers_path).get(filename)
+    if record:
+        entry = load_manifest(covers_path)["entries"].get(filename, {})
+        if record.get("source_sha256") == entry.get("sha256"):
+            for fmt in DERIVATIVE_FORMATS:
+                derivative = record.get(fmt)
+                if derivative and derivative["bytes"] < entry.get("bytes", 0) and \
+                   os.path.isfile(os.path.join(covers_path, derivative["path"])):
+                    return derivative["path"]
+    return filename
@@ -0,0 +1,192 @@
+"""
+Perceptual-hash index of the cover images, used to avoid publishing look-alike covers.
+
+Every cover gets a 64-bit difference hash (dHash) and average hash (aHash). The index is
+written to `covers/phash_index.json` and committed with the covers, so the bots can use it
+without Pillow. Near-duplicates are grouped with a BK-tree over the Hamming distance, which
+only visits a small part of the index for each lookup and stays fast with thousands of covers.
+
+Usage (requires Pillow):
+    pip install Pillow
+    python cover_phash.py [--distance 10]
+"""
+import argparse
+import json
+import os
+import sys
+
+import cover_manifest
+
+COVER_IMAGES_DIR = "covers"
+PHASH_INDEX_NAME = "phash_index.json"
+HASH_SIZE = 8  # 8x8 = 64-bit hashes
+
+# Selection settings: a cover is skipped if its dHash is within COVER_DEDUP_DISTANCE bits of
+# one of the COVER_DEDUP_RECENT most recently published covers.
+COVER_DEDUP_DISTANCE = int(os.getenv("COVER_DEDUP_DISTANCE", "10"))
+COVER_DEDUP_RECENT = int(os.getenv("COVER_DEDUP_RECENT", "14"))
+
+# --- Hashing ---
+
+def _grayscale(path, size):
+    from PIL import Image
+
+    with Image.open(path) as image:
+        return list(image.convert("L").resize(size, Image.LANCZOS).tobytes())
+
+def dhash(path):
+    """Difference hash: one bit per horizontally adjacent pixel pair of a 9x8 thumbnail."""
+    pixels = _grayscale(path, (HASH_SIZE + 1, HASH_SIZE))
+    value = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            right = pixels[row * (HASH_SIZE + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+def ahash(path):
+    """Average hash: one bit per pixel of an 8x8 thumbnail, set if brighter than the mean."""
+    pixels = _grayscale(path, (HASH_SIZE, HASH_SIZE))
+    mean = sum(pixels) / len(pixels)
+    value = 0
+    for pixel in pixels:
+        value = (value << 1) | (pixel > mean)
+    return value
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+# --- BK-tree ---
+
+class BKTree:
+    """Metric tree over the Hamming distance: search(h, d) returns every item within d bits of h."""
+
+    def __init__(self):
+        self.root = None  # (hash, items, {distance: child})
+
+    def add(self, value, item):
+        if self.root is None:
+            self.root = (value, [item], {})
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, [item], {})
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        results = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                results.extend((distance, item) for item in node[1])
+            # Triangle inequality: only children at distance in [d - max, d + max] can match
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return results
+
+# --- Index ---
+
+def load_index(covers_path):
+    """Returns {filename: {"sha256", "dhash", "ahash"}} with integer hashes ({} if no index)."""
+    try:
+        with open(os.path.join(covers_path, PHASH_INDEX_NAME), "r", encoding="utf-8") as f:
+            covers = json.load(f).get("covers", {})
+    except (OSError, ValueError):
+        return {}
+    return {
+        name: {"sha256": entry["sha256"], "dhash": int(entry["dhash"], 16), "ahash": int(entry["ahash"], 16)}
+        for name, entry in covers.items()
+    }
+
+def build_index(covers_path):
+    """Hashes new or changed covers and rewrites the index file."""
+    covers = cover_manifest.load_manifest(covers_path)["entries"]
+    index = load_index(covers_path)
+    hashed = 0
+    for filename, entry in sorted(covers.items()):
+        if index.get(filename, {}).get("sha256") == entry["sha256"]:
+            continue
+        path = os.path.join(covers_path, filename)
+        index[filename] = {"sha256": entry["sha256"], "dhash": dhash(path), "ahash": ahash(path)}
+        hashed += 1
+    index = {name: value for name, value in index.items() if name in covers}
+
+    serialized = {
+        "algorithm": "dhash+ahash",
+        "bits": HASH_SIZE * HASH_SIZE,
+        "covers": {
+            name: {"sha256": value["sha256"], "dhash": f"{value['dhash']:016x}", "ahash": f"{value['ahash']:016x}"}
+            for name, value in sorted(index.items())
+        },
+    }
+    with open(os.path.join(covers_path, PHASH_INDEX_NAME), "w", encoding="utf-8") as f:
+        json.dump(serialized, f, indent=2)
+    print(f"✅ {hashed} cover(s) hashed, {len(index) - hashed} unchanged.")
+    return index
+
+def find_near_duplicate_groups(index, max_distance):
+    """Groups covers whose dHash are within `max_distance` bits (connected components)."""
+    tree = BKTree()
+    for name, value in index.items():
+        tree.add(value["dhash"], name)
+
+    groups = []
+    visited = set()
+    for name in sorted(index):
+        if name in visited:
+            continue
+        group, stack = [], [name]
+        visited.add(name)
+        while stack:
+            current = stack.pop()
+            group.append(current)
+            for _, other in tree.search(index[current]["dhash"], max_distance):
+                if other not in visited:
+                    visited.add(other)
+                    stack.append(other)
+        if len(group) > 1:
+            groups.append(sorted(group))
+    return groups
+
+# --- Selection helper used by cover_manifest.select_cover() ---
+
+def is_too_similar(candidate, recent_covers, index, max_distance=None):
+    """True if `candidate` looks like one of `recent_covers` (covers missing from the index are never similar)."""
+    max_distance = COVER_DEDUP_DISTANCE if max_distance is None else max_distance
+    candidate_entry = index.get(candidate)
+    if candidate_entry is None:
+        return False
+    for name in recent_covers:
+        entry = index.get(name)
+        if entry is not None and hamming(candidate_entry["dhash"], entry["dhash"]) <= max_distance:
+            return True
+    return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds the perceptual-hash index of the covers and lists near-duplicates.")
+    parser.add_argument("--distance", type=int, default=COVER_DEDUP_DISTANCE, help="Maximum Hamming distance between near-duplicates.")
+    args = parser.parse_args()
+
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("❌ ERROR : Pillow is required to hash the cover images (pip install Pillow).")
+        sys.exit(1)
+
+    covers_path = os.path.join(os.getenv('GITHUB_WORKSPACE', '.'), COVER_IMAGES_DIR)
+    groups = find_near_duplicate_groups(build_index(covers_path), args.distance)
+    if not groups:
+        print(f"✅ No near-duplicate covers within {args.distance} bits.")
+    for group in groups:
+        print(f"🔁 {len(group)} near-identical covers: {', '.join(group)}")
@@ -1,6 +1,17 @@
 import os
 import sys
 import requests
+import mistral_auth
+import mistral_client
+import retry
+import cover_manifest
+import history_store
+import near_duplicate
+import generation_cache
+import token_budget
+import spool
+import metrics
+import inventory
 from datetime import datetime
 import json
 import random
@@ -9,24 +20,27 @@ import random
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 HASHNODE_API_KEY = os.getenv("HASHNODE_API_KEY") # Same Hashnode API key can be used for multiple publications
 
-if not MISTRAL_API_KEY:
-    print("❌ ERROR : MISTRAL_API_KEY is not defined. Ensure the environment variable is correctly set and you have created a Mistral AI API key.")
-    sys.exit(1)
+def check_api_keys():
+    """Checks that the API keys are set (called when the bot starts, not at import time)."""
+    if not MISTRAL_API_KEY:
+        print("❌ ERROR : MISTRAL_API_KEY is not defined. Ensure the environment variable is correctly set and you have created a Mistral AI API key.")
+        sys.exit(1)
 
-if not HASHNODE_API_KEY:
-    print("❌ ERROR : HASHNODE_API_KEY is not defined. Ensure the environment variable is correctly set.")
-    sys.exit(1)
+    if not HASHNODE_API_KEY:
+        print("❌ ERROR : HASHNODE_API_KEY is not defined. Ensure the environment variable is correctly set.")
+        sys.exit(1)
 
 # --- Define the Mistral AI model to use and the API URL ---
 MISTRAL_MODEL_NAME = "mistral-tiny"
-MISTRAL_API_BASE_URL = "https://api.mistral.ai/v1/chat/completions"
+MISTRAL_API_BASE_URL = os.getenv("MISTRAL_API_BASE_URL", "https://api.mistral.ai/v1/chat/completions") # Overridable (stub servers, see benchmarks/)
 
 # --- Hashnode Configuration ---
-HASHNODE_API_URL = "https://gql.hashnode.com/"
+HASHNODE_API_URL = os.getenv("HASHNODE_API_URL", "https://gql.hashnode.com/")
 
 # --- MODIFIED: Specific Hashnode Publication ID for the ENGLISH blog ---
 # YOU MUST REPLACE "YOUR_ENGLISH_HASHNODE_PUBLICATION_ID_HERE" with the actual ID from Hashnode
 ENGLISH_HASHNODE_PUBLICATION_ID = "68488b76218d748963ca9c0f" 
+HISTORY_BLOG_NAME = "english" # Name of this blog in the publication history (history_store.py)
 
 # --- GitHub Repository URL Variables ---
 GITHUB_REPOSITORY = os.getenv('GITHUB_REPOSITORY') # Format: 'user/repo'
@@ -58,9 +72,9 @@ def get_github_raw_base_url():
 
 def get_random_cover_image_url():
     """
-    Lists images in the specified directory and returns the raw URL of a random image.
+    Lists images in the specified directory and returns the raw URL of the least recently used cover
+    (see cover_manifest.py).
     """
-    image_files = []
     covers_path = os.path.join(os.getenv('GITHUB_WORKSPACE', '.'), COVER_IMAGES_DIR)
 
     if not os.path.exists(covers_path):
@@ -68,18 +82,14 @@ def get_random_cover_image_url():
         return None
 
     try:
-        for filename in os.listdir(covers_path):
-            if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
-                image_files.append(filename)
-        
-        if not image_files:
+        # Pick the least recently used cover from the manifest
+        selected_file = cover_manifest.select_cover(covers_path)
+        if not selected_file:
             print(f"⚠️ No image files found in the folder '{covers_path}'.")
             return None
         
-        selected_file = random.choice(image_files)
-        
         base_url = get_github_raw_base_url()
-        full_image_url = f"{base_url}/{COVER_IMAGES_DIR}/{selected_file}"
+        full_image_url = f"{base_url}/{COVER_IMAGES_DIR}/{cover_manifest.cover_url_path(covers_path, selected_file)}"
         print(f"✅ Selected cover image : {selected_file}")
         return full_image_url
 
@@ -88,7 +98,16 @@ def get_random_cover_image_url():
         return None
 
 # --- Mistral AI Authentication Test ---
+@metrics.timed()
 def test_mistral_auth():
+    """
+    Explicit (billed) Mistral AI key check, only used when MISTRAL_AUTH_PROBE=1.
+    Skipped if the key was already validated recently (local cache with TTL).
+    """
+    if mistral_auth.is_key_validated(MISTRAL_API_KEY):
+        print("✅ Mistral AI key already validated recently (cache), skipping authentication test.")
+        return
+
     headers = {
         "Authorization": f"Bearer {MISTRAL_API_KEY}",
         "Content-Type": "application/json"
@@ -105,10 +124,11 @@ def test_mistral_auth():
 
     print(f"🔎 Testing Mistral AI authentication with model '{MISTRAL_MODEL_NAME}' at URL: {MISTRAL_API_BASE_URL}")
     try:
-        resp = requests.post(MISTRAL_API_BASE_URL, headers=headers, json=payload, timeout=30)
+        resp = retry.post("mistral", MISTRAL_API_BASE_URL, headers=headers, json=payload, timeout=30)
         print(f"Auth test Mistral status: {resp.status_code}")
         if resp.status_code == 200:
             print("✅ Mistral AI authentication successful and model accessible.")
+            mistral_auth.mark_key_validated(MISTRAL_API_KEY)
             try:
                 response_data = resp.json()
                 if "choices" in response_data and response_data["choices"]:
@@ -118,6 +138,7 @@ def test_mistral_auth():
             except json.JSONDecodeError:
                 print("⚠️ Model response not valid JSON. This might be a Mistral AI server issue.")
         elif resp.status_code == 401:
+            mistral_auth.invalidate_key(MISTRAL_API_KEY)
             print("❌ Mistral AI authentication failed: 401 Unauthorized. Incorrect API key or insufficient permissions.")
             sys.exit(1)
         else:
@@ -127,8 +148,6 @@ def test_mistral_auth():
         print(f"❌ NETWORK ERROR or connection issue during Mistral AI authentication test : {e}")
         sys.exit(1)
 
-test_mistral_auth()
-
 keywords = [
     "cybersecurity", "cloud computing", "blockchain", "artificial intelligence", "machine learning",
     "deep learning", "quantum computing", "edge computing", "devops", "gitops", "kubernetes", "docker",
@@ -156,26 +175,33 @@ keywords = [
     "chatbots", "virtual assistants", "real-time collaboration tools"
 ]
 
-chosen_keyword = random.choice(keywords)
+def choose_keywords(count=1):
+    """
+    Picks `count` distinct keywords, avoiding those recently published on this blog and those
+    of the jobs in progress or in stock (spool).
+    """
+    in_progress = set(spool.pending_artifacts(HISTORY_BLOG_NAME, "keyword"))
+    available = [k for k in keywords if k not in in_progress] or keywords
+    return history_store.choose_keywords(HISTORY_BLOG_NAME, available, count, random)
 
 # --- Article Generation via Mistral AI API ---
-def generate_article():
-    # MODIFIED HERE: English article prompt
-    article_prompt = (
-        "Write a professional and detailed blog post of at least 1500 words in English on a current topic "
-        f"related to {chosen_keyword}. "
-        "The title should be included at the beginning of the article content (first level heading, e.g., # Article Title). "
-        "Do not start the article with 'Title: ', 'Author: ', or 'Publication Date: '. "
-        "The article must end with the signature 'By Nathan Remacle.'. "
-        "Optimize the content for SEO by naturally including relevant keywords. "
-        "Avoid formulations that sound 'AI' and adopt a human and engaging tone."
-    )
-    
-    headers = {
-        "Authorization": f"Bearer {MISTRAL_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
+# MODIFIED HERE: English article prompt ({keyword} is replaced by the chosen keyword; can be overridden in blogs.json)
+ARTICLE_PROMPT_TEMPLATE = (
+    "Write a professional and detailed blog post of at least 1500 words in English on a current topic "
+    "related to {keyword}. "
+    "The title should be included at the beginning of the article content (first level heading, e.g., # Article Title). "
+    "Do not start the article with 'Title: ', 'Author: ', or 'Publication Date: '. "
+    "The article must end with the signature 'By Nathan Remacle.'. "
+    "Optimize the content for SEO by naturally including relevant keywords. "
+    "Avoid formulations that sound 'AI' and adopt a human and engaging tone."
+)
+
+def build_prompt(keyword):
+    return ARTICLE_PROMPT_TEMPLATE.format(keyword=keyword)
+
+def build_payload(article_prompt):
+    """Chat completions request body (shared with the batch mode, see mistral_batch.py)."""
+    return {
         "model": MISTRAL_MODEL_NAME,
         "messages": [
             {
@@ -184,29 +210,70 @@ def generate_article():
             }
         ],
         "temperature": 0.7,
-        "max_tokens": 2500
+        "max_tokens": token_budget.choose_max_tokens(article_prompt)
+    }
+
+@metrics.timed()
+def generate_article(keyword=None, article_prompt=None, use_cache=True):
+    if keyword is None:
+        keyword = choose_keywords()[0]
+    if article_prompt is None:
+        article_prompt = build_prompt(keyword)
+    
+    headers = {
+        "Authorization": f"Bearer {MISTRAL_API_KEY}",
+        "Content-Type": "application/json"
     }
+    payload = build_payload(article_prompt)
+
+    cached_article = generation_cache.get(payload) if use_cache else None
+    if cached_article is not None:
+        print(f"⚡ Article served from the generation cache, no Mistral AI call (keyword : {keyword}).")
+        return cached_article
 
     print(f"\n🚀 Attempting to generate article with model '{MISTRAL_MODEL_NAME}'...")
     try:
-        response = requests.post(
-            MISTRAL_API_BASE_URL,
-            headers=headers,
-            json=payload,
-            timeout=180
-        )
+        if mistral_client.MISTRAL_STREAMING:
+            response = mistral_client.open_stream(MISTRAL_API_BASE_URL, headers, payload)
+        else:
+            response = retry.post(
+                "mistral",
+                MISTRAL_API_BASE_URL,
+                headers=headers,
+                json=payload,
+                timeout=180
+            )
+        if mistral_auth.is_auth_error(response.status_code):
+            # The generation call doubles as the authentication check
+            mistral_auth.invalidate_key(MISTRAL_API_KEY)
+            print(f"❌ Mistral AI authentication failed ({response.status_code}). Incorrect API key or insufficient permissions.")
+            sys.exit(1)
         response.raise_for_status()
+        mistral_auth.mark_key_validated(MISTRAL_API_KEY)
 
         print("Status code Mistral:", response.status_code)
 
+        if mistral_client.MISTRAL_STREAMING:
+            stream = mistral_client.assemble_stream(
+                response,
+                on_title=lambda title: print(f"📝 Title received while streaming : {title}")
+            )
+            print(f"⏱️ Mistral AI streaming : first byte after {stream.time_to_first_byte:.1f}s, {stream.chunks} chunks in {stream.elapsed:.1f}s (finish_reason: {stream.finish_reason}).")
+            article_content = token_budget.complete(MISTRAL_API_BASE_URL, headers, payload, stream.content.strip(), stream.finish_reason, stream.usage, HISTORY_BLOG_NAME)
+            generation_cache.put(payload, article_content)
+            return article_content
+
         data = response.json()
         
         if 'choices' in data and data['choices'] and 'message' in data['choices'][0] and 'content' in data['choices'][0]['message']:
             article_content = data['choices'][0]['message']['content'].strip()
             print("DEBUG: Response processed as Mistral AI Chat Completions API.")
+            # Continue the article if Mistral AI stopped on max_tokens (finish_reason "length")
+            article_content = token_budget.complete(MISTRAL_API_BASE_URL, headers, payload, article_content, data['choices'][0].get('finish_reason'), data.get('usage'), HISTORY_BLOG_NAME)
         else:
             raise ValueError(f"Mistral AI response does not contain the expected chat completions format. Full response: {data}")
         
+        generation_cache.put(payload, article_content)
         return article_content
     except requests.exceptions.RequestException as e:
         print(f"❌ HTTP ERROR generating article with Mistral AI : {e}")
@@ -215,8 +282,31 @@ def generate_article():
         print(f"❌ DATA ERROR in Mistral AI response : {e}")
         sys.exit(1)
 
+# --- Near-duplicate check before publication ---
+@metrics.timed()
+def ensure_distinct_article(article, keyword):
+    """
+    Compares the article with the MinHash index of already published articles (near_duplicate.py)
+    and regenerates it, at most NEAR_DUPLICATE_MAX_REGENERATIONS times, while it is too close to one.
+    Raises near_duplicate.NearDuplicateRejected if no sufficiently different version was obtained.
+    """
+    for attempt in range(near_duplicate.NEAR_DUPLICATE_MAX_REGENERATIONS + 1):
+        match = near_duplicate.find_similar(article)
+        if match is None:
+            return article
+        score, title, post_url = match
+        print(f"⚠️ Article too close to \"{title}\" ({post_url}) : estimated similarity {score:.0%}.")
+        if attempt < near_duplicate.NEAR_DUPLICATE_MAX_REGENERATIONS:
+            print(f"🔁 Regenerating the article ({attempt + 1}/{near_duplicate.NEAR_DUPLICATE_MAX_REGENERATIONS})...")
+            # Bypass the cache: the same request would return the same article
+            article = generate_article(keyword, use_cache=False)
+    print(f"❌ Article rejected : still too close to an already published article after {near_duplicate.NEAR_DUPLICATE_MAX_REGENERATIONS} regeneration(s).")
+    raise near_duplicate.NearDuplicateRejected(1)
+
 # --- Hashnode Publication ---
-def publish_article(content):
+@metrics.timed()
+def publish_article(content, keyword=None):
+    original_content = content
     # MODIFIED HERE: Use the specific English publication ID
     publication_id = ENGLISH_HASHNODE_PUBLICATION_ID 
     
@@ -276,7 +366,8 @@ def publish_article(content):
     print(f"DEBUG: Start of Markdown content sent: {content[:200]}...")
 
     try:
-        resp = requests.post(HASHNODE_API_URL, json={"query": mutation, "variables": variables}, headers=headers)
+        # publishPost is not idempotent: only retried when Hashnode rejected the request (429/503, rate limit)
+        resp = retry.post("hashnode", HASHNODE_API_URL, json={"query": mutation, "variables": variables}, headers=headers, idempotent=False, graphql=True)
         
         print("Publish status:", resp.status_code)
         print("Publish response:", resp.text)
@@ -297,6 +388,10 @@ def publish_article(content):
         else:
             print(f"✅ Article published successfully (URL not retrieved) : {extracted_title}")
 
+        post = ((response_data.get('data') or {}).get('publishPost') or {}).get('post') or {}
+        history_store.record_post(HISTORY_BLOG_NAME, extracted_title, keyword=keyword, post_id=post.get('id'), post_url=post_url)
+        near_duplicate.add_document(original_content, HISTORY_BLOG_NAME, title=extracted_title, post_url=post_url)
+
     except requests.exceptions.RequestException as e:
         print(f"❌ HTTP ERROR publishing article to Hashnode : {e}")
         print(f"Hashnode response on error : {resp.text if 'resp' in locals() else 'No response.'}")
@@ -305,12 +400,87 @@ def publish_article(content):
         print(f"❌ An unexpected error occurred during publication : {e}")
         sys.exit(1)
 
+# --- Durable pipeline: stages persisted in the spool (spool.py) ---
+PIPELINE_STAGES = ("build_prompt", "generate", "postprocess", "publish") # Stages of this bot, in order
+
+def run_job_stages(job, stop_after="publish"):
+    """
+    Runs the remaining stages of `job` (build_prompt -> generate -> postprocess -> publish) up to
+    `stop_after` included. Every completed stage is written to the spool: if a stage fails, the
+    next run resumes the job without calling Mistral AI again.
+    """
+    if not job.is_done("build_prompt"):
+        keyword = job.get("keyword") or choose_keywords()[0]
+        job.complete("build_prompt", keyword=keyword, prompt=build_prompt(keyword))
+    if stop_after == "build_prompt":
+        return
+
+    if not job.is_done("generate"):
+        job.complete("generate", raw_article=generate_article(job["keyword"], article_prompt=job["prompt"]))
+    if stop_after == "generate":
+        return
+
+    if not job.is_done("postprocess"):
+        try:
+            job.complete("postprocess", article=ensure_distinct_article(job["raw_article"], job["keyword"]))
+        except near_duplicate.NearDuplicateRejected:
+            # Rejected as a near-duplicate: no point in resuming it (any other failure leaves it in the spool)
+            job.abandon()
+            raise
+    if stop_after == "postprocess":
+        return
+
+    if not job.is_done("publish"):
+        first_line = job["article"].split('\n')[0].strip()
+        title = first_line[2:].strip() if first_line.startswith('# ') else None
+        attempted_at = job.get("publish_attempted_at")
+        if attempted_at and title and history_store.is_title_published(title, HISTORY_BLOG_NAME, since=attempted_at):
+            # The previous run stopped right after publishing: do not publish twice
+            # (only a post recorded since that attempt counts, not an older post with the same title)
+            print(f"✅ Article \"{title}\" was already published by a previous run.")
+        else:
+            job.update(publish_attempted_at=datetime.now().timestamp())
+            publish_article(job["article"], keyword=job["keyword"])
+        job.complete("publish")
+
+def run_next_job(stop_after="publish", count_attempt=True):
+    """
+    Publishes the oldest article of the stock (inventory.py), else resumes the oldest unfinished
+    job of the spool or starts a new one, and runs it up to the `stop_after` stage (the scheduler
+    daemon uses this to prepare the article before its slot). `count_attempt=False` resumes the job
+    without counting a new spool attempt (publication pass of a slot whose preparation already did).
+    """
+    with metrics.span("run_next_job", blog=HISTORY_BLOG_NAME):
+        job = inventory.next_job(HISTORY_BLOG_NAME)
+        if job.last_stage:
+            print(f"♻️ Resuming job {job.id} after stage '{job.last_stage}' (attempt {job.data['attempts'] + count_attempt}).")
+        if count_attempt:
+            job.start_attempt()
+        run_job_stages(job, stop_after)
+        if job.is_done("publish"):
+            job.finish()
+
+# --- Settings provided by the multi-blog runner (blog_runner.py) ---
+def configure(blog):
+    """
+    Applies a blogs.json entry (name, publication_id, model, prompt_template, keywords).
+    Missing keys keep the defaults of this script.
+    """
+    global HISTORY_BLOG_NAME, MISTRAL_MODEL_NAME, ARTICLE_PROMPT_TEMPLATE, keywords, ENGLISH_HASHNODE_PUBLICATION_ID
+    HISTORY_BLOG_NAME = blog.get("name", HISTORY_BLOG_NAME)
+    MISTRAL_MODEL_NAME = blog.get("model", MISTRAL_MODEL_NAME)
+    ARTICLE_PROMPT_TEMPLATE = blog.get("prompt_template", ARTICLE_PROMPT_TEMPLATE)
+    keywords = blog.get("keywords", keywords)
+    ENGLISH_HASHNODE_PUBLICATION_ID = blog.get("publication_id", ENGLISH_HASHNODE_PUBLICATION_ID)
+
 # --- Main Execution ---
 if __name__ == "__main__":
+    check_api_keys()
     print("Starting Hashnode bot.")
+    if mistral_auth.MISTRAL_AUTH_PROBE:
+        test_mistral_auth()
     try:
-        article = generate_article()
-        publish_article(article)
+        run_next_job()
         print("\n🎉 Hashnode bot successfully completed!")
     except Exception as e:
         print(f"\nFATAL ERROR: A critical error occurred : {e}")
@@ -0,0 +1,77 @@
+"""
+Content-addressed disk cache of Mistral AI completions (`.cache/generations/<sha256>.json`).
+
+The key is the hash of (model, messages, temperature, max_tokens), so the exact same request is
+only paid for once: reruns after a failure, dry runs and local development get the article back
+in milliseconds. The folder is bounded to GENERATION_CACHE_MAX_MB; the least recently used
+entries (by file modification time, refreshed on every hit) are evicted first.
+
+GENERATION_CACHE_BYPASS=1 ignores cached entries (new completions are still stored). The bots
+also bypass the cache when regenerating a near-duplicate article, so an already published
+cached article is never served twice.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from cache_store import cache_path, load_json, save_json
+
+GENERATION_CACHE_DIR_NAME = "generations"
+GENERATION_CACHE_MAX_MB = float(os.getenv("GENERATION_CACHE_MAX_MB", "50"))
+GENERATION_CACHE_BYPASS = os.getenv("GENERATION_CACHE_BYPASS", "0") == "1"
+
+_evict_lock = threading.Lock()
+
+def make_key(payload):
+    """Cache key of a chat completions payload (model, messages, temperature, max_tokens)."""
+    material = [payload.get("model"), payload.get("messages"), payload.get("temperature"), payload.get("max_tokens")]
+    return hashlib.sha256(json.dumps(material, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _entry_name(key):
+    return f"{GENERATION_CACHE_DIR_NAME}/{key}.json"
+
+def get(payload):
+    """Cached completion content for `payload`, or None (always None when bypassed)."""
+    if GENERATION_CACHE_BYPASS:
+        return None
+    name = _entry_name(make_key(payload))
+    entry = load_json(name)
+    if not entry:
+        return None
+    try:
+        os.utime(cache_path(name))  # Most recently used
+    except OSError:
+        pass
+    return entry.get("content")
+
+def put(payload, content):
+    """Stores a completion, then evicts the least recently used entries over the size limit."""
+    if not content:
+        return
+    save_json(_entry_name(make_key(payload)), {
+        "model": payload.get("model"),
+        "temperature": payload.get("temperature"),
+        "max_tokens": payload.get("max_tokens"),
+        "content": content,
+    })
+    evict()
+
+def evict(max_bytes=None):
+    max_bytes = GENERATION_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+    folder = os.path.dirname(cache_path(_entry_name("_")))
+    with _evict_lock:
+        entries = []
+        for entry in os.scandir(folder):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
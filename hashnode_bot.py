@@ -1,28 +1,45 @@
 import os
 import sys
 import requests
+import mistral_auth
+import mistral_client
+import retry
+import cover_manifest
+import history_store
+import near_duplicate
+import generation_cache
+import token_budget
+import spool
+import metrics
+import inventory
+from cache_store import TTLCache, fingerprint
 from datetime import datetime
 import json
 import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # --- Récupération et vérification des clés d'API ---
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 HASHNODE_API_KEY = os.getenv("HASHNODE_API_KEY")
 
-if not MISTRAL_API_KEY:
-    print("❌ ERREUR : MISTRAL_API_KEY n'est pas défini. Assurez-vous que la variable d'environnement est correctement passée et que vous avez créé une clé API Mistral AI.")
-    sys.exit(1)
+def check_api_keys():
+    """Vérifie la présence des clés d'API (appelée au démarrage du bot, pas à l'import)."""
+    if not MISTRAL_API_KEY:
+        print("❌ ERREUR : MISTRAL_API_KEY n'est pas défini. Assurez-vous que la variable d'environnement est correctement passée et que vous avez créé une clé API Mistral AI.")
+        sys.exit(1)
 
-if not HASHNODE_API_KEY:
-    print("❌ ERREUR : HASHNODE_API_KEY n'est pas défini. Assurez-vous que la variable d'environnement est correctement passée.")
-    sys.exit(1)
+    if not HASHNODE_API_KEY:
+        print("❌ ERREUR : HASHNODE_API_KEY n'est pas défini. Assurez-vous que la variable d'environnement est correctement passée.")
+        sys.exit(1)
 
 # --- Définit le modèle Mistral AI à utiliser et l'URL de l'API ---
 MISTRAL_MODEL_NAME = "mistral-tiny"
-MISTRAL_API_BASE_URL = "https://api.mistral.ai/v1/chat/completions"
+MISTRAL_API_BASE_URL = os.getenv("MISTRAL_API_BASE_URL", "https://api.mistral.ai/v1/chat/completions") # Surchargeable (serveurs de test, voir benchmarks/)
 
 # --- Configuration Hashnode ---
-HASHNODE_API_URL = "https://gql.hashnode.com/"
+HASHNODE_API_URL = os.getenv("HASHNODE_API_URL", "https://gql.hashnode.com/")
+HISTORY_BLOG_NAME = "french" # Nom de ce blog dans l'historique des publications (history_store.py)
 
 # --- Variables pour l'URL de base du dépôt GitHub ---
 GITHUB_REPOSITORY = os.getenv('GITHUB_REPOSITORY') # Format: 'user/repo'
@@ -54,9 +71,9 @@ def get_github_raw_base_url():
 
 def get_random_cover_image_url():
     """
-    Liste les images dans le répertoire spécifié et retourne l'URL raw d'une image aléatoire.
+    Liste les images dans le répertoire spécifié et retourne l'URL raw de la couverture la moins récemment utilisée
+    (voir cover_manifest.py).
     """
-    image_files = []
     # Chemin absolu vers le dossier covers dans l'environnement d'exécution de l'action
     # GITHUB_WORKSPACE est le chemin par défaut du dépôt cloné par GitHub Actions
     covers_path = os.path.join(os.getenv('GITHUB_WORKSPACE', '.'), COVER_IMAGES_DIR)
@@ -66,22 +83,15 @@ def get_random_cover_image_url():
         return None
 
     try:
-        # Lister tous les fichiers dans le dossier covers
-        for filename in os.listdir(covers_path):
-            # Vérifier si c'est un fichier image (extensions courantes)
-            if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
-                image_files.append(filename)
-        
-        if not image_files:
+        # Sélectionne la couverture la moins récemment utilisée d'après le manifeste
+        selected_file = cover_manifest.select_cover(covers_path)
+        if not selected_file:
             print(f"⚠️ Aucun fichier image trouvé dans le dossier '{covers_path}'.")
             return None
         
-        # Sélectionner un fichier aléatoirement
-        selected_file = random.choice(image_files)
-        
         # Construire l'URL raw complète
         base_url = get_github_raw_base_url()
-        full_image_url = f"{base_url}/{COVER_IMAGES_DIR}/{selected_file}"
+        full_image_url = f"{base_url}/{COVER_IMAGES_DIR}/{cover_manifest.cover_url_path(covers_path, selected_file)}"
         print(f"✅ Image de couverture sélectionnée : {selected_file}")
         return full_image_url
 
@@ -90,7 +100,16 @@ def get_random_cover_image_url():
         return None
 
 # --- Test d'authentification Mistral AI ---
+@metrics.timed()
 def test_mistral_auth():
+    """
+    Test explicite (facturé) de la clé Mistral AI, seulement utilisé si MISTRAL_AUTH_PROBE=1.
+    Ignoré si la clé a déjà été validée récemment (cache local avec TTL).
+    """
+    if mistral_auth.is_key_validated(MISTRAL_API_KEY):
+        print("✅ Clé Mistral AI déjà validée récemment (cache), test d'authentification ignoré.")
+        return
+
     headers = {
         "Authorization": f"Bearer {MISTRAL_API_KEY}",
         "Content-Type": "application/json"
@@ -107,10 +126,11 @@ def test_mistral_auth():
 
     print(f"🔎 Test d'authentification Mistral AI avec modèle '{MISTRAL_MODEL_NAME}' à l'URL: {MISTRAL_API_BASE_URL}")
     try:
-        resp = requests.post(MISTRAL_API_BASE_URL, headers=headers, json=payload, timeout=30)
+        resp = retry.post("mistral", MISTRAL_API_BASE_URL, headers=headers, json=payload, timeout=30)
         print(f"Auth test Mistral status: {resp.status_code}")
         if resp.status_code == 200:
             print("✅ Authentification Mistral AI réussie et modèle accessible.")
+            mistral_auth.mark_key_validated(MISTRAL_API_KEY)
             try:
                 response_data = resp.json()
                 if "choices" in response_data and response_data["choices"]:
@@ -120,6 +140,7 @@ def test_mistral_auth():
             except json.JSONDecodeError:
                 print("⚠️ Réponse du modèle non JSON valide. Cela pourrait être un problème de serveur Mistral AI.")
         elif resp.status_code == 401:
+            mistral_auth.invalidate_key(MISTRAL_API_KEY)
             print("❌ Échec de l’authentification Mistral AI: 401 Unauthorized. Clé API incorrecte ou permissions insuffisantes.")
             sys.exit(1)
         else:
@@ -129,8 +150,6 @@ def test_mistral_auth():
         print(f"❌ ERREUR réseau ou connexion lors du test d'authentification Mistral AI : {e}")
         sys.exit(1)
 
-test_mistral_auth()
-
 keywords = [
     "cybersecurity", "cloud computing", "blockchain", "artificial intelligence", "machine learning",
     "deep learning", "quantum computing", "edge computing", "devops", "gitops", "kubernetes", "docker",
@@ -158,25 +177,33 @@ keywords = [
     "chatbots", "virtual assistants", "real-time collaboration tools"
 ]
 
-chosen_keyword = random.choice(keywords)
+def choose_keywords(count=1):
+    """
+    Choisit `count` mots-clés distincts en évitant ceux déjà publiés récemment sur ce blog
+    et ceux des travaux en cours ou en stock (spool).
+    """
+    in_progress = set(spool.pending_artifacts(HISTORY_BLOG_NAME, "keyword"))
+    available = [k for k in keywords if k not in in_progress] or keywords
+    return history_store.choose_keywords(HISTORY_BLOG_NAME, available, count, random)
 
 # --- Génération de l'article via Mistral AI API ---
-def generate_article():
-    article_prompt = (
-        "Rédige un article de blog professionnel et détaillé d'au moins 1500 mots en français sur un sujet d'actualité "
-        f"qui concerne {chosen_keyword}. "
-        "Le titre doit être inclus au début du contenu de l'article (premier niveau de titre, ex: # Titre de l'Article). "
-        "Ne commence pas l'article par 'Titre : ' ou 'Auteur : ' ou 'Date de publication : '. "
-        "L'article doit se terminer par la signature 'Par Nathan Remacle.'. "
-        "Optimise le contenu pour le SEO en incluant des mots-clés pertinents de manière naturelle. "
-        "Évite les formulations qui sonnent 'IA' et adopte un ton humain et engageant."
-    )
-    
-    headers = {
-        "Authorization": f"Bearer {MISTRAL_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
+# Prompt de génération ({keyword} est remplacé par le mot-clé choisi ; surchargeable via blogs.json)
+ARTICLE_PROMPT_TEMPLATE = (
+    "Rédige un article de blog professionnel et détaillé d'au moins 1500 mots en français sur un sujet d'actualité "
+    "qui concerne {keyword}. "
+    "Le titre doit être inclus au début du contenu de l'article (premier niveau de titre, ex: # Titre de l'Article). "
+    "Ne commence pas l'article par 'Titre : ' ou 'Auteur : ' ou 'Date de publication : '. "
+    "L'article doit se terminer par la signature 'Par Nathan Remacle.'. "
+    "Optimise le contenu pour le SEO en incluant des mots-clés pertinents de manière naturelle. "
+    "Évite les formulations qui sonnent 'IA' et adopte un ton humain et engageant."
+)
+
+def build_prompt(keyword):
+    return ARTICLE_PROMPT_TEMPLATE.format(keyword=keyword)
+
+def build_payload(article_prompt):
+    """Corps de la requête chat completions (partagé avec le mode batch, voir mistral_batch.py)."""
+    return {
         "model": MISTRAL_MODEL_NAME,
         "messages": [
             {
@@ -185,29 +212,70 @@ def generate_article():
             }
         ],
         "temperature": 0.7,
-        "max_tokens": 2500
+        "max_tokens": token_budget.choose_max_tokens(article_prompt)
     }
 
-    print(f"\n🚀 Tentative de génération d'article avec le modèle '{MISTRAL_MODEL_NAME}'...")
+@metrics.timed()
+def generate_article(keyword=None, article_prompt=None, use_cache=True):
+    if keyword is None:
+        keyword = choose_keywords()[0]
+    if article_prompt is None:
+        article_prompt = build_prompt(keyword)
+    
+    headers = {
+        "Authorization": f"Bearer {MISTRAL_API_KEY}",
+        "Content-Type": "application/json"
+    }
+    payload = build_payload(article_prompt)
+
+    cached_article = generation_cache.get(payload) if use_cache else None
+    if cached_article is not None:
+        print(f"⚡ Article servi depuis le cache de génération, sans appel à Mistral AI (mot-clé : {keyword}).")
+        return cached_article
+
+    print(f"\n🚀 Tentative de génération d'article avec le modèle '{MISTRAL_MODEL_NAME}' (mot-clé : {keyword})...")
     try:
-        response = requests.post(
-            MISTRAL_API_BASE_URL,
-            headers=headers,
-            json=payload,
-            timeout=180
-        )
+        if mistral_client.MISTRAL_STREAMING:
+            response = mistral_client.open_stream(MISTRAL_API_BASE_URL, headers, payload)
+        else:
+            response = retry.post(
+                "mistral",
+                MISTRAL_API_BASE_URL,
+                headers=headers,
+                json=payload,
+                timeout=180
+            )
+        if mistral_auth.is_auth_error(response.status_code):
+            # L'appel de génération sert aussi de vérification d'authentification
+            mistral_auth.invalidate_key(MISTRAL_API_KEY)
+            print(f"❌ Échec de l’authentification Mistral AI ({response.status_code}). Clé API incorrecte ou permissions insuffisantes.")
+            sys.exit(1)
         response.raise_for_status()
+        mistral_auth.mark_key_validated(MISTRAL_API_KEY)
 
         print("Status code Mistral:", response.status_code)
 
+        if mistral_client.MISTRAL_STREAMING:
+            stream = mistral_client.assemble_stream(
+                response,
+                on_title=lambda title: print(f"📝 Titre reçu pendant le streaming : {title}")
+            )
+            print(f"⏱️ Streaming Mistral AI : premier octet après {stream.time_to_first_byte:.1f}s, {stream.chunks} fragments en {stream.elapsed:.1f}s (finish_reason : {stream.finish_reason}).")
+            article_content = token_budget.complete(MISTRAL_API_BASE_URL, headers, payload, stream.content.strip(), stream.finish_reason, stream.usage, HISTORY_BLOG_NAME)
+            generation_cache.put(payload, article_content)
+            return article_content
+
         data = response.json()
         
         if 'choices' in data and data['choices'] and 'message' in data['choices'][0] and 'content' in data['choices'][0]['message']:
             article_content = data['choices'][0]['message']['content'].strip()
             print("DEBUG: Réponse traitée comme Chat Completions API de Mistral AI.")
+            # Suite de l'article si Mistral AI s'est arrêté sur max_tokens (finish_reason "length")
+            article_content = token_budget.complete(MISTRAL_API_BASE_URL, headers, payload, article_content, data['choices'][0].get('finish_reason'), data.get('usage'), HISTORY_BLOG_NAME)
         else:
             raise ValueError(f"La réponse de Mistral AI ne contient pas le format de chat completions attendu. Réponse complète: {data}")
         
+        generation_cache.put(payload, article_content)
         return article_content
     except requests.exceptions.RequestException as e:
         print(f"❌ ERREUR HTTP lors de la génération de l'article avec Mistral AI : {e}")
@@ -216,10 +284,71 @@ def generate_article():
         print(f"❌ ERREUR de données dans la réponse Mistral AI : {e}")
         sys.exit(1)
 
-# --- Récupération de l'ID de la publication Hashnode ---
-HASHNODE_API_URL = "https://gql.hashnode.com/"
+# --- Détection des quasi-doublons avant publication ---
+@metrics.timed()
+def ensure_distinct_article(article, keyword):
+    """
+    Compare l'article à l'index MinHash des articles déjà publiés (near_duplicate.py) et le
+    régénère, au plus NEAR_DUPLICATE_MAX_REGENERATIONS fois, s'il est trop proche de l'un d'eux.
+    Lève near_duplicate.NearDuplicateRejected si aucune version suffisamment différente n'a été obtenue.
+    """
+    for attempt in range(near_duplicate.NEAR_DUPLICATE_MAX_REGENERATIONS + 1):
+        match = near_duplicate.find_similar(article)
+        if match is None:
+            return article
+        score, title, post_url = match
+        print(f"⚠️ Article trop proche de « {title} » ({post_url}) : similarité estimée {score:.0%}.")
+        if attempt < near_duplicate.NEAR_DUPLICATE_MAX_REGENERATIONS:
+            print(f"🔁 Régénération de l'article ({attempt + 1}/{near_duplicate.NEAR_DUPLICATE_MAX_REGENERATIONS})...")
+            # Sans le cache : la même requête redonnerait le même article
+            article = generate_article(keyword, use_cache=False)
+    print(f"❌ Article rejeté : toujours trop proche d'un article déjà publié après {near_duplicate.NEAR_DUPLICATE_MAX_REGENERATIONS} régénération(s).")
+    raise near_duplicate.NearDuplicateRejected(1)
 
+# --- Récupération de l'ID de la publication Hashnode ---
+# L'ID de publication ne change pas pour une clé donnée : il est mémorisé en mémoire pour le processus
+# et sur disque (indexé par l'empreinte de la clé Hashnode) pendant HASHNODE_PUBLICATION_ID_TTL_HOURS.
+HASHNODE_PUBLICATION_ID_TTL_HOURS = float(os.getenv("HASHNODE_PUBLICATION_ID_TTL_HOURS", "168"))
+_publication_id_cache = TTLCache("hashnode_publication_id.json", ttl_seconds=HASHNODE_PUBLICATION_ID_TTL_HOURS * 3600)
+_resolved_publication_id = None
+_configured_publication_id = None # ID fixé par blogs.json : jamais remplacé par une recherche `me { publications }`
+
+@metrics.timed()
 def get_publication_id():
+    """
+    Retourne l'ID de la publication Hashnode : mémoire du processus, puis cache disque,
+    puis requête GraphQL `me { publications }` en dernier recours.
+    """
+    global _resolved_publication_id
+    if _resolved_publication_id:
+        return _resolved_publication_id
+
+    cached_id = _publication_id_cache.get(fingerprint(HASHNODE_API_KEY))
+    if cached_id:
+        print(f"✅ ID de publication Hashnode récupéré depuis le cache : {cached_id}")
+        _resolved_publication_id = cached_id
+        return cached_id
+
+    _resolved_publication_id = fetch_publication_id()
+    _publication_id_cache.set(fingerprint(HASHNODE_API_KEY), _resolved_publication_id)
+    return _resolved_publication_id
+
+def invalidate_publication_id():
+    """Oublie l'ID de publication mémorisé (après une erreur « publication introuvable »)."""
+    global _resolved_publication_id
+    _resolved_publication_id = None
+    _publication_id_cache.delete(fingerprint(HASHNODE_API_KEY))
+
+def is_publication_not_found_error(errors):
+    """Détecte une erreur GraphQL indiquant que l'ID de publication envoyé n'existe pas (ou plus)."""
+    for error in errors:
+        message = str(error.get('message', '')).lower()
+        code = str(error.get('extensions', {}).get('code', '')).upper()
+        if 'publication' in message and ('not found' in message or 'does not exist' in message or code == 'NOT_FOUND'):
+            return True
+    return False
+
+def fetch_publication_id():
     query = """
     query {
       me {
@@ -239,7 +368,7 @@ def get_publication_id():
     }
     print("\n🔎 Récupération de l'ID de publication Hashnode...")
     try:
-        resp = requests.post(HASHNODE_API_URL, json={"query": query}, headers=headers)
+        resp = retry.post("hashnode", HASHNODE_API_URL, json={"query": query}, headers=headers, graphql=True)
         resp.raise_for_status()
         data = resp.json()
         
@@ -267,7 +396,9 @@ def get_publication_id():
         sys.exit(1)
 
 # --- Publication de l'article sur Hashnode ---
-def publish_article(content):
+@metrics.timed()
+def publish_article(content, keyword=None, retry_on_stale_publication_id=True):
+    original_content = content
     publication_id = get_publication_id()
     
     first_line_match = content.split('\n')[0].strip()
@@ -329,7 +460,8 @@ def publish_article(content):
     print(f"DEBUG: Début du contenu Markdown envoyé: {content[:200]}...")
 
     try:
-        resp = requests.post(HASHNODE_API_URL, json={"query": mutation, "variables": variables}, headers=headers)
+        # publishPost n'est pas idempotent : nouvelle tentative uniquement si Hashnode a refusé la requête (429/503, limite de débit)
+        resp = retry.post("hashnode", HASHNODE_API_URL, json={"query": mutation, "variables": variables}, headers=headers, idempotent=False, graphql=True)
         
         print("Publish status:", resp.status_code)
         print("Publish response:", resp.text) # Ceci va afficher la nouvelle erreur si elle existe
@@ -337,6 +469,14 @@ def publish_article(content):
         response_data = resp.json()
 
         if 'errors' in response_data and response_data['errors']:
+            if _configured_publication_id and is_publication_not_found_error(response_data['errors']):
+                # `me { publications(first: 1) }` pourrait renvoyer la publication d'un autre blog de la même clé
+                print(f"❌ ERREUR : la publication « {_configured_publication_id} » de blogs.json (blog « {HISTORY_BLOG_NAME} ») est introuvable sur Hashnode. Corrigez `publication_id` dans blogs.json.")
+                sys.exit(1)
+            if retry_on_stale_publication_id and is_publication_not_found_error(response_data['errors']):
+                print("⚠️ L'ID de publication en cache n'est plus valide. Nouvelle résolution puis nouvelle tentative...")
+                invalidate_publication_id()
+                return publish_article(original_content, keyword=keyword, retry_on_stale_publication_id=False)
             print(f"❌ ERREUR GraphQL de Hashnode lors de la publication de l'article : {response_data['errors']}")
             sys.exit(1)
 
@@ -350,6 +490,10 @@ def publish_article(content):
         else:
             print(f"✅ Article publié avec succès (URL non récupérée) : {extracted_title}")
 
+        post = ((response_data.get('data') or {}).get('publishPost') or {}).get('post') or {}
+        history_store.record_post(HISTORY_BLOG_NAME, extracted_title, keyword=keyword, post_id=post.get('id'), post_url=post_url)
+        near_duplicate.add_document(original_content, HISTORY_BLOG_NAME, title=extracted_title, post_url=post_url)
+
     except requests.exceptions.RequestException as e:
         print(f"❌ ERREUR HTTP lors de la publication de l'article sur Hashnode : {e}")
         print(f"Réponse Hashnode en cas d'erreur : {resp.text if 'resp' in locals() else 'Pas de réponse.'}")
@@ -358,13 +502,161 @@ def publish_article(content):
         print(f"❌ Une erreur inattendue est survenue lors de la publication : {e}")
         sys.exit(1)
 
+# --- Pipeline durable : étapes enregistrées dans le spool (spool.py) ---
+PIPELINE_STAGES = ("build_prompt", "generate", "postprocess", "publish") # Étapes de ce bot, dans l'ordre
+
+def run_job_stages(job, stop_after="publish"):
+    """
+    Exécute les étapes restantes de `job` (build_prompt -> generate -> postprocess -> publish)
+    jusqu'à `stop_after` inclus. Chaque étape terminée est enregistrée dans le spool : si une
+    étape échoue, la prochaine exécution reprend le travail sans rappeler Mistral AI.
+    """
+    if not job.is_done("build_prompt"):
+        keyword = job.get("keyword") or choose_keywords()[0]
+        job.complete("build_prompt", keyword=keyword, prompt=build_prompt(keyword))
+    if stop_after == "build_prompt":
+        return
+
+    if not job.is_done("generate"):
+        job.complete("generate", raw_article=generate_article(job["keyword"], article_prompt=job["prompt"]))
+    if stop_after == "generate":
+        return
+
+    if not job.is_done("postprocess"):
+        try:
+            job.complete("postprocess", article=ensure_distinct_article(job["raw_article"], job["keyword"]))
+        except near_duplicate.NearDuplicateRejected:
+            # Article rejeté comme quasi-doublon : inutile de le reprendre (toute autre erreur le laisse dans le spool)
+            job.abandon()
+            raise
+    if stop_after == "postprocess":
+        return
+
+    if not job.is_done("publish"):
+        first_line = job["article"].split('\n')[0].strip()
+        title = first_line[2:].strip() if first_line.startswith('# ') else None
+        attempted_at = job.get("publish_attempted_at")
+        if attempted_at and title and history_store.is_title_published(title, HISTORY_BLOG_NAME, since=attempted_at):
+            # L'exécution précédente s'est arrêtée après la publication : ne pas publier deux fois
+            # (seul un post enregistré depuis cette tentative compte, pas un ancien post du même titre)
+            print(f"✅ Article « {title} » déjà publié lors d'une exécution précédente.")
+        else:
+            job.update(publish_attempted_at=datetime.now().timestamp())
+            publish_article(job["article"], keyword=job["keyword"])
+        job.complete("publish")
+
+def run_next_job(stop_after="publish", count_attempt=True):
+    """
+    Publie le plus ancien article du stock (inventory.py), sinon reprend le plus ancien travail
+    inachevé du spool ou en démarre un nouveau, et l'exécute jusqu'à l'étape `stop_after` (le mode
+    démon prépare ainsi l'article avant l'heure de publication). `count_attempt=False` reprend le
+    travail sans compter de nouvelle tentative (publication d'un créneau déjà préparé).
+    """
+    with metrics.span("run_next_job", blog=HISTORY_BLOG_NAME):
+        job = inventory.next_job(HISTORY_BLOG_NAME)
+        if job.last_stage:
+            print(f"♻️ Reprise du travail {job.id} après l'étape « {job.last_stage} » (tentative {job.data['attempts'] + count_attempt}).")
+        if count_attempt:
+            job.start_attempt()
+        run_job_stages(job, stop_after)
+        if job.is_done("publish"):
+            job.finish()
+
+# --- Mode batch : génération concurrente de plusieurs articles ---
+def run_batch(count, concurrency):
+    """
+    Génère `count` articles sur des mots-clés distincts avec au plus `concurrency`
+    appels Mistral AI simultanés, puis les publie un par un dans l'ordre de la sélection.
+    Les travaux inachevés d'une exécution précédente (spool) passent en premier ; les articles
+    du stock déjà vérifiés sont revérifiés contre les articles publiés depuis (inventory.is_still_distinct).
+    """
+    if count > len(keywords):
+        print(f"⚠️ Seulement {len(keywords)} mots-clés disponibles, le nombre d'articles est réduit en conséquence.")
+        count = len(keywords)
+    jobs = [job for job in spool.pending_jobs(HISTORY_BLOG_NAME)
+            if not job.is_done("postprocess") or inventory.is_still_distinct(job)][:count]
+    if jobs:
+        print(f"♻️ Reprise de {len(jobs)} travail(aux) inachevé(s) du spool.")
+    pending_keywords = {job.get("keyword") for job in jobs}
+    new_keywords = [k for k in choose_keywords(count) if k not in pending_keywords][:count - len(jobs)]
+    jobs += [spool.create_job(HISTORY_BLOG_NAME, keyword=keyword) for keyword in new_keywords]
+    workers = max(1, min(concurrency, count))
+
+    print(f"\n📦 Mode batch : {count} article(s), {workers} génération(s) en parallèle.")
+    generated = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for job in jobs:
+            job.start_attempt()
+            futures[executor.submit(run_job_stages, job, "generate")] = job
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                future.result()
+                generated.append(job)
+                print(f"✅ Article généré pour le mot-clé : {job['keyword']}")
+            except SystemExit:
+                # generate_article() quitte en cas d'erreur : on abandonne seulement cet article
+                print(f"⚠️ Génération échouée pour le mot-clé '{job.get('keyword')}', article ignoré.")
+
+    published = 0
+    for job in jobs:
+        if job not in generated:
+            continue
+        if job.is_done("postprocess") and not inventory.is_still_distinct(job):
+            continue  # Article du stock devenu trop proche d'un article publié plus haut dans ce batch
+        try:
+            run_job_stages(job, "postprocess")
+        except near_duplicate.NearDuplicateRejected:
+            print(f"⚠️ Aucun article assez original obtenu pour le mot-clé '{job['keyword']}', article ignoré.")
+            continue
+        try:
+            run_job_stages(job)
+        except SystemExit:
+            # publish_article() quitte en cas d'erreur : l'article reste dans le spool, on publie les suivants
+            print(f"⚠️ Publication échouée pour le mot-clé '{job['keyword']}', article conservé pour la prochaine exécution.")
+            continue
+        job.finish()
+        published += 1
+
+    print(f"\n📊 Batch terminé : {published}/{count} article(s) publié(s).")
+    if published < count:
+        sys.exit(1)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Génère et publie des articles de blog en français sur Hashnode.")
+    parser.add_argument("--count", type=int, default=1, help="Nombre d'articles à générer et publier (défaut : 1).")
+    parser.add_argument("--concurrency", type=int, default=4, help="Nombre maximal de générations simultanées en mode batch (défaut : 4).")
+    return parser.parse_args()
+
+# --- Réglages fournis par le lanceur multi-blogs (blog_runner.py) ---
+def configure(blog):
+    """
+    Applique une entrée de blogs.json (name, publication_id, model, prompt_template, keywords).
+    Les clés absentes gardent les valeurs par défaut de ce script.
+    """
+    global HISTORY_BLOG_NAME, MISTRAL_MODEL_NAME, ARTICLE_PROMPT_TEMPLATE, keywords, _resolved_publication_id, _configured_publication_id
+    HISTORY_BLOG_NAME = blog.get("name", HISTORY_BLOG_NAME)
+    MISTRAL_MODEL_NAME = blog.get("model", MISTRAL_MODEL_NAME)
+    ARTICLE_PROMPT_TEMPLATE = blog.get("prompt_template", ARTICLE_PROMPT_TEMPLATE)
+    keywords = blog.get("keywords", keywords)
+    if blog.get("publication_id"):
+        # ID connu : pas besoin de la requête `me { publications }`
+        _resolved_publication_id = _configured_publication_id = blog["publication_id"]
+
 # --- Exécution principale ---
 if __name__ == "__main__":
+    args = parse_args()
+    check_api_keys()
     print("Démarrage du bot Hashnode.")
+    if mistral_auth.MISTRAL_AUTH_PROBE:
+        test_mistral_auth()
     try:
-        article = generate_article()
-        publish_article(article)
+        if args.count > 1:
+            run_batch(args.count, args.concurrency)
+        else:
+            run_next_job()
         print("\n🎉 Bot Hashnode terminé avec succès !")
     except Exception as e:
         print(f"\nFATAL ERROR: Une erreur critique est survenue : {e}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
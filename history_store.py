@@ -0,0 +1,115 @@
+"""
+Append-only history of the posts published by the bots (SQLite, `.cache/publish_history.sqlite3`).
+
+One row is written after each successful publishPost. Keyword, news URL, title hash and date
+are indexed so that topic selection can exclude recently used keywords and already covered
+news articles without scanning the whole history.
+"""
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+
+from cache_store import cache_path
+
+HISTORY_DB_NAME = "publish_history.sqlite3"
+# A keyword is not reused on the same blog for this many days
+HISTORY_KEYWORD_COOLDOWN_DAYS = int(os.getenv("HISTORY_KEYWORD_COOLDOWN_DAYS", "30"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    published_at REAL NOT NULL,
+    published_date TEXT NOT NULL,
+    blog TEXT NOT NULL,
+    keyword TEXT,
+    news_url TEXT,
+    title TEXT NOT NULL,
+    title_hash TEXT NOT NULL,
+    post_id TEXT,
+    post_url TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_posts_blog_keyword ON posts (blog, keyword);
+CREATE INDEX IF NOT EXISTS idx_posts_news_url ON posts (news_url);
+CREATE INDEX IF NOT EXISTS idx_posts_title_hash ON posts (title_hash);
+CREATE INDEX IF NOT EXISTS idx_posts_date ON posts (published_date);
+"""
+
+def _connect():
+    connection = sqlite3.connect(cache_path(HISTORY_DB_NAME), timeout=30)
+    connection.executescript(_SCHEMA)
+    return connection
+
+def title_hash(title):
+    normalized = " ".join(title.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def record_post(blog, title, keyword=None, news_url=None, post_id=None, post_url=None):
+    """
+    Appends a published post to the history and returns its row id. Never raises: the post is
+    already online, so a history write failure is only reported.
+    """
+    now = time.time()
+    try:
+        with closing(_connect()) as connection, connection:
+            cursor = connection.execute(
+                "INSERT INTO posts (published_at, published_date, blog, keyword, news_url, title, title_hash, post_id, post_url) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (now, datetime.fromtimestamp(now).strftime('%Y-%m-%d'), blog, keyword, news_url,
+                 title, title_hash(title), post_id, post_url),
+            )
+            return cursor.lastrowid
+    except sqlite3.Error as e:
+        print(f"⚠️ Unable to record the published post in the history : {e}")
+        return None
+
+def recent_keywords(blog, days=None):
+    """Keywords used on `blog` during the last `days` days (HISTORY_KEYWORD_COOLDOWN_DAYS by default)."""
+    days = HISTORY_KEYWORD_COOLDOWN_DAYS if days is None else days
+    since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    with closing(_connect()) as connection:
+        rows = connection.execute(
+            "SELECT DISTINCT keyword FROM posts WHERE blog = ? AND keyword IS NOT NULL AND published_date >= ?",
+            (blog, since),
+        ).fetchall()
+    return {row[0] for row in rows}
+
+def published_news_urls(urls):
+    """Subset of `urls` that were already turned into a post (any blog)."""
+    urls = [url for url in urls if url]
+    if not urls:
+        return set()
+    placeholders = ",".join("?" * len(urls))
+    with closing(_connect()) as connection:
+        rows = connection.execute(
+            f"SELECT DISTINCT news_url FROM posts WHERE news_url IN ({placeholders})", urls
+        ).fetchall()
+    return {row[0] for row in rows}
+
+def is_title_published(title, blog=None, since=None):
+    """True when a post titled `title` is in the history (of `blog`, recorded at or after the `since` timestamp)."""
+    query = "SELECT 1 FROM posts WHERE title_hash = ?"
+    params = [title_hash(title)]
+    if blog:
+        query += " AND blog = ?"
+        params.append(blog)
+    if since is not None:
+        query += " AND published_at >= ?"
+        params.append(since)
+    with closing(_connect()) as connection:
+        return connection.execute(query + " LIMIT 1", params).fetchone() is not None
+
+def choose_keywords(blog, keywords, count, rng):
+    """
+    Picks `count` distinct keywords, preferring those not used on `blog` within the cooldown.
+    Falls back to recently used keywords only when there are not enough fresh ones.
+    """
+    used = recent_keywords(blog)
+    fresh = [k for k in keywords if k not in used]
+    stale = [k for k in keywords if k in used]
+    count = min(count, len(keywords))
+    if len(fresh) >= count:
+        return rng.sample(fresh, count)
+    return fresh + rng.sample(stale, count - len(fresh))
@@ -0,0 +1,84 @@
+"""
+Shared HTTP client for the Hashnode bots.
+
+Every host (api.mistral.ai, gql.hashnode.com, newsapi.org, image CDNs...) gets its own
+keep-alive requests.Session, so repeated calls reuse the same TCP+TLS connections
+instead of paying a new handshake for each request.
+"""
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# --- Configuration (overridable through environment variables) ---
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))             # Connections kept alive per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))  # Seconds to establish a connection
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))        # Default seconds to wait for a response
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def _host_key(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+def get_session(url):
+    """Returns the pooled session for the host of `url`, creating it on first use."""
+    key = _host_key(url)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[key] = session
+    return session
+
+def _resolve_timeout(timeout):
+    """
+    Accepts the same `timeout` values as requests. A single number is treated as the read
+    timeout, so existing call sites like `timeout=180` keep a short connect timeout.
+    """
+    if timeout is None:
+        return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    if isinstance(timeout, (int, float)):
+        return (min(HTTP_CONNECT_TIMEOUT, timeout), timeout)
+    return timeout
+
+def request(method, url, timeout=None, **kwargs):
+    """Sends a request through the pooled session of the target host (recorded in metrics.py)."""
+    started_at = time.monotonic()
+    try:
+        response = get_session(url).request(method, url, timeout=_resolve_timeout(timeout), **kwargs)
+    except requests.exceptions.RequestException as e:
+        metrics.record_http(method, url, started_at, error=e)
+        raise
+    metrics.record_http(method, url, started_at, response=response, stream=kwargs.get("stream", False))
+    return response
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+def head(url, **kwargs):
+    kwargs.setdefault("allow_redirects", False)  # Same default as requests.head()
+    return request("HEAD", url, **kwargs)
+
+def close_all():
+    """Closes every pooled session (useful at the end of long-running processes)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,112 @@
+"""
+Concurrent, cached validation of remote image URLs (news article covers).
+
+All candidate URLs are checked in parallel on a bounded worker pool, so validating a whole
+NewsAPI page costs about one timeout at worst. Each URL is checked with a HEAD request,
+falling back to a one-byte ranged GET when the server rejects HEAD. Definite answers are
+cached on disk for IMAGE_VALIDATION_TTL_HOURS; a timeout, a connection error or a 5xx/429 is
+checked again next time and never counts against the host. Hosts listed in
+KNOWN_BAD_IMAGE_HOSTS (or that failed repeatedly within the TTL) are skipped without any request.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+import http_client
+from cache_store import TTLCache
+
+IMAGE_VALIDATION_TIMEOUT = float(os.getenv("IMAGE_VALIDATION_TIMEOUT", "5"))
+IMAGE_VALIDATION_WORKERS = int(os.getenv("IMAGE_VALIDATION_WORKERS", "8"))
+IMAGE_VALIDATION_TTL_HOURS = float(os.getenv("IMAGE_VALIDATION_TTL_HOURS", "24"))
+# Comma-separated host names whose images are never usable (hotlink protection, expiring URLs...)
+KNOWN_BAD_IMAGE_HOSTS = {h.strip().lower() for h in os.getenv("KNOWN_BAD_IMAGE_HOSTS", "").split(",") if h.strip()}
+# A host that failed this many times within the TTL is treated as known-bad
+BAD_HOST_FAILURE_THRESHOLD = int(os.getenv("BAD_HOST_FAILURE_THRESHOLD", "3"))
+
+# Status codes that mean "HEAD not supported here", worth retrying with GET
+_HEAD_REJECTED_STATUSES = (403, 405, 501)
+# Status codes that say nothing about the image itself (overloaded or rate-limited server)
+_TRANSIENT_STATUSES = (408, 429)
+
+_url_cache = TTLCache("image_url_validation.json", ttl_seconds=IMAGE_VALIDATION_TTL_HOURS * 3600)
+_host_failures = TTLCache("image_host_failures.json", ttl_seconds=IMAGE_VALIDATION_TTL_HOURS * 3600)
+
+def _host(url):
+    return urlsplit(url).hostname or ""
+
+def is_known_bad_host(url):
+    host = _host(url).lower()
+    if host in KNOWN_BAD_IMAGE_HOSTS:
+        return True
+    return (_host_failures.get(host, 0) or 0) >= BAD_HOST_FAILURE_THRESHOLD
+
+def _is_image_response(response):
+    """True/False for a definite answer, None for a transient error (not worth caching)."""
+    if response.status_code >= 500 or response.status_code in _TRANSIENT_STATUSES:
+        return None
+    return response.ok and response.headers.get('Content-Type', '').startswith('image/')
+
+def _check_url(url):
+    """
+    Performs the network check for one URL. Returns True if it serves an image, False if it
+    definitely does not, None when the check failed (timeout, connection error, 5xx, 429).
+    """
+    try:
+        response = http_client.head(url, timeout=IMAGE_VALIDATION_TIMEOUT, allow_redirects=True)
+        if _is_image_response(response):
+            return True
+        if not response.ok and response.status_code not in _HEAD_REJECTED_STATUSES:
+            return _is_image_response(response)
+
+        # HEAD rejected (or no Content-Type): ask for the first byte only
+        response = http_client.get(url, timeout=IMAGE_VALIDATION_TIMEOUT, headers={"Range": "bytes=0-0"}, stream=True)
+        try:
+            return _is_image_response(response)
+        finally:
+            response.close()
+    except requests.exceptions.RequestException as e:
+        print(f"DEBUG: Image URL validation failed for {url}: {e}")
+        return None
+
+def validate_image_urls(urls):
+    """
+    Validates `urls` (None/empty values are ignored) and returns {url: bool}.
+    Cached results are reused; the remaining URLs are checked in parallel.
+    """
+    results = {}
+    to_check = []
+    for url in dict.fromkeys(u for u in urls if u):
+        cached = _url_cache.get(url)
+        if cached is not None:
+            results[url] = cached
+        elif is_known_bad_host(url):
+            print(f"DEBUG: Skipping image from known-bad host: {url}")
+            results[url] = False
+        else:
+            to_check.append(url)
+
+    if to_check:
+        workers = max(1, min(IMAGE_VALIDATION_WORKERS, len(to_check)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            checked = dict(zip(to_check, executor.map(_check_url, to_check)))
+        results.update((url, bool(valid)) for url, valid in checked.items())
+        checked = {url: valid for url, valid in checked.items() if valid is not None}
+        _url_cache.set_many(checked)
+
+        failures = {}
+        for url, valid in checked.items():
+            if not valid:
+                host = _host(url).lower()
+                failures[host] = failures.get(host, _host_failures.get(host, 0) or 0) + 1
+        if failures:
+            _host_failures.set_many(failures)
+
+    return results
+
+def is_image_url_valid(url):
+    """Single-URL helper; uses the cache warmed by validate_image_urls() when available."""
+    if not url:
+        return False
+    return validate_image_urls([url]).get(url, False)
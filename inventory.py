@@ -0,0 +1,198 @@
+"""
+Stock of ready-to-publish articles, generated ahead of time (`python inventory.py`).
+
+An article of the stock is a spool job completed up to the postprocess stage: it was generated
+and checked against the published posts, only the publishPost call remains. The bots' run_next_job()
+takes the oldest stocked article first (next_job()), so the daily publication is a single GraphQL
+call and a Mistral AI outage does not block it until the stock is empty. Each stocked job keeps
+its metadata in the `inventory` artifact: keyword, source, title, word count and generated-at.
+
+The stock size of a blog is the `inventory` key of its blogs.json entry (default INVENTORY_TARGET).
+Refills are meant to run off-peak, e.g. right after the daily publication. With --batch, the
+articles of every blog are generated by the Mistral AI Batch API (mistral_batch.py) instead of
+synchronous calls, which suits large backfills.
+
+Usage:
+    python inventory.py [--config blogs.json] [--only french] [--target 3] [--batch] [--list]
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import blog_runner
+import mistral_auth
+import mistral_batch
+import near_duplicate
+import spool
+
+INVENTORY_TARGET = int(os.getenv("INVENTORY_TARGET", "0"))
+INVENTORY_CONCURRENCY = int(os.getenv("INVENTORY_CONCURRENCY", "3"))
+
+def describe(job):
+    """Metadata of a stocked article."""
+    article = job["article"]
+    first_line = article.split('\n')[0].strip()
+    news_article = job.get("news_article") or {}
+    return {
+        "keyword": job.get("keyword"),
+        "source": news_article.get("url") or "keyword",
+        "title": first_line[2:].strip() if first_line.startswith('# ') else None,
+        "word_count": len(article.split()),
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+def stock(blog):
+    """Ready-to-publish jobs of `blog`, oldest first."""
+    return [job for job in spool.pending_jobs(blog) if job.is_done("postprocess")]
+
+def is_still_distinct(job):
+    """
+    Checks a stocked article again before publishing it: other stocked articles may have been
+    published since it was checked. A job that became a near-duplicate is moved to failed/.
+    """
+    if job.get("publish_attempted_at"):
+        return True  # May already be online: let the publish stage check the history
+    match = near_duplicate.find_similar(job["article"])
+    if match is None:
+        return True
+    score, title, post_url = match
+    print(f"⚠️ Stocked article {job.id} is now too close to \"{title}\" ({post_url}, {score:.0%}), dropped.")
+    job.abandon()
+    return False
+
+def next_job(blog):
+    """
+    Oldest stocked article still distinct from the published posts, else the oldest unfinished
+    job of the spool, else a new job.
+    """
+    for job in stock(blog):
+        if is_still_distinct(job):
+            return job
+    return spool.next_job(blog)
+
+def missing_count(blog_name, target):
+    missing = target - len(stock(blog_name))
+    if missing <= 0:
+        print(f"📦 [{blog_name}] Stock full: {target} article(s) ready.")
+    else:
+        print(f"📦 [{blog_name}] Generating {missing} article(s) for the stock...")
+    return max(0, missing)
+
+def prepare_jobs(module, blog_name, count):
+    """
+    Returns up to `count` spool jobs with their prompt built: the unfinished jobs of the spool first,
+    then new ones. Sequential: each new job picks a keyword (or news) not already taken by another
+    job of the spool.
+    """
+    unfinished = [job for job in spool.pending_jobs(blog_name) if not job.is_done("postprocess")]
+    jobs = []
+    for index in range(count):
+        job = unfinished[index] if index < len(unfinished) else spool.create_job(blog_name)
+        job.start_attempt()
+        try:
+            module.run_job_stages(job, "build_prompt")
+        except SystemExit:
+            print(f"⚠️ [{blog_name}] Unable to prepare a prompt, stock refill stopped.")
+            break
+        jobs.append(job)
+    return jobs
+
+def generate_jobs(module, blog_name, jobs, concurrency=INVENTORY_CONCURRENCY):
+    """Generates the articles of `jobs` with at most `concurrency` Mistral AI calls at a time."""
+    generated = []
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(jobs) or 1))) as executor:
+        futures = {executor.submit(module.run_job_stages, job, "generate"): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                future.result()
+                generated.append(futures[future])
+            except SystemExit:
+                # The job stays in the spool and is resumed by the next run
+                print(f"⚠️ [{blog_name}] Generation failed for job {futures[future].id}.")
+    return generated
+
+def stock_jobs(module, blog_name, generated):
+    """Checks the generated jobs against the published posts and stocks them. Returns the number stocked."""
+    stocked = 0
+    for job in sorted(generated, key=lambda job: job.data["created_at"]):
+        try:
+            module.run_job_stages(job, "postprocess")
+        except SystemExit:
+            continue  # Near-duplicate (moved to failed/) or failed regeneration (stays in the spool)
+        job.update(inventory=describe(job))
+        stocked += 1
+        print(f"✅ [{blog_name}] In stock: {job['inventory']['title']} ({job['inventory']['word_count']} words).")
+    return stocked
+
+def refill(module, blog_name, target, concurrency=INVENTORY_CONCURRENCY):
+    """
+    Generates articles until `blog_name` has `target` of them in stock, with at most `concurrency`
+    Mistral AI calls at a time. Returns the number of articles still missing.
+    """
+    missing = missing_count(blog_name, target)
+    if not missing:
+        return 0
+    jobs = prepare_jobs(module, blog_name, missing)
+    return missing - stock_jobs(module, blog_name, generate_jobs(module, blog_name, jobs, concurrency))
+
+def refill_with_batch(modules, targets):
+    """
+    Refills the stock of every blog with a single Mistral AI batch job per model.
+    Returns {blog name: number of articles still missing}.
+    """
+    missing = {name: missing_count(name, targets[name]) for name in modules}
+    jobs = {name: prepare_jobs(modules[name], name, missing[name]) for name in modules if missing[name]}
+    generated = mistral_batch.generate_jobs([(modules[name], job) for name in jobs for job in jobs[name]])
+    return {
+        name: missing[name] - stock_jobs(modules[name], name, [job for job in generated if job.blog == name])
+        for name in modules
+    }
+
+def list_stock(blogs):
+    for blog in blogs:
+        jobs = stock(blog["name"])
+        print(f"📦 {blog['name']}: {len(jobs)} article(s) ready")
+        for job in jobs:
+            meta = job.get("inventory") or {}
+            print(f"   - {meta.get('title') or job.id} [{meta.get('keyword')}, {meta.get('word_count')} words, "
+                  f"source: {meta.get('source')}, generated {meta.get('generated_at')}]")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fills the stock of ready-to-publish articles of the blogs of blogs.json.")
+    parser.add_argument("--config", default=blog_runner.DEFAULT_CONFIG_PATH, help="Blog configuration file (default: blogs.json).")
+    parser.add_argument("--only", help="Comma-separated blog names to refill (default: every enabled blog).")
+    parser.add_argument("--target", type=int, help="Articles to keep in stock per blog (default: `inventory` of blogs.json, else INVENTORY_TARGET).")
+    parser.add_argument("--batch", action="store_true", help="Generate through the Mistral AI Batch API (slower, cheaper, for large refills).")
+    parser.add_argument("--list", action="store_true", help="Print the current stock and exit.")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    blogs = blog_runner.select_blogs(blog_runner.load_config(args.config), args.only)
+    if args.list:
+        list_stock(blogs)
+        sys.exit(0)
+
+    targets = {blog["name"]: args.target if args.target is not None else blog.get("inventory", INVENTORY_TARGET) for blog in blogs}
+    blogs = [blog for blog in blogs if targets[blog["name"]] > 0]
+    if not blogs:
+        print("⚠️ No blog with an article stock to refill.")
+        sys.exit(0)
+
+    modules = {blog["name"]: blog_runner.load_bot(blog) for blog in blogs}
+    for module in modules.values():
+        module.check_api_keys()
+    if mistral_auth.MISTRAL_AUTH_PROBE:
+        next(iter(modules.values())).test_mistral_auth()
+
+    if args.batch:
+        short = refill_with_batch(modules, targets)
+    else:
+        short = {name: refill(modules[name], name, targets[name]) for name in modules}
+    short = {name: missing for name, missing in short.items() if missing > 0}
+    if short:
+        print(f"\n❌ Stock incomplete : {', '.join(f'{name} ({missing} missing)' for name, missing in short.items())}")
+        sys.exit(1)
+    print("\n🎉 Every article stock is full!")
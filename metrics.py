@@ -0,0 +1,241 @@
+"""
+Lightweight run instrumentation: spans around the pipeline stages and external calls, HTTP request
+metrics and counters, written as JSON lines and optionally as a Prometheus textfile.
+
+* span(name, **labels) / @timed(name) time a block or a function. Spans nest per thread; a child
+  span inherits the `blog` label of its parent. A span raising (including the bots' sys.exit())
+  is recorded with status "error".
+* http_client records every HTTP request (host, method, status code, duration, bytes sent and
+  received), retry.py every retry, token_budget.py the tokens of every generation.
+
+Events are buffered and appended at exit to `.cache/metrics.jsonl` (rotated to metrics.jsonl.1
+above METRICS_MAX_MB), which persists across runs with the cache: `python metrics.py --days 7`
+summarizes where the wall time, the retries and the tokens went. METRICS_PROMETHEUS_FILE, if set,
+receives the totals of the run in the Prometheus text format (node_exporter textfile collector).
+METRICS_ENABLED=0 disables everything.
+"""
+import argparse
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from cache_store import cache_path
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_LOG_NAME = "metrics.jsonl"
+METRICS_MAX_MB = float(os.getenv("METRICS_MAX_MB", "20"))
+METRICS_PROMETHEUS_FILE = os.getenv("METRICS_PROMETHEUS_FILE")
+METRICS_FLUSH_EVENTS = 500  # Buffered events before an intermediate write
+RUN_ID = os.getenv("GITHUB_RUN_ID") or uuid.uuid4().hex[:12]
+
+_events = []
+_totals = defaultdict(float)  # (metric name, sorted label items) -> value, for the Prometheus file
+_lock = threading.Lock()
+_local = threading.local()
+
+# --- Recording ---
+
+def _add_total(name, value, **labels):
+    _totals[(name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None)))] += value
+
+def event(kind, **fields):
+    """Buffers one metrics event."""
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        _events.append(dict(fields, event=kind, run=RUN_ID, time=round(time.time(), 3)))
+        should_flush = len(_events) >= METRICS_FLUSH_EVENTS
+    if should_flush:
+        flush()
+
+def incr(name, value=1, **labels):
+    """Adds `value` to a counter of the run (Prometheus file) and records it as an event."""
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        _add_total(name, value, **labels)
+    event("counter", name=name, value=value, **labels)
+
+class span:
+    """Times a block: `with metrics.span("publish_article", blog="french"):`."""
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        if self.parent is not None and "blog" in self.parent.labels:
+            self.labels.setdefault("blog", self.parent.labels["blog"])
+        stack.append(self)
+        self.started_at = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.monotonic() - self.started_at
+        _local.stack.pop()
+        status = "ok" if exc_type is None or (exc_type is SystemExit and not exc.code) else "error"
+        if METRICS_ENABLED:
+            with _lock:
+                _add_total("span_duration_seconds_sum", duration, span=self.name, status=status, blog=self.labels.get("blog"))
+                _add_total("span_duration_seconds_count", 1, span=self.name, status=status, blog=self.labels.get("blog"))
+            event("span", name=self.name, duration=round(duration, 4), status=status,
+                  parent=self.parent.name if self.parent else None, **self.labels)
+        return False
+
+def timed(name=None):
+    """Decorator recording each call of a function as a span."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name or function.__name__):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _body_size(body):
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    return 0  # Streamed upload of unknown size
+
+def record_http(method, url, started_at, response=None, error=None, stream=False):
+    """Records one HTTP request sent by http_client."""
+    if not METRICS_ENABLED:
+        return
+    duration = time.monotonic() - started_at
+    host = urlsplit(url).hostname or ""
+    sent = _body_size(response.request.body) if response is not None and response.request is not None else 0
+    received = 0
+    if response is not None:
+        if stream:
+            received = int(response.headers.get("Content-Length") or 0)  # Body not read yet
+        else:
+            received = len(response.content)
+    status = response.status_code if response is not None else type(error).__name__
+    with _lock:
+        _add_total("http_requests_total", 1, host=host, method=method, status=status)
+        _add_total("http_request_duration_seconds_sum", duration, host=host)
+        _add_total("http_bytes_sent_total", sent, host=host)
+        _add_total("http_bytes_received_total", received, host=host)
+    current = getattr(_local, "stack", None)
+    event("http", host=host, method=method, status=status, duration=round(duration, 4),
+          bytes_sent=sent, bytes_received=received, span=current[-1].name if current else None)
+
+# --- Output ---
+
+def _rotate(path):
+    try:
+        if os.path.getsize(path) > METRICS_MAX_MB * 1024 * 1024:
+            os.replace(path, path + ".1")
+    except OSError:
+        pass
+
+def flush():
+    """Appends the buffered events to the JSON lines file."""
+    with _lock:
+        events = _events[:]
+        _events.clear()
+    if not events:
+        return
+    path = cache_path(METRICS_LOG_NAME)
+    _rotate(path)
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in events)
+    except OSError as e:
+        print(f"⚠️ Unable to write the metrics file : {e}")
+
+def write_prometheus(path):
+    """Writes the totals of the run in the Prometheus text format (atomic replace)."""
+    lines = [f"hashnode_bot_last_run_timestamp_seconds {time.time():.0f}"]
+    with _lock:
+        totals = sorted(_totals.items())
+    for (name, labels), value in totals:
+        label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+        lines.append(f"hashnode_bot_{name}{{{label_text}}} {value:g}")
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ Unable to write the Prometheus metrics file : {e}")
+
+@atexit.register
+def _at_exit():
+    if not METRICS_ENABLED:
+        return
+    flush()
+    if METRICS_PROMETHEUS_FILE and _totals:
+        write_prometheus(METRICS_PROMETHEUS_FILE)
+
+# --- Summary of the recorded runs ---
+
+def load_events(days):
+    since = time.time() - days * 86400
+    path = cache_path(METRICS_LOG_NAME)
+    for name in (path + ".1", path):
+        try:
+            with open(name, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        e = json.loads(line)
+                    except ValueError:
+                        continue
+                    if e.get("time", 0) >= since:
+                        yield e
+        except FileNotFoundError:
+            continue
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def summarize(days):
+    spans, hosts, counters, runs = defaultdict(list), defaultdict(lambda: [0, 0.0, 0, 0, 0]), defaultdict(float), set()
+    for e in load_events(days):
+        runs.add(e.get("run"))
+        if e.get("event") == "span":
+            spans[e["name"]].append((e["duration"], e["status"]))
+        elif e.get("event") == "http":
+            host = hosts[e["host"]]
+            host[0] += 1
+            host[1] += e["duration"]
+            host[2] += e["bytes_sent"]
+            host[3] += e["bytes_received"]
+            host[4] += not (isinstance(e["status"], int) and e["status"] < 400)
+        elif e.get("event") == "counter":
+            labels = ",".join(f"{k}={e[k]}" for k in sorted(e) if k not in ("event", "run", "time", "name", "value"))
+            counters[f"{e['name']}{{{labels}}}"] += e["value"]
+
+    print(f"📊 {len(runs)} run(s) over the last {days:g} day(s)\n")
+    print(f"{'span':<28}{'calls':>7}{'errors':>8}{'total s':>10}{'p50 s':>9}{'p95 s':>9}")
+    for name, values in sorted(spans.items(), key=lambda item: -sum(d for d, _ in item[1])):
+        durations = [d for d, _ in values]
+        errors = sum(status != "ok" for _, status in values)
+        print(f"{name:<28}{len(values):>7}{errors:>8}{sum(durations):>10.1f}{_percentile(durations, 0.5):>9.2f}{_percentile(durations, 0.95):>9.2f}")
+    print(f"\n{'host':<28}{'requests':>9}{'failed':>8}{'total s':>10}{'sent KB':>10}{'recv KB':>10}")
+    for host, (count, duration, sent, received, failed) in sorted(hosts.items(), key=lambda item: -item[1][1]):
+        print(f"{host:<28}{count:>9}{failed:>8}{duration:>10.1f}{sent / 1024:>10.1f}{received / 1024:>10.1f}")
+    if counters:
+        print()
+        for name, value in sorted(counters.items()):
+            print(f"{name}: {value:g}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarizes the metrics recorded by the bots.")
+    parser.add_argument("--days", type=float, default=7, help="Period to summarize, in days (default: 7).")
+    summarize(parser.parse_args().days)
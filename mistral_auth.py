@@ -0,0 +1,33 @@
+"""
+Cached Mistral AI credential validity.
+
+Instead of paying for a probe chat completion on every start, the bots record which API key
+(by fingerprint, never the key itself) was last accepted by Mistral AI. A key validated less
+than MISTRAL_AUTH_TTL_HOURS ago is trusted without any request; otherwise the first real
+generation call doubles as the authentication check.
+"""
+import os
+
+from cache_store import TTLCache, fingerprint
+
+MISTRAL_AUTH_TTL_HOURS = float(os.getenv("MISTRAL_AUTH_TTL_HOURS", "24"))
+
+# Set MISTRAL_AUTH_PROBE=1 to force the explicit (billed) test request before generating.
+MISTRAL_AUTH_PROBE = os.getenv("MISTRAL_AUTH_PROBE", "0") == "1"
+
+_auth_cache = TTLCache("mistral_auth.json", ttl_seconds=MISTRAL_AUTH_TTL_HOURS * 3600)
+
+def is_key_validated(api_key):
+    """True if this key was accepted by Mistral AI within the TTL."""
+    return bool(api_key) and _auth_cache.get(fingerprint(api_key), False)
+
+def mark_key_validated(api_key):
+    if api_key and not is_key_validated(api_key):
+        _auth_cache.set(fingerprint(api_key), True)
+
+def invalidate_key(api_key):
+    if api_key:
+        _auth_cache.delete(fingerprint(api_key))
+
+def is_auth_error(status_code):
+    return status_code in (401, 403)
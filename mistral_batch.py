@@ -0,0 +1,152 @@
+"""
+Mistral AI Batch API client for bulk generations (`python inventory.py --batch`).
+
+Instead of one synchronous chat/completions call per article, the payloads of many spool jobs are
+written to a JSONL file, uploaded (`/v1/files`, purpose "batch") and submitted as a single batch
+job (`/v1/batch/jobs`, one job per model). The job is polled until it ends, then its output file is
+downloaded and each result is mapped back to its spool job through its `custom_id`
+("<blog>/<job id>"): the generate stage of the job is completed and the article is stored in the
+generation cache. Batch inference costs less and has a much higher throughput than synchronous
+calls, but a job may take minutes to hours: it suits backfills and stock refills, not the daily
+publication.
+
+MISTRAL_BATCH_API_URL is the API root, so the mode can be run against a local stub server.
+"""
+import json
+import os
+import time
+
+import requests
+
+import generation_cache
+import retry
+import token_budget
+
+MISTRAL_BATCH_API_URL = os.getenv("MISTRAL_BATCH_API_URL", "https://api.mistral.ai/v1").rstrip("/")
+MISTRAL_BATCH_POLL_SECONDS = float(os.getenv("MISTRAL_BATCH_POLL_SECONDS", "30"))
+MISTRAL_BATCH_TIMEOUT_HOURS = int(os.getenv("MISTRAL_BATCH_TIMEOUT_HOURS", "24"))
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+FINAL_STATUSES = {"SUCCESS", "FAILED", "TIMEOUT_EXCEEDED", "CANCELLED"}
+
+class BatchError(Exception):
+    """Raised when a batch job ends without an output file."""
+
+def _headers():
+    return {"Authorization": f"Bearer {os.getenv('MISTRAL_API_KEY')}"}
+
+def upload_input(bodies):
+    """Uploads {custom_id: request body} as a JSONL batch input file and returns its ID."""
+    lines = [json.dumps({"custom_id": custom_id, "body": body}, ensure_ascii=False) for custom_id, body in bodies.items()]
+    resp = retry.post(
+        "mistral", f"{MISTRAL_BATCH_API_URL}/files", idempotent=False, headers=_headers(),
+        data={"purpose": "batch"},
+        files={"file": ("batch_input.jsonl", "\n".join(lines).encode("utf-8"), "application/jsonl")},
+        timeout=120,
+    )
+    resp.raise_for_status()
+    return resp.json()["id"]
+
+def create_job(input_file_id, model, metadata=None):
+    resp = retry.post("mistral", f"{MISTRAL_BATCH_API_URL}/batch/jobs", idempotent=False, headers=_headers(), json={
+        "input_files": [input_file_id],
+        "model": model,
+        "endpoint": CHAT_COMPLETIONS_ENDPOINT,
+        "metadata": metadata or {},
+        "timeout_hours": MISTRAL_BATCH_TIMEOUT_HOURS,
+    })
+    resp.raise_for_status()
+    return resp.json()
+
+def get_job(job_id):
+    resp = retry.get("mistral", f"{MISTRAL_BATCH_API_URL}/batch/jobs/{job_id}", headers=_headers())
+    resp.raise_for_status()
+    return resp.json()
+
+def wait_for_job(job_id, poll_seconds=None):
+    """Polls a batch job until it reaches a final status and returns it."""
+    poll_seconds = MISTRAL_BATCH_POLL_SECONDS if poll_seconds is None else poll_seconds
+    while True:
+        job = get_job(job_id)
+        if job.get("status") in FINAL_STATUSES:
+            return job
+        done = (job.get("succeeded_requests") or 0) + (job.get("failed_requests") or 0)
+        print(f"⏳ Batch job {job_id}: {job.get('status')}, {done}/{job.get('total_requests') or '?'} request(s) done.")
+        time.sleep(poll_seconds)
+
+def download_results(file_id):
+    """Output file of a batch job, as {custom_id: result line}."""
+    resp = retry.get("mistral", f"{MISTRAL_BATCH_API_URL}/files/{file_id}/content", headers=_headers(), timeout=120)
+    resp.raise_for_status()
+    results = {}
+    for line in resp.text.splitlines():
+        if line.strip():
+            result = json.loads(line)
+            results[result.get("custom_id")] = result
+    return results
+
+def result_completion(result):
+    """Completion body of a result line, or None if that request failed."""
+    response = result.get("response") or {}
+    if response.get("status_code") != 200:
+        return None
+    body = response.get("body") or {}
+    choices = body.get("choices") or []
+    if not choices or not ((choices[0].get("message") or {}).get("content") or "").strip():
+        return None
+    return body
+
+def run(bodies, model, metadata=None):
+    """Submits {custom_id: request body} as one batch job and returns {custom_id: completion body} of the succeeded requests."""
+    job = create_job(upload_input(bodies), model, metadata)
+    print(f"📤 Batch job {job['id']} submitted: {len(bodies)} request(s) with model '{model}'.")
+    job = wait_for_job(job["id"])
+    if not job.get("output_file"):
+        raise BatchError(f"batch job {job['id']} ended with status {job.get('status')} and no output file")
+    completions = {}
+    for custom_id, result in download_results(job["output_file"]).items():
+        completion = result_completion(result)
+        if completion:
+            completions[custom_id] = completion
+    print(f"📥 Batch job {job['id']} {job.get('status')}: {len(completions)}/{len(bodies)} completion(s) received.")
+    return completions
+
+def generate_jobs(entries):
+    """
+    Generates the articles of (bot module, spool job) pairs whose prompt is built, with one batch job
+    per model. Completes the generate stage of the succeeded jobs and returns them; the other jobs
+    stay in the spool and are generated by a later run.
+    """
+    generated = []
+    by_model = {}
+    for module, job in entries:
+        payload = module.build_payload(job["prompt"])
+        cached_article = generation_cache.get(payload)
+        if cached_article is not None:
+            job.complete("generate", raw_article=cached_article)
+            generated.append(job)
+            continue
+        by_model.setdefault(payload["model"], {})[f"{job.blog}/{job.id}"] = (module, job, payload)
+
+    for model, pending in by_model.items():
+        # The model is set on the batch job, not on each request
+        bodies = {custom_id: {k: v for k, v in payload.items() if k != "model"} for custom_id, (_, _, payload) in pending.items()}
+        blogs = sorted({job.blog for _, job, _ in pending.values()})
+        try:
+            completions = run(bodies, model, metadata={"blogs": ",".join(blogs)})
+        except (requests.exceptions.RequestException, BatchError, ValueError, KeyError) as e:
+            print(f"❌ Batch generation with model '{model}' failed : {e}")
+            continue
+        for custom_id, (module, job, payload) in pending.items():
+            if custom_id not in completions:
+                print(f"⚠️ No batch result for job {custom_id}, it stays in the spool.")
+                continue
+            choice = completions[custom_id]["choices"][0]
+            # A result cut by max_tokens is continued with a synchronous call
+            content = token_budget.complete(
+                module.MISTRAL_API_BASE_URL, dict(_headers(), **{"Content-Type": "application/json"}), payload,
+                choice["message"]["content"].strip(), choice.get("finish_reason"), completions[custom_id].get("usage"), job.blog,
+            )
+            generation_cache.put(payload, content)
+            job.complete("generate", raw_article=content)
+            generated.append(job)
+    return generated
@@ -0,0 +1,119 @@
+"""
+Mistral AI chat completions helpers shared by the Hashnode bots.
+
+Streaming mode (`stream: true`): the article is assembled incrementally from the SSE chunks,
+the H1 title is exposed as soon as the first line is complete, and the generation can be
+aborted mid-stream when it stalls or exceeds its time/token budget.
+"""
+import json
+import os
+import time
+
+import requests
+
+import retry
+import token_budget
+
+# --- Configuration (overridable through environment variables) ---
+MISTRAL_STREAMING = os.getenv("MISTRAL_STREAMING", "0") == "1"
+MISTRAL_STREAM_MAX_SECONDS = float(os.getenv("MISTRAL_STREAM_MAX_SECONDS", "180"))   # Total generation budget
+MISTRAL_STREAM_STALL_SECONDS = float(os.getenv("MISTRAL_STREAM_STALL_SECONDS", "30"))  # Max silence between chunks
+MISTRAL_STREAM_MAX_TOKENS = int(os.getenv("MISTRAL_STREAM_MAX_TOKENS", "0"))           # 0 = rely on max_tokens only
+
+class StreamAborted(requests.exceptions.RequestException):
+    """
+    Raised when a streamed generation exceeds its time or token budget. Deliberately not a Timeout
+    nor a ConnectionError: the retry policy (retry.py) must not pay for the same generation again.
+    """
+
+class StreamResult:
+    def __init__(self):
+        self.content = ""
+        self.title = None
+        self.finish_reason = None
+        self.usage = None
+        self.chunks = 0
+        self.tokens = 0  # Estimated with token_budget.estimate_tokens()
+        self.time_to_first_byte = None
+        self.elapsed = None
+
+def open_stream(api_url, headers, payload, stall_timeout=None):
+    """
+    Starts a streamed chat completion and returns the HTTP response without reading the body,
+    so the caller can check the status code exactly like for a regular request.
+    """
+    stream_payload = dict(payload, stream=True)
+    stall_timeout = stall_timeout or MISTRAL_STREAM_STALL_SECONDS
+    started_at = time.monotonic()
+    # The read timeout applies between two received chunks: it is the stall detector.
+    response = retry.post("mistral", api_url, headers=headers, json=stream_payload, stream=True, timeout=stall_timeout)
+    response.stream_started_at = started_at
+    return response
+
+def _extract_title(first_line):
+    first_line = first_line.strip()
+    if first_line.startswith('# '):
+        return first_line[2:].strip()
+    return None
+
+def assemble_stream(response, on_title=None, max_seconds=None, max_tokens=None):
+    """
+    Reads the SSE stream of `response` and returns a StreamResult.
+
+    `on_title(title)` is called once, as soon as the first line of the article is complete
+    and is an H1 heading. Raises StreamAborted if the total duration exceeds `max_seconds`
+    or if the text received exceeds `max_tokens` tokens (estimated by token_budget.estimate_tokens()).
+    """
+    max_seconds = max_seconds or MISTRAL_STREAM_MAX_SECONDS
+    max_tokens = max_tokens if max_tokens is not None else MISTRAL_STREAM_MAX_TOKENS
+    result = StreamResult()
+    parts = []
+    first_line_done = False
+    start = getattr(response, "stream_started_at", None) or time.monotonic()
+
+    try:
+        for raw_line in response.iter_lines(chunk_size=None):  # Yield chunks as soon as they arrive
+            now = time.monotonic()
+            if result.time_to_first_byte is None:
+                result.time_to_first_byte = now - start
+            if now - start > max_seconds:
+                raise StreamAborted(f"Generation exceeded its {max_seconds:.0f}s budget after {result.chunks} chunks.")
+
+            line = raw_line.decode("utf-8").strip() if isinstance(raw_line, bytes) else raw_line.strip()
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+
+            chunk = json.loads(data)
+            choice = (chunk.get("choices") or [{}])[0]
+            delta = choice.get("delta", {}).get("content") or ""
+            if choice.get("finish_reason"):
+                result.finish_reason = choice["finish_reason"]
+            if chunk.get("usage"):
+                result.usage = chunk["usage"]  # Sent with the last chunk
+            if not delta:
+                continue
+
+            parts.append(delta)
+            result.chunks += 1
+            result.tokens += token_budget.estimate_tokens(delta)
+            if max_tokens and result.tokens > max_tokens:
+                raise StreamAborted(f"Generation exceeded its budget of {max_tokens} tokens (about {result.tokens} received).")
+
+            if not first_line_done and "\n" in delta:
+                buffered = "".join(parts).lstrip()
+                if "\n" in buffered:
+                    first_line_done = True
+                    result.title = _extract_title(buffered.split("\n", 1)[0])
+                    if result.title and on_title:
+                        on_title(result.title)
+    finally:
+        response.close()
+
+    result.content = "".join(parts)
+    result.elapsed = time.monotonic() - start
+    if result.time_to_first_byte is None:
+        result.time_to_first_byte = result.elapsed
+    return result
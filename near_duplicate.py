@@ -0,0 +1,153 @@
+"""
+Near-duplicate detection of generated articles (MinHash + LSH, SQLite `.cache/near_duplicates.sqlite3`).
+
+Each article body is reduced to word shingles and summarized by a MinHash signature of
+MINHASH_PERMUTATIONS values; the fraction of equal values estimates the Jaccard similarity of
+two articles. Signatures are split into LSH bands and every band is stored as an indexed bucket,
+so a lookup only compares against articles sharing at least one bucket instead of scanning the
+whole archive.
+"""
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import struct
+import time
+from contextlib import closing
+
+from cache_store import cache_path
+
+NEAR_DUPLICATE_DB_NAME = "near_duplicates.sqlite3"
+# Estimated Jaccard similarity above which a new article is considered a near-duplicate
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.5"))
+# Number of regenerations attempted before a near-duplicate article is rejected
+NEAR_DUPLICATE_MAX_REGENERATIONS = int(os.getenv("NEAR_DUPLICATE_MAX_REGENERATIONS", "2"))
+
+SHINGLE_SIZE = 5  # words per shingle
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 32  # 32 bands of 4 rows: pairs above ~0.42 similarity share a bucket with high probability
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+class NearDuplicateRejected(SystemExit):
+    """
+    Raised by the bots' ensure_distinct_article() when no version distinct enough was obtained.
+    Ends the run like their other sys.exit(1) errors, but tells a rejected article (abandoned)
+    apart from a failed API call (the job stays in the spool).
+    """
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed seed: signatures must stay comparable across runs
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    indexed_at REAL NOT NULL,
+    blog TEXT NOT NULL,
+    title TEXT,
+    post_url TEXT,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    document_id INTEGER NOT NULL,
+    PRIMARY KEY (band, bucket, document_id)
+) WITHOUT ROWID;
+"""
+
+def _connect():
+    connection = sqlite3.connect(cache_path(NEAR_DUPLICATE_DB_NAME), timeout=30)
+    connection.executescript(_SCHEMA)
+    return connection
+
+# --- MinHash ---
+
+def shingles(text):
+    """Set of 32-bit hashes of the SHINGLE_SIZE-word shingles of `text` (case and punctuation ignored)."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        words = words + [""] * (SHINGLE_SIZE - len(words))
+    return {
+        int.from_bytes(hashlib.blake2b(" ".join(words[i:i + SHINGLE_SIZE]).encode("utf-8"), digest_size=4).digest(), "big")
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+def signature(text):
+    """MinHash signature of `text`: the minimum of each permutation over the shingle hashes."""
+    hashes = shingles(text)
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes) & _MAX_HASH
+        for a, b in _PERMUTATIONS
+    )
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of the two documents."""
+    return sum(x == y for x, y in zip(signature_a, signature_b)) / MINHASH_PERMUTATIONS
+
+def _band_buckets(sig):
+    for band in range(LSH_BANDS):
+        rows = sig[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(struct.pack(f"<{LSH_ROWS}I", *rows), digest_size=8).digest()
+        # Signed 64-bit so that it fits an SQLite INTEGER
+        yield band, int.from_bytes(digest, "big", signed=True)
+
+def _pack(sig):
+    return struct.pack(f"<{MINHASH_PERMUTATIONS}I", *sig)
+
+def _unpack(blob):
+    return struct.unpack(f"<{MINHASH_PERMUTATIONS}I", blob)
+
+# --- Index ---
+
+def find_similar(text, threshold=None):
+    """
+    Returns (similarity, title, post_url) of the most similar indexed article whose estimated
+    similarity is at least `threshold` (NEAR_DUPLICATE_THRESHOLD by default), or None.
+    """
+    threshold = NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    sig = signature(text)
+    buckets = list(_band_buckets(sig))
+    with closing(_connect()) as connection:
+        candidate_ids = set()
+        for band, bucket in buckets:
+            candidate_ids.update(
+                row[0] for row in connection.execute(
+                    "SELECT document_id FROM lsh_buckets WHERE band = ? AND bucket = ?", (band, bucket)
+                )
+            )
+        best = None
+        for document_id in candidate_ids:
+            title, post_url, blob = connection.execute(
+                "SELECT title, post_url, signature FROM documents WHERE id = ?", (document_id,)
+            ).fetchone()
+            score = similarity(sig, _unpack(blob))
+            if score >= threshold and (best is None or score > best[0]):
+                best = (score, title, post_url)
+    return best
+
+def add_document(text, blog, title=None, post_url=None):
+    """Indexes a published article. Never raises: a failed index write is only reported."""
+    try:
+        sig = signature(text)
+        with closing(_connect()) as connection, connection:
+            cursor = connection.execute(
+                "INSERT INTO documents (indexed_at, blog, title, post_url, signature) VALUES (?, ?, ?, ?, ?)",
+                (time.time(), blog, title, post_url, _pack(sig)),
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO lsh_buckets (band, bucket, document_id) VALUES (?, ?, ?)",
+                [(band, bucket, cursor.lastrowid) for band, bucket in _band_buckets(sig)],
+            )
+            return cursor.lastrowid
+    except sqlite3.Error as e:
+        print(f"⚠️ Unable to add the published article to the near-duplicate index : {e}")
+        return None
@@ -0,0 +1,104 @@
+"""
+Local SQLite cache of NewsAPI responses.
+
+Article lists are stored per query key (query + language + window + sort order) together with
+the time of the last fetch. Within NEWSAPI_CACHE_FRESH_MINUTES the cache is served without any
+request; after that, only the articles published since the newest cached `publishedAt` are
+fetched and merged into the cache.
+
+RSS/Atom feeds (news_sources.py) use the same article tables, keyed by feed URL, together with the
+ETag and Last-Modified validators of the last response: an unchanged feed answers 304 and its
+cached articles are served.
+"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from cache_store import cache_path
+
+NEWSAPI_CACHE_FRESH_MINUTES = float(os.getenv("NEWSAPI_CACHE_FRESH_MINUTES", "60"))
+NEWS_CACHE_DB_NAME = "news_cache.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queries (
+    cache_key TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    newest_published_at TEXT
+);
+CREATE TABLE IF NOT EXISTS articles (
+    cache_key TEXT NOT NULL,
+    url TEXT NOT NULL,
+    published_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (cache_key, url)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_key_published ON articles (cache_key, published_at);
+CREATE TABLE IF NOT EXISTS feed_validators (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT
+);
+"""
+
+def _connect():
+    connection = sqlite3.connect(cache_path(NEWS_CACHE_DB_NAME), timeout=30)
+    connection.executescript(_SCHEMA)
+    return connection
+
+def make_key(query, language, window_days, sort_by):
+    return json.dumps([query, language, window_days, sort_by])
+
+def get_state(cache_key):
+    """Returns (fetched_at, newest_published_at) for a query, or (None, None) if never fetched."""
+    with closing(_connect()) as connection:
+        row = connection.execute(
+            "SELECT fetched_at, newest_published_at FROM queries WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+    return row if row else (None, None)
+
+def is_fresh(cache_key):
+    fetched_at, _ = get_state(cache_key)
+    return fetched_at is not None and time.time() - fetched_at < NEWSAPI_CACHE_FRESH_MINUTES * 60
+
+def get_articles(cache_key, published_since):
+    """Cached articles of a query published at or after `published_since` (ISO string), newest first."""
+    with closing(_connect()) as connection:
+        rows = connection.execute(
+            "SELECT data FROM articles WHERE cache_key = ? AND published_at >= ? ORDER BY published_at DESC",
+            (cache_key, published_since),
+        ).fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+def store_articles(cache_key, articles, window_start):
+    """Merges freshly fetched articles into the cache and drops those older than `window_start`."""
+    with closing(_connect()) as connection, connection:
+        for article in articles:
+            if not article.get('url') or not article.get('publishedAt'):
+                continue
+            connection.execute(
+                "INSERT OR REPLACE INTO articles (cache_key, url, published_at, data) VALUES (?, ?, ?, ?)",
+                (cache_key, article['url'], article['publishedAt'], json.dumps(article, ensure_ascii=False)),
+            )
+        connection.execute("DELETE FROM articles WHERE cache_key = ? AND published_at < ?", (cache_key, window_start))
+        newest = connection.execute(
+            "SELECT MAX(published_at) FROM articles WHERE cache_key = ?", (cache_key,)
+        ).fetchone()[0]
+        connection.execute(
+            "INSERT OR REPLACE INTO queries (cache_key, fetched_at, newest_published_at) VALUES (?, ?, ?)",
+            (cache_key, time.time(), newest),
+        )
+
+def get_validators(url):
+    """(ETag, Last-Modified) of the last response of a feed, or (None, None)."""
+    with closing(_connect()) as connection:
+        row = connection.execute("SELECT etag, last_modified FROM feed_validators WHERE url = ?", (url,)).fetchone()
+    return row if row else (None, None)
+
+def store_validators(url, etag, last_modified):
+    with closing(_connect()) as connection, connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO feed_validators (url, etag, last_modified) VALUES (?, ?, ?)",
+            (url, etag, last_modified),
+        )
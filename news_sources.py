@@ -0,0 +1,303 @@
+"""
+News sources of the tech news bot: NewsAPI, RSS/Atom feeds and Hacker News (Algolia search API).
+
+Every source returns articles in the NewsAPI schema used by the bot (title, description, content,
+url, urlToImage, publishedAt, source.name), so the rest of the pipeline does not depend on where a
+news comes from. fetch_all() queries the sources in parallel and gives up on those still running
+after NEWS_SOURCES_TIMEOUT seconds, so one slow source no longer delays the whole run; merge()
+then removes the news found by several sources (same canonical URL, or titles sharing at least
+NEWS_TITLE_SIMILARITY of their words).
+
+Feeds are read incrementally (iter_feed): items are parsed as the response streams in and freed
+once normalized, and the download stops as soon as enough fresh items were collected, so memory
+stays flat whatever the size of the feed. Requests are conditional (ETag / Last-Modified stored
+in news_cache.py): an unchanged feed costs a 304 and its cached items are served.
+
+Sources are configured in blogs.json (`news.sources`), e.g.:
+    {"type": "newsapi"}
+    {"type": "rss", "url": "https://example.com/feed.xml"}           (RSS 2.0 or Atom)
+    {"type": "hn", "query": "AI", "min_points": 50}                     (Hacker News stories)
+"""
+import html
+import io
+import os
+import re
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+import news_cache
+import retry
+
+NEWS_SOURCES_TIMEOUT = float(os.getenv("NEWS_SOURCES_TIMEOUT", "30"))  # Seconds for all the sources together
+NEWS_TITLE_SIMILARITY = float(os.getenv("NEWS_TITLE_SIMILARITY", "0.8"))
+HN_SEARCH_URL = os.getenv("HN_SEARCH_URL", "https://hn.algolia.com/api/v1/search_by_date")
+FEED_TIMEOUT = 15
+FEED_MAX_ITEMS = int(os.getenv("FEED_MAX_ITEMS", "50"))  # Fresh items read per feed before stopping
+CONTENT_MAX_CHARS = 200  # NewsAPI truncates `content` to about 200 characters: feeds do the same
+
+# Query parameters that only track the visitor and do not change the page
+TRACKING_PREFIXES = ("utm_",)
+TRACKING_PARAMETERS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src", "cmpid"}
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACES_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\w+")
+
+# --- Normalization ---
+
+def _iso(moment):
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def parse_date(text):
+    """RFC 822 (RSS) or ISO 8601 (Atom, Hacker News) date as an aware datetime, or None."""
+    if not text:
+        return None
+    text = text.strip()
+    try:
+        moment = parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        try:
+            moment = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+def plain_text(markup):
+    """Text of an HTML fragment (feed descriptions), on one line."""
+    return _SPACES_RE.sub(" ", html.unescape(_TAG_RE.sub(" ", markup or ""))).strip()
+
+def _truncate(text, max_chars):
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + "…"
+
+def make_article(title, url, published_at, source_name, description="", content="", image_url=None):
+    """
+    A news article in the NewsAPI schema. `published_at` is an aware datetime; without one,
+    `publishedAt` is None and the sources skip the article (its freshness is unknown).
+    """
+    description = plain_text(description)
+    return {
+        "source": {"id": None, "name": source_name},
+        "title": plain_text(title),
+        "description": description,
+        "content": _truncate(plain_text(content) or description, CONTENT_MAX_CHARS),
+        "url": url,
+        "urlToImage": image_url,
+        "publishedAt": _iso(published_at) if published_at else None,
+    }
+
+def _is_tracking_parameter(key):
+    key = key.lower()
+    return key in TRACKING_PARAMETERS or key.startswith(TRACKING_PREFIXES)
+
+def canonical_url(url):
+    """URL without scheme differences, `www.`, fragment, tracking parameters nor trailing slash."""
+    parts = urlsplit((url or "").strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_parameter(key)
+    ))
+    return urlunsplit(("https", host, parts.path.rstrip("/"), query, ""))
+
+def _title_words(title):
+    return set(_WORD_RE.findall((title or "").lower()))
+
+def title_similarity(title_a, title_b):
+    """Share of words the two titles have in common (Jaccard index)."""
+    words_a, words_b = _title_words(title_a), _title_words(title_b)
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+# --- Sources ---
+
+def _find_text(element, *paths, namespaces=None):
+    for path in paths:
+        found = element.find(path, namespaces)
+        if found is not None and (found.text or "").strip():
+            return found.text
+    return ""
+
+FEED_NAMESPACES = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "content": "http://purl.org/rss/1.0/modules/content/",
+    "media": "http://search.yahoo.com/mrss/",
+}
+
+def _rss_item(item, feed_title):
+    image = None
+    for path in ("enclosure", "media:content", "media:thumbnail"):
+        for element in item.findall(path, FEED_NAMESPACES):
+            if element.get("url") and (path != "enclosure" or (element.get("type") or "").startswith("image/")):
+                image = image or element.get("url")
+    return make_article(
+        _find_text(item, "title"), _find_text(item, "link").strip(),
+        parse_date(_find_text(item, "pubDate", "dc:date", namespaces={"dc": "http://purl.org/dc/elements/1.1/"})),
+        feed_title, description=_find_text(item, "description"),
+        content=_find_text(item, "content:encoded", namespaces=FEED_NAMESPACES), image_url=image,
+    )
+
+def _atom_entry(entry, feed_title):
+    link = ""
+    for element in entry.findall("atom:link", FEED_NAMESPACES):
+        if element.get("rel", "alternate") == "alternate":
+            link = element.get("href", "")
+            break
+    image = next((e.get("url") for e in entry.findall("media:thumbnail", FEED_NAMESPACES) if e.get("url")), None)
+    return make_article(
+        _find_text(entry, "atom:title", namespaces=FEED_NAMESPACES), link.strip(),
+        parse_date(_find_text(entry, "atom:published", "atom:updated", namespaces=FEED_NAMESPACES)),
+        feed_title, description=_find_text(entry, "atom:summary", namespaces=FEED_NAMESPACES),
+        content=_find_text(entry, "atom:content", namespaces=FEED_NAMESPACES), image_url=image,
+    )
+
+ATOM_FEED = f"{{{FEED_NAMESPACES['atom']}}}feed"
+ATOM_TITLE = f"{{{FEED_NAMESPACES['atom']}}}title"
+ATOM_ENTRY = f"{{{FEED_NAMESPACES['atom']}}}entry"
+
+def iter_feed(stream, default_name):
+    """
+    Yields the articles of an RSS 2.0 or Atom document read from the file-like `stream`, one at a
+    time. Each item is removed from the tree once normalized: only one item is held in memory.
+    """
+    name = default_name
+    parents = []
+    for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if not parents and element.tag not in ("rss", ATOM_FEED):
+                raise ValueError(f"Neither an RSS nor an Atom feed (root element <{element.tag}>)")
+            parents.append(element)
+            continue
+        parents.pop()
+        parent = parents[-1].tag if parents else None
+        if (element.tag, parent) in (("title", "channel"), (ATOM_TITLE, ATOM_FEED)):
+            name = (element.text or "").strip() or default_name
+        elif (element.tag, parent) == ("item", "channel"):
+            yield _rss_item(element, name)
+            parents[-1].remove(element)
+        elif (element.tag, parent) == (ATOM_ENTRY, ATOM_FEED):
+            yield _atom_entry(element, name)
+            parents[-1].remove(element)
+
+def parse_feed(document, default_name):
+    """Articles of an RSS 2.0 or Atom document (bytes)."""
+    return list(iter_feed(io.BytesIO(document), default_name))
+
+def fetch_feed(source, since):
+    """
+    News of an RSS/Atom feed published after `since` (aware datetime), at most `limit` (default
+    FEED_MAX_ITEMS) new ones per download, merged with the news cached from the previous downloads.
+    """
+    url = source["url"]
+    since_text = _iso(since)
+    etag, last_modified = news_cache.get_validators(url)
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    response = retry.get("feeds", url, headers=headers, stream=True, timeout=FEED_TIMEOUT)
+    try:
+        if response.status_code == 304:
+            print(f"DEBUG: Feed {url} unchanged (304), cached news reused.")
+            articles = []
+        else:
+            response.raise_for_status()
+            response.raw.decode_content = True  # gzip / deflate
+            articles = []
+            for article in iter_feed(response.raw, source.get("name") or urlsplit(url).hostname):
+                if article["url"] and article["title"] and (article["publishedAt"] or "") >= since_text:
+                    articles.append(article)
+                    if len(articles) >= source.get("limit", FEED_MAX_ITEMS):
+                        break  # The rest of the feed is not even downloaded
+    finally:
+        response.close()
+
+    news_cache.store_articles(url, articles, since_text)
+    if response.status_code != 304:
+        news_cache.store_validators(url, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return news_cache.get_articles(url, since_text)
+
+def fetch_hacker_news(source, since):
+    """Hacker News stories published after `since`, through the Algolia search API."""
+    params = {
+        "tags": "story",
+        "hitsPerPage": source.get("limit", 50),
+        "numericFilters": f"created_at_i>{int(since.timestamp())},points>={source.get('min_points', 0)}",
+    }
+    if source.get("query"):
+        params["query"] = source["query"]
+    response = retry.get("feeds", source.get("url", HN_SEARCH_URL), params=params, timeout=FEED_TIMEOUT)
+    response.raise_for_status()
+    articles = []
+    for hit in response.json().get("hits", []):
+        discussion_url = f"https://news.ycombinator.com/item?id={hit.get('objectID')}"
+        summary = f"{hit.get('points') or 0} points and {hit.get('num_comments') or 0} comments on Hacker News ({discussion_url})."
+        articles.append(make_article(
+            hit.get("title") or "", hit.get("url") or discussion_url, parse_date(hit.get("created_at")),
+            source.get("name", "Hacker News"), description=hit.get("story_text") or summary,
+        ))
+    return [a for a in articles if a["title"] and a["publishedAt"]]
+
+SOURCE_FETCHERS = {"rss": fetch_feed, "hn": fetch_hacker_news}
+
+def source_name(source):
+    return source.get("name") or source.get("url") or source["type"]
+
+# --- Parallel fetch and merge ---
+
+def fetch_all(fetchers):
+    """
+    Calls every fetcher ({source name: function returning a list of articles}) in parallel.
+    Returns {source name: articles}; a failed source, or one still running after
+    NEWS_SOURCES_TIMEOUT seconds, is reported and left out.
+    """
+    if not fetchers:
+        return {}
+    executor = ThreadPoolExecutor(max_workers=len(fetchers))
+    futures = {executor.submit(fetch): name for name, fetch in fetchers.items()}
+    done, not_done = wait(futures, timeout=NEWS_SOURCES_TIMEOUT)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = {}
+    for future in done:
+        name = futures[future]
+        try:
+            results[name] = future.result() or []
+            print(f"✅ {len(results[name])} news article(s) from {name}.")
+        except (requests.exceptions.RequestException, ElementTree.ParseError, ValueError, KeyError) as e:
+            print(f"⚠️ News source {name} failed : {e}")
+    for future in not_done:
+        print(f"⚠️ News source {futures[future]} did not answer within {NEWS_SOURCES_TIMEOUT:g}s, skipped.")
+    return results
+
+def merge(article_lists):
+    """
+    Concatenates the article lists (in priority order) without the news found twice. The first
+    occurrence is kept and completed with the image or texts missing from it.
+    """
+    merged, by_url = [], {}
+    for articles in article_lists:
+        for article in articles:
+            key = canonical_url(article.get("url"))
+            kept = by_url.get(key)
+            if kept is None:
+                kept = next((m for m in merged if title_similarity(m.get("title"), article.get("title")) >= NEWS_TITLE_SIMILARITY), None)
+            if kept is None:
+                article = dict(article)
+                merged.append(article)
+                by_url[key] = article
+                continue
+            by_url.setdefault(key, kept)
+            for field in ("urlToImage", "description", "content"):
+                if not kept.get(field) and article.get(field):
+                    kept[field] = article[field]
+    return merged
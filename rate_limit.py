@@ -0,0 +1,64 @@
+"""
+Process-wide token buckets shared by every blog and thread.
+
+retry.request() takes a token from the bucket of its endpoint before each attempt, so
+concurrent blogs (blog_runner.py, scheduler.py) never exceed the request rate allowed by
+Mistral AI or Hashnode together. Rates are set per endpoint with
+RATE_LIMIT_<ENDPOINT>_PER_MINUTE (0 disables the limit) and RATE_LIMIT_<ENDPOINT>_BURST.
+"""
+import os
+import threading
+import time
+
+DEFAULT_RATES_PER_MINUTE = {"mistral": 60, "hashnode": 60, "newsapi": 0}
+DEFAULT_BURST = 5
+
+class TokenBucket:
+    """Allows `rate_per_minute` acquisitions per minute on average, with bursts of `burst`."""
+
+    def __init__(self, rate_per_minute, burst):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """Blocks until a token is available and returns the time waited, in seconds."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def get_bucket(endpoint_name):
+    """Bucket of an endpoint, or None when it is not rate limited."""
+    with _buckets_lock:
+        if endpoint_name not in _buckets:
+            key = endpoint_name.upper()
+            rate = float(os.getenv(f"RATE_LIMIT_{key}_PER_MINUTE", DEFAULT_RATES_PER_MINUTE.get(endpoint_name, 0)))
+            burst = int(os.getenv(f"RATE_LIMIT_{key}_BURST", DEFAULT_BURST))
+            _buckets[endpoint_name] = TokenBucket(rate, burst) if rate > 0 else None
+        return _buckets[endpoint_name]
+
+def acquire(endpoint_name):
+    bucket = get_bucket(endpoint_name)
+    if bucket is None:
+        return 0.0
+    waited = bucket.acquire()
+    if waited >= 1:
+        print(f"⏳ {endpoint_name}: rate limit, waited {waited:.1f}s.")
+    return waited
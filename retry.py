@@ -0,0 +1,182 @@
+"""
+Retry layer for the calls to Mistral AI, Hashnode and NewsAPI.
+
+Transient failures (connection errors, timeouts, 429 and 5xx responses, GraphQL rate-limit
+errors) are retried with exponential backoff and full jitter, waiting at least as long as the
+server's `Retry-After`. Each endpoint has a retry budget for the whole run and a circuit
+breaker: after CIRCUIT_BREAKER_THRESHOLD consecutive failures, calls fail immediately for
+CIRCUIT_BREAKER_COOLDOWN seconds instead of piling up more timeouts.
+
+When the retries are exhausted, the last response is returned (or the last exception raised),
+so callers keep handling errors exactly as with http_client.
+"""
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+import http_client
+import metrics
+import rate_limit
+
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "4"))         # Attempts per call, first one included
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "1"))           # Seconds, doubled after each failure
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "30"))            # Upper bound of the backoff
+RETRY_MAX_RETRY_AFTER = float(os.getenv("RETRY_MAX_RETRY_AFTER", "120"))  # Longer Retry-After values are not waited for
+CIRCUIT_BREAKER_THRESHOLD = int(os.getenv("CIRCUIT_BREAKER_THRESHOLD", "5"))
+CIRCUIT_BREAKER_COOLDOWN = float(os.getenv("CIRCUIT_BREAKER_COOLDOWN", "60"))
+
+# Retries allowed per endpoint for the whole run (RETRY_BUDGET_<ENDPOINT> overrides)
+DEFAULT_RETRY_BUDGETS = {"mistral": 6, "hashnode": 6, "newsapi": 3}
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+# A non-idempotent request (publishPost) is only retried when the server did not process it
+REJECTED_STATUSES = (429, 503)
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without any request while the circuit breaker of an endpoint is open."""
+
+class Endpoint:
+    def __init__(self, name, budget):
+        self.name = name
+        self.budget = budget
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.lock = threading.Lock()
+
+    def is_open(self):
+        return time.monotonic() < self.open_until
+
+    def check_circuit(self):
+        if self.is_open():
+            raise CircuitOpenError(f"Circuit breaker open for '{self.name}' after {self.consecutive_failures} consecutive failures.")
+
+    def record_success(self):
+        with self.lock:
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= CIRCUIT_BREAKER_THRESHOLD:
+                self.open_until = time.monotonic() + CIRCUIT_BREAKER_COOLDOWN
+                print(f"⚠️ Circuit breaker opened for '{self.name}' for {CIRCUIT_BREAKER_COOLDOWN:.0f}s.")
+
+    def take_retry(self):
+        """Consumes one retry from the budget; False once it is exhausted."""
+        with self.lock:
+            if self.budget <= 0:
+                return False
+            self.budget -= 1
+            return True
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+
+def get_endpoint(name):
+    with _endpoints_lock:
+        if name not in _endpoints:
+            budget = int(os.getenv(f"RETRY_BUDGET_{name.upper()}", DEFAULT_RETRY_BUDGETS.get(name, 3)))
+            _endpoints[name] = Endpoint(name, budget)
+        return _endpoints[name]
+
+def parse_retry_after(response):
+    """Seconds to wait according to the Retry-After header (delay or HTTP date), or None."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt):
+    """Full jitter: a random delay between 0 and min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt)."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+def is_graphql_rate_limited(response):
+    """True if a GraphQL response carries a rate-limit error (Hashnode answers 200 with `errors`)."""
+    if not response.headers.get("Content-Type", "").startswith("application/json"):
+        return False
+    try:
+        errors = response.json().get("errors") or []
+    except (ValueError, AttributeError):
+        return False
+    for error in errors:
+        code = str((error.get("extensions") or {}).get("code", "")).upper()
+        message = str(error.get("message", "")).lower()
+        if code in ("TOO_MANY_REQUESTS", "RATE_LIMITED") or "rate limit" in message:
+            return True
+    return False
+
+def _should_retry_response(response, idempotent, graphql):
+    if response.status_code in (REJECTED_STATUSES if not idempotent else RETRYABLE_STATUSES):
+        return True
+    return graphql and response.ok and is_graphql_rate_limited(response)
+
+def _should_retry_exception(error, idempotent):
+    if isinstance(error, CircuitOpenError):
+        return False
+    if idempotent:
+        return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+    # The request may have reached the server: only retry when the connection was never opened
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.exceptions.ConnectionError) and isinstance(reason, NewConnectionError)
+
+def request(endpoint_name, method, url, idempotent=True, graphql=False, **kwargs):
+    """
+    Sends a request through http_client, retrying transient failures.
+    `idempotent=False` restricts retries to failures where the request was not processed.
+    `graphql=True` also retries 200 responses carrying a GraphQL rate-limit error.
+    """
+    endpoint = get_endpoint(endpoint_name)
+    attempt = 0
+    while True:
+        endpoint.check_circuit()
+        rate_limit.acquire(endpoint_name)
+        retry_after = None
+        try:
+            response = http_client.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            endpoint.record_failure()
+            if (attempt + 1 >= RETRY_MAX_ATTEMPTS or endpoint.is_open()
+                    or not _should_retry_exception(e, idempotent) or not endpoint.take_retry()):
+                raise
+            reason = type(e).__name__
+        else:
+            if not _should_retry_response(response, idempotent, graphql):
+                if response.status_code < 500:
+                    endpoint.record_success()
+                else:
+                    endpoint.record_failure()
+                return response
+            endpoint.record_failure()
+            retry_after = parse_retry_after(response)
+            if (attempt + 1 >= RETRY_MAX_ATTEMPTS or endpoint.is_open()
+                    or (retry_after is not None and retry_after > RETRY_MAX_RETRY_AFTER)
+                    or not endpoint.take_retry()):
+                return response
+            reason = f"HTTP {response.status_code}" + (" (GraphQL rate limit)" if response.ok else "")
+            response.close()
+
+        delay = max(backoff_delay(attempt), retry_after or 0)
+        attempt += 1
+        print(f"🔁 {endpoint_name}: {reason}, retry {attempt}/{RETRY_MAX_ATTEMPTS - 1} in {delay:.1f}s...")
+        metrics.incr("http_retries_total", endpoint=endpoint_name, reason=reason)
+        time.sleep(delay)
+
+def get(endpoint_name, url, **kwargs):
+    return request(endpoint_name, "GET", url, **kwargs)
+
+def post(endpoint_name, url, **kwargs):
+    return request(endpoint_name, "POST", url, **kwargs)
@@ -0,0 +1,202 @@
+"""
+Scheduler daemon: publishes the blogs of blogs.json according to their publication calendar.
+
+Each blog may define a `schedule` in blogs.json:
+
+    "schedule": {
+        "timezone": "Europe/Paris",
+        "times": ["08:30", "18:00"],
+        "weekdays": ["mon", "tue", "wed", "thu", "fri"],
+        "blackouts": [{"start": "2026-12-24", "end": "2026-12-26"}]
+    }
+
+(defaults: every day at 08:00 UTC, no blackout; blackout bounds are local dates or date-times,
+a date-only end covers the whole day). SCHEDULER_PREGENERATE_MINUTES before each slot the
+article is generated and checked (spool stages up to postprocess), so at slot time only the
+publishPost call remains. Requests of every blog go through the shared token buckets of
+rate_limit.py, which keeps the whole daemon under the Mistral AI and Hashnode rate limits.
+
+Usage:
+    python scheduler.py [--config blogs.json] [--only french] [--list 5]
+"""
+import argparse
+import os
+import sys
+import time as time_module
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import blog_runner
+import mistral_auth
+from cache_store import load_json, save_json
+
+SCHEDULER_PREGENERATE_MINUTES = float(os.getenv("SCHEDULER_PREGENERATE_MINUTES", "60"))
+SCHEDULER_MAX_SLEEP_SECONDS = 60
+SCHEDULER_STATE_NAME = "scheduler_state.json"  # Last handled slot of each blog
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+CALENDAR_HORIZON_DAYS = 366
+
+# --- Calendar ---
+
+def _parse_bound(value, is_end):
+    """Naive local datetime of a blackout bound; a date-only end is extended to the end of that day."""
+    bound = datetime.fromisoformat(value)
+    if is_end and len(value) == 10:
+        bound += timedelta(days=1)
+    return bound
+
+class BlogCalendar:
+    def __init__(self, schedule):
+        self.timezone = ZoneInfo(schedule.get("timezone", "UTC"))
+        self.times = sorted(time.fromisoformat(value) for value in schedule.get("times", ["08:00"]))
+        self.weekdays = {WEEKDAYS.index(day[:3].lower()) for day in schedule.get("weekdays", WEEKDAYS)}
+        self.blackouts = [
+            (_parse_bound(blackout["start"], False), _parse_bound(blackout["end"], True))
+            for blackout in schedule.get("blackouts", [])
+        ]
+
+    def is_blacked_out(self, slot):
+        local = slot.astimezone(self.timezone).replace(tzinfo=None)
+        return any(start <= local < end for start, end in self.blackouts)
+
+    def next_slot(self, after):
+        """First slot strictly after the aware datetime `after`, or None within a year."""
+        first_day = after.astimezone(self.timezone).date()
+        for offset in range(CALENDAR_HORIZON_DAYS):
+            day = first_day + timedelta(days=offset)
+            if day.weekday() not in self.weekdays:
+                continue
+            for slot_time in self.times:
+                slot = datetime.combine(day, slot_time, tzinfo=self.timezone)
+                if slot > after and not self.is_blacked_out(slot):
+                    return slot
+        return None
+
+# --- Daemon ---
+
+class ScheduledBlog:
+    def __init__(self, blog, module, last_slot):
+        self.name = blog["name"]
+        self.module = module
+        self.calendar = BlogCalendar(blog.get("schedule", {}))
+        now = datetime.now(timezone.utc)
+        self.slot = self.calendar.next_slot(max(now, last_slot) if last_slot else now)
+        self.prepare_future = None
+        self.publish_future = None
+
+    @property
+    def prepare_at(self):
+        return self.slot - timedelta(minutes=SCHEDULER_PREGENERATE_MINUTES)
+
+def _run_stage(name, function, *args):
+    """Runs a bot function, turning the bots' sys.exit() into a False result."""
+    try:
+        function(*args)
+        return True
+    except SystemExit:
+        return False
+    except Exception as e:
+        print(f"❌ [{name}] Unexpected error : {e}")
+        return False
+
+def _prepare(entry):
+    print(f"🛠️ [{entry.name}] Preparing the article of {entry.slot.isoformat()}...")
+    return _run_stage(entry.name, entry.module.run_next_job, "postprocess")
+
+def _publish(entry):
+    entry.prepare_future.result()  # Publication always follows the preparation
+    print(f"📤 [{entry.name}] Publishing the article of {entry.slot.isoformat()}...")
+    # Resumes the prepared job; also completes any stage the preparation did not finish. The
+    # preparation already counted the spool attempt of this slot.
+    return _run_stage(entry.name, entry.module.run_next_job, "publish", False)
+
+def run_daemon(blogs):
+    modules = {blog["name"]: blog_runner.load_bot(blog) for blog in blogs}
+    for module in modules.values():
+        module.check_api_keys()
+    if mistral_auth.MISTRAL_AUTH_PROBE:
+        next(iter(modules.values())).test_mistral_auth()
+
+    state = load_json(SCHEDULER_STATE_NAME, {})
+    entries = [
+        ScheduledBlog(blog, modules[blog["name"]],
+                      datetime.fromisoformat(state[blog["name"]]) if blog["name"] in state else None)
+        for blog in blogs
+    ]
+    for entry in entries:
+        print(f"📅 [{entry.name}] next slot : {entry.slot.isoformat() if entry.slot else 'none'}")
+
+    with ThreadPoolExecutor(max_workers=2 * len(entries)) as executor:
+        while True:
+            now = datetime.now(timezone.utc)
+            wake_times = []
+            running = []
+            for entry in entries:
+                if entry.slot is None:
+                    continue
+                if entry.prepare_future is None and now >= entry.prepare_at:
+                    entry.prepare_future = executor.submit(_prepare, entry)
+                if entry.publish_future is None and now >= entry.slot:
+                    entry.publish_future = executor.submit(_publish, entry)
+                if entry.publish_future is not None and entry.publish_future.done():
+                    if entry.publish_future.result():
+                        print(f"✅ [{entry.name}] Slot {entry.slot.isoformat()} published.")
+                    else:
+                        print(f"⚠️ [{entry.name}] Slot {entry.slot.isoformat()} failed; the job stays in the spool for the next slot.")
+                    state[entry.name] = entry.slot.isoformat()
+                    save_json(SCHEDULER_STATE_NAME, state)
+                    entry.slot = entry.calendar.next_slot(entry.slot)
+                    entry.prepare_future = entry.publish_future = None
+                    print(f"📅 [{entry.name}] next slot : {entry.slot.isoformat() if entry.slot else 'none'}")
+                    continue
+                if entry.prepare_future is None:
+                    wake_times.append(entry.prepare_at)
+                elif entry.publish_future is None:
+                    wake_times.append(entry.slot)
+                else:
+                    running.append(entry.publish_future)
+
+            sleep_for = SCHEDULER_MAX_SLEEP_SECONDS
+            if wake_times:
+                sleep_for = min(sleep_for, (min(wake_times) - datetime.now(timezone.utc)).total_seconds())
+            sleep_for = max(1.0, sleep_for)
+            if running:
+                # Also wake up as soon as a publication finishes
+                wait(running, timeout=sleep_for, return_when=FIRST_COMPLETED)
+            else:
+                time_module.sleep(sleep_for)
+
+def list_slots(blogs, count):
+    now = datetime.now(timezone.utc)
+    for blog in blogs:
+        calendar = BlogCalendar(blog.get("schedule", {}))
+        slot, slots = now, []
+        for _ in range(count):
+            slot = calendar.next_slot(slot)
+            if slot is None:
+                break
+            slots.append(slot.isoformat())
+        print(f"📅 {blog['name']}: {', '.join(slots) or 'no slot'}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Publishes the blogs of blogs.json according to their calendar.")
+    parser.add_argument("--config", default=blog_runner.DEFAULT_CONFIG_PATH, help="Blog configuration file (default: blogs.json).")
+    parser.add_argument("--only", help="Comma-separated blog names to schedule (default: every enabled blog).")
+    parser.add_argument("--list", type=int, metavar="N", help="Print the next N slots of each blog and exit.")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    blogs = blog_runner.select_blogs(blog_runner.load_config(args.config), args.only)
+    if not blogs:
+        print("⚠️ No blog to schedule.")
+        sys.exit(0)
+
+    if args.list:
+        list_slots(blogs, args.list)
+        sys.exit(0)
+    try:
+        run_daemon(blogs)
+    except KeyboardInterrupt:
+        print("\n👋 Scheduler stopped.")
@@ -0,0 +1,124 @@
+"""
+Durable work queue of the generate/publish pipeline (`.cache/spool/<blog>/<job id>.json`).
+
+Each run works on a job that goes through the stages fetch_news -> build_prompt -> generate ->
+postprocess -> publish. The output of every stage is written to the job file as soon as the
+stage completes, so a run that fails (e.g. Hashnode is down after the article was generated)
+leaves the job in the spool and the next run resumes it from the last completed stage, without
+calling Mistral AI again. Published jobs are removed; a job that failed SPOOL_MAX_ATTEMPTS times
+is moved to `spool/<blog>/failed/` for inspection.
+"""
+import os
+import secrets
+import time
+
+from cache_store import cache_path, load_json, save_json
+
+STAGES = ("fetch_news", "build_prompt", "generate", "postprocess", "publish")
+SPOOL_DIR_NAME = "spool"
+FAILED_DIR_NAME = "failed"
+SPOOL_MAX_ATTEMPTS = int(os.getenv("SPOOL_MAX_ATTEMPTS", "5"))
+
+class Job:
+    def __init__(self, blog, job_id, data):
+        self.blog = blog
+        self.id = job_id
+        self.data = data
+
+    @property
+    def name(self):
+        return f"{SPOOL_DIR_NAME}/{self.blog}/{self.id}.json"
+
+    @property
+    def completed(self):
+        return self.data["completed"]
+
+    @property
+    def last_stage(self):
+        return self.completed[-1] if self.completed else None
+
+    @property
+    def is_pending(self):
+        """False once the job was published (removed) or abandoned (moved to failed/)."""
+        return os.path.exists(cache_path(self.name))
+
+    def is_done(self, stage):
+        return stage in self.completed
+
+    def get(self, key, default=None):
+        return self.data["artifacts"].get(key, default)
+
+    def __getitem__(self, key):
+        return self.data["artifacts"][key]
+
+    def complete(self, stage, **artifacts):
+        """Stores the outputs of `stage` and marks it as completed (one atomic write)."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+        self.data["artifacts"].update(artifacts)
+        if stage not in self.completed:
+            self.completed.append(stage)
+        self.data["updated_at"] = time.time()
+        self.save()
+
+    def update(self, **artifacts):
+        """Stores extra artifacts without completing a stage."""
+        self.data["artifacts"].update(artifacts)
+        self.data["updated_at"] = time.time()
+        self.save()
+
+    def start_attempt(self):
+        self.data["attempts"] += 1
+        self.save()
+
+    def save(self):
+        save_json(self.name, self.data)
+
+    def finish(self):
+        """Removes a published job from the spool."""
+        try:
+            os.remove(cache_path(self.name))
+        except FileNotFoundError:
+            pass
+
+    def abandon(self):
+        """Moves the job to the failed folder; it is not resumed anymore."""
+        os.replace(cache_path(self.name), cache_path(f"{SPOOL_DIR_NAME}/{self.blog}/{FAILED_DIR_NAME}/{self.id}.json"))
+
+def create_job(blog, **artifacts):
+    job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+    now = time.time()
+    job = Job(blog, job_id, {
+        "blog": blog, "created_at": now, "updated_at": now, "attempts": 0,
+        "completed": [], "artifacts": dict(artifacts),
+    })
+    job.save()
+    return job
+
+def pending_jobs(blog):
+    """Unfinished jobs of `blog`, oldest first. Jobs over SPOOL_MAX_ATTEMPTS are moved to failed/."""
+    folder = os.path.dirname(cache_path(f"{SPOOL_DIR_NAME}/{blog}/_"))
+    jobs = []
+    for filename in sorted(os.listdir(folder)):
+        if not filename.endswith(".json"):
+            continue
+        job_id = filename[:-len(".json")]
+        data = load_json(f"{SPOOL_DIR_NAME}/{blog}/{filename}")
+        if not data:
+            continue
+        job = Job(blog, job_id, data)
+        if job.data["attempts"] >= SPOOL_MAX_ATTEMPTS:
+            print(f"⚠️ Spool job {job.id} failed {job.data['attempts']} times, moved to {FAILED_DIR_NAME}/.")
+            job.abandon()
+            continue
+        jobs.append(job)
+    return sorted(jobs, key=lambda job: job.data["created_at"])
+
+def pending_artifacts(blog, key):
+    """Values of the artifact `key` in the unfinished jobs of `blog` (e.g. keywords already in progress)."""
+    return [job.get(key) for job in pending_jobs(blog) if job.get(key) is not None]
+
+def next_job(blog):
+    """Returns the oldest unfinished job of `blog`, or a new one."""
+    jobs = pending_jobs(blog)
+    return jobs[0] if jobs else create_job(blog)
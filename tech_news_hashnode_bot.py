@@ -1,7 +1,21 @@
 import os
 import sys
 import requests
-from datetime import datetime, timedelta
+import mistral_auth
+import mistral_client
+import retry
+import cover_manifest
+import image_validator
+import news_cache
+import history_store
+import near_duplicate
+import generation_cache
+import token_budget
+import spool
+import metrics
+import inventory
+import news_sources
+from datetime import datetime, timedelta, timezone
 import json
 import random
 
@@ -10,34 +24,40 @@ MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 HASHNODE_API_KEY = os.getenv("HASHNODE_API_KEY")
 NEWSAPI_API_KEY = os.getenv("NEWSAPI_API_KEY")
 
-if not MISTRAL_API_KEY:
-    print("❌ ERROR : MISTRAL_API_KEY is not defined. Ensure the environment variable is correctly set and you have created a Mistral AI API key.")
-    sys.exit(1)
+def check_api_keys():
+    """Checks that the API keys are set (called when the bot starts, not at import time)."""
+    if not MISTRAL_API_KEY:
+        print("❌ ERROR : MISTRAL_API_KEY is not defined. Ensure the environment variable is correctly set and you have created a Mistral AI API key.")
+        sys.exit(1)
 
-if not HASHNODE_API_KEY:
-    print("❌ ERROR : HASHNODE_API_KEY is not defined. Ensure the environment variable is correctly set.")
-    sys.exit(1)
+    if not HASHNODE_API_KEY:
+        print("❌ ERROR : HASHNODE_API_KEY is not defined. Ensure the environment variable is correctly set.")
+        sys.exit(1)
 
-if not NEWSAPI_API_KEY:
-    print("❌ ERROR : NEWSAPI_API_KEY is not defined. Ensure the environment variable is correctly set and you have created a NewsAPI.org API key.")
-    sys.exit(1)
+    if not NEWSAPI_API_KEY and any(source["type"] == "newsapi" for source in NEWS_SOURCES):
+        print("❌ ERROR : NEWSAPI_API_KEY is not defined. Ensure the environment variable is correctly set and you have created a NewsAPI.org API key.")
+        sys.exit(1)
 
 # --- Define the Mistral AI model to use and the API URL ---
 MISTRAL_MODEL_NAME = "mistral-tiny" # Consider "mistral-large" or "mistral-medium" for longer/more complex articles
-MISTRAL_API_BASE_URL = "https://api.mistral.ai/v1/chat/completions"
+MISTRAL_API_BASE_URL = os.getenv("MISTRAL_API_BASE_URL", "https://api.mistral.ai/v1/chat/completions") # Overridable (stub servers, see benchmarks/)
 
 # --- Hashnode Configuration ---
-HASHNODE_API_URL = "https://gql.hashnode.com/"
+HASHNODE_API_URL = os.getenv("HASHNODE_API_URL", "https://gql.hashnode.com/")
 
 # IMPORTANT: REPLACE THIS WITH YOUR TECH NEWS PUBLICATION ID!
 # You can find it in the dashboard URL of your Hashnode blog (e.g., https://hashnode.com/YOUR_ID/dashboard).
 TECH_NEWS_HASHNODE_PUBLICATION_ID = "6859b71fd0e33fbfaf1676f5" # <-- **PASTE YOUR ID HERE**
+HISTORY_BLOG_NAME = "tech_news" # Name of this blog in the publication history (history_store.py)
 
 # --- NewsAPI Configuration ---
-NEWSAPI_BASE_URL = "https://newsapi.org/v2/everything"
+NEWSAPI_BASE_URL = os.getenv("NEWSAPI_BASE_URL", "https://newsapi.org/v2/everything")
 NEWSAPI_QUERY = "technology OR AI OR cybersecurity OR software development" # Keywords for tech news
 NEWSAPI_LANGUAGE = "en" # CHANGED: Language of news articles to English
 NEWSAPI_SORT_BY = "relevancy" # "relevancy", "popularity", "publishedAt"
+NEWSAPI_WINDOW_DAYS = 7 # Only articles published during the last N days are considered (all the sources)
+# News sources fetched in parallel and merged (see news_sources.py); blogs.json `news.sources` overrides
+NEWS_SOURCES = [{"type": "newsapi"}]
 
 # --- GitHub Repository URL Variables ---
 GITHUB_REPOSITORY = os.getenv('GITHUB_REPOSITORY')
@@ -60,20 +80,13 @@ COVER_IMAGES_DIR = "covers"
 
 # --- Utility Functions ---
 
+@metrics.timed()
 def is_image_url_valid(url):
     """
-    Checks if a URL points to a valid image by making a HEAD request.
+    Checks if a URL points to a valid image (HEAD, or ranged GET if HEAD is rejected).
+    Results are cached, see image_validator.py.
     """
-    if not url:
-        return False
-    try:
-        response = requests.head(url, timeout=5)
-        response.raise_for_status()
-        content_type = response.headers.get('Content-Type', '')
-        return content_type.startswith('image/')
-    except requests.exceptions.RequestException as e:
-        print(f"DEBUG: Image URL validation failed for {url}: {e}")
-        return False
+    return image_validator.is_image_url_valid(url)
 
 def get_github_raw_base_url():
     """Constructs the base URL for raw files in your GitHub repository."""
@@ -81,10 +94,9 @@ def get_github_raw_base_url():
 
 def get_random_cover_image_url():
     """
-    Lists images in the specified directory and returns the raw URL of a random image.
-    This is a fallback if no relevant image from the news article is found.
+    Lists images in the specified directory and returns the raw URL of the least recently used cover
+    (see cover_manifest.py). This is a fallback if no relevant image from the news article is found.
     """
-    image_files = []
     covers_path = os.path.join(os.getenv('GITHUB_WORKSPACE', '.'), COVER_IMAGES_DIR)
 
     if not os.path.exists(covers_path):
@@ -92,18 +104,14 @@ def get_random_cover_image_url():
         return None
 
     try:
-        for filename in os.listdir(covers_path):
-            if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
-                image_files.append(filename)
-        
-        if not image_files:
+        # Pick the least recently used cover from the manifest
+        selected_file = cover_manifest.select_cover(covers_path)
+        if not selected_file:
             print(f"⚠️ No image files found in the folder '{covers_path}'.")
             return None
         
-        selected_file = random.choice(image_files)
-        
         base_url = get_github_raw_base_url()
-        full_image_url = f"{base_url}/{COVER_IMAGES_DIR}/{selected_file}"
+        full_image_url = f"{base_url}/{COVER_IMAGES_DIR}/{cover_manifest.cover_url_path(covers_path, selected_file)}"
         print(f"✅ Selected fallback cover image from covers folder: {selected_file}")
         return full_image_url
 
@@ -112,7 +120,16 @@ def get_random_cover_image_url():
         return None
 
 # --- Mistral AI Authentication Test ---
+@metrics.timed()
 def test_mistral_auth():
+    """
+    Explicit (billed) Mistral AI key check, only used when MISTRAL_AUTH_PROBE=1.
+    Skipped if the key was already validated recently (local cache with TTL).
+    """
+    if mistral_auth.is_key_validated(MISTRAL_API_KEY):
+        print("✅ Mistral AI key already validated recently (cache), skipping authentication test.")
+        return
+
     headers = {
         "Authorization": f"Bearer {MISTRAL_API_KEY}",
         "Content-Type": "application/json"
@@ -129,10 +146,11 @@ def test_mistral_auth():
 
     print(f"🔎 Testing Mistral AI authentication with model '{MISTRAL_MODEL_NAME}' at URL: {MISTRAL_API_BASE_URL}")
     try:
-        resp = requests.post(MISTRAL_API_BASE_URL, headers=headers, json=payload, timeout=30)
+        resp = retry.post("mistral", MISTRAL_API_BASE_URL, headers=headers, json=payload, timeout=30)
         print(f"Auth test Mistral status: {resp.status_code}")
         if resp.status_code == 200:
             print("✅ Mistral AI authentication successful and model accessible.")
+            mistral_auth.mark_key_validated(MISTRAL_API_KEY)
             try:
                 response_data = resp.json()
                 if "choices" in response_data and response_data["choices"]:
@@ -142,6 +160,7 @@ def test_mistral_auth():
             except json.JSONDecodeError:
                 print("⚠️ Model response not valid JSON. This might be a Mistral AI server issue.")
         elif resp.status_code == 401:
+            mistral_auth.invalidate_key(MISTRAL_API_KEY)
             print("❌ Mistral AI authentication failed: 401 Unauthorized. Incorrect API key or insufficient permissions.")
             sys.exit(1)
         else:
@@ -151,59 +170,169 @@ def test_mistral_auth():
         print(f"❌ NETWORK ERROR or connection issue during Mistral AI authentication test : {e}")
         sys.exit(1)
 
-test_mistral_auth()
+# --- Retrieve tech news (NewsAPI, RSS/Atom feeds, Hacker News) ---
+def fetch_newsapi_articles():
+    """
+    Returns the news articles of the last NEWSAPI_WINDOW_DAYS days for NEWSAPI_QUERY.
+    Served from the local cache when it is fresh (see news_cache.py); otherwise only the articles
+    published since the newest cached one are requested and merged into the cache.
+    """
+    # UTC, in the format of NewsAPI's publishedAt, so it compares with the cached timestamps
+    from_date = (datetime.now(timezone.utc) - timedelta(days=NEWSAPI_WINDOW_DAYS)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    cache_key = news_cache.make_key(NEWSAPI_QUERY, NEWSAPI_LANGUAGE, NEWSAPI_WINDOW_DAYS, NEWSAPI_SORT_BY)
 
-# --- Retrieve tech news via NewsAPI ---
-def get_tech_news():
-    today = datetime.now()
-    from_date = (today - timedelta(days=7)).strftime('%Y-%m-%dT%H:%M:%S')
+    if news_cache.is_fresh(cache_key):
+        articles = news_cache.get_articles(cache_key, from_date)
+        print(f"\n✅ {len(articles)} tech news articles served from the local cache (fetched less than {news_cache.NEWSAPI_CACHE_FRESH_MINUTES:.0f} minutes ago).")
+        return articles
 
+    _, newest_published_at = news_cache.get_state(cache_key)
     params = {
         "q": NEWSAPI_QUERY,
         "language": NEWSAPI_LANGUAGE,
         "sortBy": NEWSAPI_SORT_BY,
         "apiKey": NEWSAPI_API_KEY,
-        "from": from_date,
+        "from": from_date[:19],
         "pageSize": 10 # Number of articles to retrieve
     }
-    
-    print(f"\n🔎 Retrieving tech news from NewsAPI.org for keywords : '{NEWSAPI_QUERY}'...")
+    if newest_published_at and newest_published_at > from_date:
+        # Only ask for what was published since the newest cached article
+        params["from"] = newest_published_at[:19]
+        print(f"\n🔎 Retrieving tech news published since {params['from']} from NewsAPI.org for keywords : '{NEWSAPI_QUERY}'...")
+    else:
+        print(f"\n🔎 Retrieving tech news from NewsAPI.org for keywords : '{NEWSAPI_QUERY}'...")
+
     try:
-        response = requests.get(NEWSAPI_BASE_URL, params=params, timeout=30)
+        response = retry.get("newsapi", NEWSAPI_BASE_URL, params=params, timeout=30)
         response.raise_for_status()
 
         data = response.json()
         
-        if data['status'] == 'ok' and data['articles']:
+        if data['status'] == 'ok':
             print(f"✅ {len(data['articles'])} tech news articles retrieved.")
-            recent_articles = [
-                a for a in data['articles'] 
-                if a['title'] and a['description'] and a['content'] and 
-                   datetime.strptime(a['publishedAt'][:19], '%Y-%m-%dT%H:%M:%S').date() == today.date()
-            ]
-            
-            if not recent_articles:
-                print("⚠️ No relevant tech news articles found for today after filtering. Using a random article from the latest ones.")
-                return random.choice(data['articles']) if data['articles'] else None
-            
-            # Return a random article from the recent ones
-            return random.choice(recent_articles)
-        elif data['status'] == 'ok' and not data['articles']:
-            print("⚠️ NewsAPI.org returned no articles for the current query.")
-            return None
+            news_cache.store_articles(cache_key, data['articles'], from_date)
         else:
             print(f"❌ ERROR from NewsAPI.org : {data.get('message', 'Message not available')}")
-            return None
     except requests.exceptions.RequestException as e:
         print(f"❌ HTTP ERROR retrieving tech news from NewsAPI.org : {e}")
-        return None
     except Exception as e:
         print(f"❌ An unexpected error occurred while retrieving tech news : {e}")
+
+    # Fresh and previously cached articles of the window (stale cache if the request failed)
+    return news_cache.get_articles(cache_key, from_date)
+
+def fetch_tech_news_articles():
+    """
+    Fetches every source of NEWS_SOURCES in parallel and merges their articles, in the order of
+    NEWS_SOURCES, without the news found by several sources.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=NEWSAPI_WINDOW_DAYS)
+    fetchers = {}
+    for source in NEWS_SOURCES:
+        if source["type"] == "newsapi":
+            fetchers["NewsAPI.org"] = fetch_newsapi_articles
+        elif source["type"] in news_sources.SOURCE_FETCHERS:
+            fetcher = news_sources.SOURCE_FETCHERS[source["type"]]
+            fetchers[news_sources.source_name(source)] = lambda fetcher=fetcher, source=source: fetcher(source, since)
+        else:
+            print(f"⚠️ Unknown news source type '{source['type']}', skipped.")
+    results = news_sources.fetch_all(fetchers)
+    articles = news_sources.merge(results[name] for name in fetchers if name in results)
+    if len(results) > 1:
+        print(f"📰 {len(articles)} distinct news article(s) from {len(results)} source(s).")
+    return articles
+
+@metrics.timed()
+def get_tech_news():
+    today = datetime.now(timezone.utc)  # publishedAt is in UTC
+    articles = fetch_tech_news_articles()
+
+    # Skip news that were already turned into a post, or are being turned into one (spool, stock)
+    already_published = history_store.published_news_urls(a.get('url') for a in articles or [])
+    already_published |= {news.get('url') for news in spool.pending_artifacts(HISTORY_BLOG_NAME, "news_article")}
+    already_published &= {a.get('url') for a in articles or []}
+    if already_published:
+        print(f"DEBUG: {len(already_published)} news article(s) already published or in progress, skipped.")
+        articles = [a for a in articles if a.get('url') not in already_published]
+
+    if not articles:
+        print("⚠️ No tech news articles available for the current query.")
         return None
 
+    # Validate every candidate cover image in parallel now, so the later check is a cache hit
+    image_checks = image_validator.validate_image_urls(a.get('urlToImage') for a in articles)
+    print(f"DEBUG: {sum(image_checks.values())}/{len(image_checks)} news image URLs are valid.")
+    recent_articles = [
+        a for a in articles 
+        if a['title'] and a['description'] and a['content'] and 
+           datetime.strptime(a['publishedAt'][:19], '%Y-%m-%dT%H:%M:%S').date() == today.date()
+    ]
+    
+    if not recent_articles:
+        print("⚠️ No relevant tech news articles found for today after filtering. Using a random article from the latest ones.")
+        return random.choice(articles)
+    
+    # Return a random article from the recent ones
+    return random.choice(recent_articles)
+
 # --- Article Generation via Mistral AI API ---
-def generate_article():
-    news_article = get_tech_news()
+# CHANGED: Updated prompt for more engaging title and refined instructions
+# Prompt templates (placeholders are filled by build_prompt(); can be overridden in blogs.json)
+NEWS_PROMPT_TEMPLATE = (
+    "Write a professional, detailed, and engaging blog post of at least 1500 words in English. "
+    "The article must be based on the following tech news: \n\n"
+    "News Title: {news_title}\n"
+    "Description: {news_description}\n"
+    "Initial Content: {news_content}\n"
+    "Source Link: {news_url}\n\n"
+    "Develop this topic in depth, adding context, analysis, future implications, and examples if possible. "
+    "**The very first line of the output MUST be a compelling, SEO-friendly, and catchy title (H1 markdown format, e.g., # Your Awesome Title).** "
+    "This title must immediately grab the reader’s attention, include strong and relevant SEO keywords, clearly reflect the core topic of the article, and be concise yet compelling. It should be written in a human, emotional, or curiosity-driven way that encourages clicks—even if it uses light, tasteful clickbait—while still staying true to the article’s content."
+    "Do not include 'Title: ', 'Author: ', or 'Publication Date: ' at the beginning. "
+    "The article must end with the signature 'By Nathan Remacle.'. "
+    "Optimize the content for SEO by naturally including relevant keywords. "
+    "Avoid formulations that sound 'AI' and adopt a human and engaging tone."
+)
+TOPIC_PROMPT_TEMPLATE = (
+    "Write a professional, detailed, and engaging blog post of at least 1500 words in English on a current "
+    "topic related to '{keyword}'. "
+    "**The very first line of the output MUST be a compelling, SEO-friendly, and catchy title (H1 markdown format, e.g., # Your Awesome Title).** "
+    "Do not include 'Title: ', 'Author: ', or 'Publication Date: ' at the beginning. "
+    "The article must end with the signature 'By Nathan Remacle.'. "
+    "Optimize the content for SEO by naturally including relevant keywords. "
+    "Avoid formulations that sound 'AI' and adopt a human and engaging tone."
+)
+# Generic topics used when no tech news is available
+FALLBACK_KEYWORDS = [
+    "cybersecurity", "cloud computing", "blockchain", "artificial intelligence", "machine learning",
+    "deep learning", "quantum computing", "edge computing", "devops", "gitops", "kubernetes", "docker",
+    "serverless", "microservices", "API management", "zero trust", "network security", "data privacy",
+    "GDPR compliance", "penetration testing", "ethical hacking", "firewall configuration", "VPN technology",
+    "multi-factor authentication", "natural language processing", "computer vision", "generative AI",
+    "neural networks", "digital twins", "augmented reality", "virtual reality", "mixed reality", "data science",
+    "big data analytics", "data lakes", "data warehouses", "ETL pipelines", "real-time analytics", "BI tools",
+    "fintech", "regtech", "healthtech", "edtech", "agritech", "legaltech", "low-code", "no-code platforms",
+    "mobile development", "responsive design", "progressive web apps", "cross-platform apps",
+    "web development", "frontend frameworks", "react.js", "vue.js", "angular", "backend systems", "REST APIs",
+    "GraphQL", "WebSockets", "event-driven architecture", "CI/CD pipelines", "infrastructure as code",
+    "cloud-native apps", "cloud security", "multi-cloud strategy", "hybrid cloud", "platform engineering",
+    "digital transformation", "IT strategy", "tech stack optimization", "legacy system modernization",
+    "distributed systems", "peer-to-peer networks", "open-source software", "SaaS", "PaaS", "IaaS",
+    "edge AI", "AI governance", "digital ethics", "algorithmic bias", "privacy by design",
+    "digital forensics", "incident response", "threat detection", "security operations center (SOC)",
+    "log management", "SIEM tools", "compliance automation", "container security", "code quality",
+    "static code analysis", "unit testing", "test-driven development", "agile methodology", "scrum",
+    "product management", "user experience (UX)", "human-computer interaction", "accessibility",
+    "tech leadership", "innovation management", "IT consulting", "technology trends", "smart cities",
+    "connected devices", "IoT platforms", "wearable tech", "5G networks", "digital identity", "biometrics",
+    "passwordless authentication", "data monetization", "tech regulation", "AI legislation", "sustainable IT",
+    "green computing", "digital sovereignty", "robotics", "autonomous systems", "intelligent automation",
+    "chatbots", "virtual assistants", "real-time collaboration tools"
+]
+
+def build_prompt(news_article):
+    """Returns (article_prompt, chosen_keyword); chosen_keyword is only set for the generic-topic fallback."""
+    chosen_keyword = None
     
     if news_article:
         news_title = news_article.get('title', 'Unknown Tech News')
@@ -211,69 +340,22 @@ def generate_article():
         news_content = news_article.get('content', '')
         news_url = news_article.get('url', '')
 
-        # CHANGED: Updated prompt for more engaging title and refined instructions
-        article_prompt = (
-            f"Write a professional, detailed, and engaging blog post of at least 1500 words in English. "
-            f"The article must be based on the following tech news: \n\n"
-            f"News Title: {news_title}\n"
-            f"Description: {news_description}\n"
-            f"Initial Content: {news_content}\n"
-            f"Source Link: {news_url}\n\n"
-            f"Develop this topic in depth, adding context, analysis, future implications, and examples if possible. "
-            f"**The very first line of the output MUST be a compelling, SEO-friendly, and catchy title (H1 markdown format, e.g., # Your Awesome Title).** "
-            f"This title must immediately grab the reader’s attention, include strong and relevant SEO keywords, clearly reflect the core topic of the article, and be concise yet compelling. It should be written in a human, emotional, or curiosity-driven way that encourages clicks—even if it uses light, tasteful clickbait—while still staying true to the article’s content."
-            f"Do not include 'Title: ', 'Author: ', or 'Publication Date: ' at the beginning. "
-            f"The article must end with the signature 'By Nathan Remacle.'. "
-            f"Optimize the content for SEO by naturally including relevant keywords. "
-            f"Avoid formulations that sound 'AI' and adopt a human and engaging tone."
+        article_prompt = NEWS_PROMPT_TEMPLATE.format(
+            news_title=news_title, news_description=news_description,
+            news_content=news_content, news_url=news_url
         )
         print(f"PROMPT FOR ARTICLE BASED ON NEWS: {news_title}")
     else:
         print("⚠️ No tech news retrieved. Generating an article on a generic tech topic.")
         # Fallback if no news is found
-        keywords = [
-            "cybersecurity", "cloud computing", "blockchain", "artificial intelligence", "machine learning",
-            "deep learning", "quantum computing", "edge computing", "devops", "gitops", "kubernetes", "docker",
-            "serverless", "microservices", "API management", "zero trust", "network security", "data privacy",
-            "GDPR compliance", "penetration testing", "ethical hacking", "firewall configuration", "VPN technology",
-            "multi-factor authentication", "natural language processing", "computer vision", "generative AI",
-            "neural networks", "digital twins", "augmented reality", "virtual reality", "mixed reality", "data science",
-            "big data analytics", "data lakes", "data warehouses", "ETL pipelines", "real-time analytics", "BI tools",
-            "fintech", "regtech", "healthtech", "edtech", "agritech", "legaltech", "low-code", "no-code platforms",
-            "mobile development", "responsive design", "progressive web apps", "cross-platform apps",
-            "web development", "frontend frameworks", "react.js", "vue.js", "angular", "backend systems", "REST APIs",
-            "GraphQL", "WebSockets", "event-driven architecture", "CI/CD pipelines", "infrastructure as code",
-            "cloud-native apps", "cloud security", "multi-cloud strategy", "hybrid cloud", "platform engineering",
-            "digital transformation", "IT strategy", "tech stack optimization", "legacy system modernization",
-            "distributed systems", "peer-to-peer networks", "open-source software", "SaaS", "PaaS", "IaaS",
-            "edge AI", "AI governance", "digital ethics", "algorithmic bias", "privacy by design",
-            "digital forensics", "incident response", "threat detection", "security operations center (SOC)",
-            "log management", "SIEM tools", "compliance automation", "container security", "code quality",
-            "static code analysis", "unit testing", "test-driven development", "agile methodology", "scrum",
-            "product management", "user experience (UX)", "human-computer interaction", "accessibility",
-            "tech leadership", "innovation management", "IT consulting", "technology trends", "smart cities",
-            "connected devices", "IoT platforms", "wearable tech", "5G networks", "digital identity", "biometrics",
-            "passwordless authentication", "data monetization", "tech regulation", "AI legislation", "sustainable IT",
-            "green computing", "digital sovereignty", "robotics", "autonomous systems", "intelligent automation",
-            "chatbots", "virtual assistants", "real-time collaboration tools"
-        ]
-        chosen_keyword = random.choice(keywords)
-        article_prompt = (
-            "Write a professional, detailed, and engaging blog post of at least 1500 words in English on a current "
-            f"topic related to '{chosen_keyword}'. "
-            f"**The very first line of the output MUST be a compelling, SEO-friendly, and catchy title (H1 markdown format, e.g., # Your Awesome Title).** "
-            f"Do not include 'Title: ', 'Author: ', or 'Publication Date: ' at the beginning. "
-            f"The article must end with the signature 'By Nathan Remacle.'. "
-            f"Optimize the content for SEO by naturally including relevant keywords. "
-            f"Avoid formulations that sound 'AI' and adopt a human and engaging tone."
-        )
+        chosen_keyword = history_store.choose_keywords(HISTORY_BLOG_NAME, FALLBACK_KEYWORDS, 1, random)[0]
+        article_prompt = TOPIC_PROMPT_TEMPLATE.format(keyword=chosen_keyword)
         print(f"PROMPT FOR ARTICLE BASED ON GENERIC KEYWORD: {chosen_keyword}")
+    return article_prompt, chosen_keyword
 
-    headers = {
-        "Authorization": f"Bearer {MISTRAL_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
+def build_payload(article_prompt):
+    """Chat completions request body (shared with the batch mode, see mistral_batch.py)."""
+    return {
         "model": MISTRAL_MODEL_NAME,
         "messages": [
             {
@@ -282,27 +364,67 @@ def generate_article():
             }
         ],
         "temperature": 0.7,
-        "max_tokens": 2500
+        "max_tokens": token_budget.choose_max_tokens(article_prompt)
+    }
+
+@metrics.timed()
+def generate_article(article_prompt=None, news_article=None, chosen_keyword=None, use_cache=True):
+    if article_prompt is None:
+        news_article = get_tech_news()
+        article_prompt, chosen_keyword = build_prompt(news_article)
+
+    headers = {
+        "Authorization": f"Bearer {MISTRAL_API_KEY}",
+        "Content-Type": "application/json"
     }
+    payload = build_payload(article_prompt)
+
+    cached_article = generation_cache.get(payload) if use_cache else None
+    if cached_article is not None:
+        print("⚡ Article served from the generation cache, no Mistral AI call.")
+        return cached_article, news_article, chosen_keyword
 
     print(f"\n🚀 Attempting to generate article with model '{MISTRAL_MODEL_NAME}'...")
     try:
-        response = requests.post(
-            MISTRAL_API_BASE_URL,
-            headers=headers,
-            json=payload,
-            timeout=180
-        )
+        if mistral_client.MISTRAL_STREAMING:
+            response = mistral_client.open_stream(MISTRAL_API_BASE_URL, headers, payload)
+        else:
+            response = retry.post(
+                "mistral",
+                MISTRAL_API_BASE_URL,
+                headers=headers,
+                json=payload,
+                timeout=180
+            )
+        if mistral_auth.is_auth_error(response.status_code):
+            # The generation call doubles as the authentication check
+            mistral_auth.invalidate_key(MISTRAL_API_KEY)
+            print(f"❌ Mistral AI authentication failed ({response.status_code}). Incorrect API key or insufficient permissions.")
+            sys.exit(1)
         response.raise_for_status()
+        mistral_auth.mark_key_validated(MISTRAL_API_KEY)
 
         print("Status code Mistral:", response.status_code)
 
+        if mistral_client.MISTRAL_STREAMING:
+            stream = mistral_client.assemble_stream(
+                response,
+                on_title=lambda title: print(f"📝 Title received while streaming : {title}")
+            )
+            print(f"⏱️ Mistral AI streaming : first byte after {stream.time_to_first_byte:.1f}s, {stream.chunks} chunks in {stream.elapsed:.1f}s (finish_reason: {stream.finish_reason}).")
+            article_content = token_budget.complete(MISTRAL_API_BASE_URL, headers, payload, stream.content.strip(), stream.finish_reason, stream.usage, HISTORY_BLOG_NAME)
+            generation_cache.put(payload, article_content)
+            return article_content, news_article, chosen_keyword
+
         data = response.json()
         
         if 'choices' in data and data['choices'] and 'message' in data['choices'][0] and 'content' in data['choices'][0]['message']:
             article_content = data['choices'][0]['message']['content'].strip()
+            # Continue the article if Mistral AI stopped on max_tokens (finish_reason "length")
+            article_content = token_budget.complete(MISTRAL_API_BASE_URL, headers, payload, article_content, data['choices'][0].get('finish_reason'), data.get('usage'), HISTORY_BLOG_NAME)
+            generation_cache.put(payload, article_content)
             # Pass the news_article along with content so we can extract its image URL later
-            return article_content, news_article
+            return article_content, news_article, chosen_keyword
         else:
             raise ValueError(f"Mistral AI response does not contain the expected chat completions format. Full response: {data}")
         
@@ -313,8 +435,32 @@ def generate_article():
         print(f"❌ DATA ERROR in Mistral AI response : {e}")
         sys.exit(1)
 
+# --- Near-duplicate check before publication ---
+@metrics.timed()
+def ensure_distinct_article(article_content, news_article, keyword):
+    """
+    Compares the article with the MinHash index of already published articles (near_duplicate.py)
+    and regenerates it, at most NEAR_DUPLICATE_MAX_REGENERATIONS times, while it is too close to one.
+    Returns the (content, news_article, keyword) tuple to publish; raises
+    near_duplicate.NearDuplicateRejected if no sufficiently different version was obtained.
+    """
+    for attempt in range(near_duplicate.NEAR_DUPLICATE_MAX_REGENERATIONS + 1):
+        match = near_duplicate.find_similar(article_content)
+        if match is None:
+            return article_content, news_article, keyword
+        score, title, post_url = match
+        print(f"⚠️ Article too close to \"{title}\" ({post_url}) : estimated similarity {score:.0%}.")
+        if attempt < near_duplicate.NEAR_DUPLICATE_MAX_REGENERATIONS:
+            print(f"🔁 Regenerating the article ({attempt + 1}/{near_duplicate.NEAR_DUPLICATE_MAX_REGENERATIONS})...")
+            # Bypass the cache: the same request would return the same article
+            article_content, news_article, keyword = generate_article(use_cache=False)
+    print(f"❌ Article rejected : still too close to an already published article after {near_duplicate.NEAR_DUPLICATE_MAX_REGENERATIONS} regeneration(s).")
+    raise near_duplicate.NearDuplicateRejected(1)
+
 # --- Hashnode Publication ---
-def publish_article(content, news_article_data=None): # news_article_data is the full news article object
+@metrics.timed()
+def publish_article(content, news_article_data=None, keyword=None): # news_article_data is the full news article object
+    original_content = content
     publication_id = TECH_NEWS_HASHNODE_PUBLICATION_ID
     
     first_line_match = content.split('\n')[0].strip()
@@ -385,7 +531,8 @@ def publish_article(content, news_article_data=None): # news_article_data is the
     print(f"DEBUG: Start of Markdown content sent: {content[:200]}...")
 
     try:
-        resp = requests.post(HASHNODE_API_URL, json={"query": mutation, "variables": variables}, headers=headers)
+        # publishPost is not idempotent: only retried when Hashnode rejected the request (429/503, rate limit)
+        resp = retry.post("hashnode", HASHNODE_API_URL, json={"query": mutation, "variables": variables}, headers=headers, idempotent=False, graphql=True)
         
         print("Publish status:", resp.status_code)
         print("Publish response:", resp.text)
@@ -406,6 +553,13 @@ def publish_article(content, news_article_data=None): # news_article_data is the
         else:
             print(f"✅ Article published successfully (URL not retrieved) : {extracted_title}")
 
+        post = ((response_data.get('data') or {}).get('publishPost') or {}).get('post') or {}
+        history_store.record_post(
+            HISTORY_BLOG_NAME, extracted_title, keyword=keyword,
+            news_url=(news_article_data or {}).get('url'), post_id=post.get('id'), post_url=post_url
+        )
+        near_duplicate.add_document(original_content, HISTORY_BLOG_NAME, title=extracted_title, post_url=post_url)
+
     except requests.exceptions.RequestException as e:
         print(f"❌ HTTP ERROR publishing article to Hashnode : {e}")
         print(f"Hashnode response on error : {resp.text if 'resp' in locals() else 'No response.'}")
@@ -414,13 +568,106 @@ def publish_article(content, news_article_data=None): # news_article_data is the
         print(f"❌ An unexpected error occurred during publication : {e}")
         sys.exit(1)
 
+# --- Durable pipeline: stages persisted in the spool (spool.py) ---
+PIPELINE_STAGES = spool.STAGES # fetch_news -> build_prompt -> generate -> postprocess -> publish
+
+def run_job_stages(job, stop_after="publish"):
+    """
+    Runs the remaining stages of `job` (fetch_news -> build_prompt -> generate -> postprocess ->
+    publish) up to `stop_after` included. Every completed stage is written to the spool: if a
+    stage fails, the next run resumes the job without calling NewsAPI or Mistral AI again.
+    """
+    if not job.is_done("fetch_news"):
+        job.complete("fetch_news", news_article=get_tech_news())
+    if stop_after == "fetch_news":
+        return
+
+    if not job.is_done("build_prompt"):
+        article_prompt, chosen_keyword = build_prompt(job["news_article"])
+        job.complete("build_prompt", prompt=article_prompt, keyword=chosen_keyword)
+    if stop_after == "build_prompt":
+        return
+
+    if not job.is_done("generate"):
+        raw_article, _, _ = generate_article(job["prompt"], job["news_article"], job["keyword"])
+        job.complete("generate", raw_article=raw_article)
+    if stop_after == "generate":
+        return
+
+    if not job.is_done("postprocess"):
+        try:
+            article, news_article, keyword = ensure_distinct_article(job["raw_article"], job["news_article"], job["keyword"])
+        except near_duplicate.NearDuplicateRejected:
+            # Rejected as a near-duplicate: no point in resuming it (any other failure leaves it in the spool)
+            job.abandon()
+            raise
+        job.complete("postprocess", article=article, news_article=news_article, keyword=keyword)
+    if stop_after == "postprocess":
+        return
+
+    if not job.is_done("publish"):
+        first_line = job["article"].split('\n')[0].strip()
+        title = first_line[2:].strip() if first_line.startswith('# ') else None
+        attempted_at = job.get("publish_attempted_at")
+        if attempted_at and title and history_store.is_title_published(title, HISTORY_BLOG_NAME, since=attempted_at):
+            # The previous run stopped right after publishing: do not publish twice
+            # (only a post recorded since that attempt counts, not an older post with the same title)
+            print(f"✅ Article \"{title}\" was already published by a previous run.")
+        else:
+            job.update(publish_attempted_at=datetime.now().timestamp())
+            publish_article(job["article"], job["news_article"], job["keyword"])
+        job.complete("publish")
+
+def run_next_job(stop_after="publish", count_attempt=True):
+    """
+    Publishes the oldest article of the stock (inventory.py), else resumes the oldest unfinished
+    job of the spool or starts a new one, and runs it up to the `stop_after` stage (the scheduler
+    daemon uses this to prepare the article before its slot). `count_attempt=False` resumes the job
+    without counting a new spool attempt (publication pass of a slot whose preparation already did).
+    """
+    with metrics.span("run_next_job", blog=HISTORY_BLOG_NAME):
+        job = inventory.next_job(HISTORY_BLOG_NAME)
+        if job.last_stage:
+            print(f"♻️ Resuming job {job.id} after stage '{job.last_stage}' (attempt {job.data['attempts'] + count_attempt}).")
+        if count_attempt:
+            job.start_attempt()
+        run_job_stages(job, stop_after)
+        if job.is_done("publish"):
+            job.finish()
+
+# --- Settings provided by the multi-blog runner (blog_runner.py) ---
+def configure(blog):
+    """
+    Applies a blogs.json entry (name, publication_id, model, prompt_template, topic_prompt_template,
+    keywords and the `news` settings: sources, query, language, sort_by, window_days).
+    Missing keys keep the defaults of this script.
+    """
+    global HISTORY_BLOG_NAME, MISTRAL_MODEL_NAME, NEWS_PROMPT_TEMPLATE, TOPIC_PROMPT_TEMPLATE, FALLBACK_KEYWORDS
+    global TECH_NEWS_HASHNODE_PUBLICATION_ID, NEWSAPI_QUERY, NEWSAPI_LANGUAGE, NEWSAPI_SORT_BY, NEWSAPI_WINDOW_DAYS, NEWS_SOURCES
+    HISTORY_BLOG_NAME = blog.get("name", HISTORY_BLOG_NAME)
+    MISTRAL_MODEL_NAME = blog.get("model", MISTRAL_MODEL_NAME)
+    NEWS_PROMPT_TEMPLATE = blog.get("prompt_template", NEWS_PROMPT_TEMPLATE)
+    TOPIC_PROMPT_TEMPLATE = blog.get("topic_prompt_template", TOPIC_PROMPT_TEMPLATE)
+    FALLBACK_KEYWORDS = blog.get("keywords", FALLBACK_KEYWORDS)
+    TECH_NEWS_HASHNODE_PUBLICATION_ID = blog.get("publication_id", TECH_NEWS_HASHNODE_PUBLICATION_ID)
+    news = blog.get("news", {})
+    NEWSAPI_QUERY = news.get("query", NEWSAPI_QUERY)
+    NEWSAPI_LANGUAGE = news.get("language", NEWSAPI_LANGUAGE)
+    NEWSAPI_SORT_BY = news.get("sort_by", NEWSAPI_SORT_BY)
+    NEWSAPI_WINDOW_DAYS = news.get("window_days", NEWSAPI_WINDOW_DAYS)
+    if "sources" in news:
+        NEWS_SOURCES = news["sources"]
+    elif "source" in news:
+        NEWS_SOURCES = [{"type": news["source"]}]
+
 # --- Main Execution ---
 if __name__ == "__main__":
+    check_api_keys()
     print("Starting Hashnode bot.")
+    if mistral_auth.MISTRAL_AUTH_PROBE:
+        test_mistral_auth()
     try:
-        # receive both article content and news_article_data from generate_article
-        article_content, news_article_data = generate_article() 
-        publish_article(article_content, news_article_data) # Pass news_article_data to publish_article
+        run_next_job()
         print("\n🎉 Hashnode bot successfully completed!")
     except Exception as e:
         print(f"\nFATAL ERROR: A critical error occurred : {e}")
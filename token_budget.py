@@ -0,0 +1,152 @@
+"""
+Token accounting and length control of the article generations.
+
+The prompts ask for "at least 1500 words" while max_tokens was fixed to 2500, so mistral-tiny often
+stopped mid-sentence. choose_max_tokens() sizes max_tokens from the word count requested by the
+prompt (TOKEN_BUDGET_TOKENS_PER_WORD tokens per word plus TOKEN_BUDGET_MARGIN), within the context
+window of the model. When a completion still ends with finish_reason "length", complete() asks the
+model to continue its own text (last assistant message sent with `prefix: true`) instead of
+regenerating the whole article, at most TOKEN_BUDGET_MAX_CONTINUATIONS times. A text still
+truncated after that is cut after its last complete sentence.
+
+Every call is appended to `.cache/token_usage.jsonl`: the `usage` reported by Mistral AI next to the
+local estimate of estimate_tokens(), max_tokens and finish_reason, so the cost per usable article
+and the truncation rate can be followed over time.
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+
+import requests
+
+import metrics
+import retry
+from cache_store import cache_path
+
+TOKEN_BUDGET_TOKENS_PER_WORD = float(os.getenv("TOKEN_BUDGET_TOKENS_PER_WORD", "1.6"))  # French is the worst case
+TOKEN_BUDGET_MARGIN = float(os.getenv("TOKEN_BUDGET_MARGIN", "1.25"))
+TOKEN_BUDGET_DEFAULT_MAX_TOKENS = int(os.getenv("TOKEN_BUDGET_DEFAULT_MAX_TOKENS", "2500"))  # Prompt without a word count
+TOKEN_BUDGET_MIN_CONTINUATION_TOKENS = 512
+TOKEN_BUDGET_MAX_CONTINUATIONS = int(os.getenv("TOKEN_BUDGET_MAX_CONTINUATIONS", "2"))
+MODEL_CONTEXT_TOKENS = int(os.getenv("MISTRAL_CONTEXT_TOKENS", "32000"))
+TOKEN_USAGE_LOG_NAME = "token_usage.jsonl"
+
+TARGET_WORDS_PATTERN = re.compile(r"(\d[\d\s,.]*\d|\d)\s*(?:words|mots)\b", re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+SENTENCE_END_PATTERN = re.compile(r"[.!?…»\"')\]]\s")
+
+_log_lock = threading.Lock()
+
+# --- Estimation ---
+
+def estimate_tokens(text):
+    """
+    Approximate token count of `text` without the Mistral tokenizer: one token per punctuation
+    sign and one per 4 characters of each word (close to SentencePiece/Tekken on English and French).
+    """
+    return sum(math.ceil(len(piece) / 4) for piece in TOKEN_PATTERN.findall(text or ""))
+
+def target_words(prompt):
+    """Word count requested by the prompt ("at least 1500 words", "au moins 1500 mots"), or None."""
+    match = TARGET_WORDS_PATTERN.search(prompt or "")
+    if not match:
+        return None
+    return int(re.sub(r"\D", "", match.group(1)))
+
+def count_words(text):
+    return len((text or "").split())
+
+def choose_max_tokens(prompt, words=None):
+    """max_tokens for `words` words (default: the word count of the prompt), capped by the context window."""
+    words = target_words(prompt) if words is None else words
+    budget = math.ceil(words * TOKEN_BUDGET_TOKENS_PER_WORD * TOKEN_BUDGET_MARGIN) if words else TOKEN_BUDGET_DEFAULT_MAX_TOKENS
+    return max(1, min(budget, MODEL_CONTEXT_TOKENS - estimate_tokens(prompt)))
+
+# --- Usage records ---
+
+def record_usage(blog, payload, usage, finish_reason, kind="article"):
+    """Appends one generation call to the token usage log."""
+    usage = usage or {}
+    prompt_text = "".join(message.get("content") or "" for message in payload.get("messages", []))
+    entry = {
+        "time": time.time(),
+        "blog": blog,
+        "model": payload.get("model"),
+        "kind": kind,
+        "estimated_prompt_tokens": estimate_tokens(prompt_text),
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "max_tokens": payload.get("max_tokens"),
+        "finish_reason": finish_reason,
+    }
+    try:
+        with _log_lock, open(cache_path(TOKEN_USAGE_LOG_NAME), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"⚠️ Unable to record token usage : {e}")
+    for token_type in ("prompt", "completion"):
+        if entry[f"{token_type}_tokens"]:
+            metrics.incr("mistral_tokens_total", entry[f"{token_type}_tokens"], blog=blog, model=entry["model"], type=token_type)
+    return entry
+
+# --- Truncation handling ---
+
+def trim_incomplete(text):
+    """Cuts a truncated text after its last complete sentence (unchanged if none is found)."""
+    stripped = text.rstrip()
+    if stripped.endswith((".", "!", "?", "…")):
+        return stripped
+    ends = list(SENTENCE_END_PATTERN.finditer(stripped))
+    return stripped[:ends[-1].start() + 1] if ends else stripped
+
+def _continue(api_url, headers, payload, content, max_tokens):
+    """Asks the model to go on from `content`. Returns (added text, finish_reason, usage, request payload)."""
+    continuation = dict(
+        payload,
+        messages=payload["messages"] + [{"role": "assistant", "content": content, "prefix": True}],
+        max_tokens=max_tokens,
+    )
+    response = retry.post("mistral", api_url, headers=headers, json=continuation, timeout=180)
+    response.raise_for_status()
+    data = response.json()
+    choice = data["choices"][0]
+    added = choice["message"]["content"] or ""
+    if added.startswith(content):
+        added = added[len(content):]  # The prefix may be echoed back
+    return added, choice.get("finish_reason"), data.get("usage"), continuation
+
+def complete(api_url, headers, payload, content, finish_reason, usage=None, blog=None):
+    """
+    Records the first completion of an article and, if it was cut by max_tokens, continues it.
+    Returns the final article text.
+    """
+    entry = record_usage(blog, payload, usage, finish_reason)
+    prompt = payload["messages"][-1]["content"]
+    target = target_words(prompt)
+    print(f"🧮 Tokens: prompt {entry['prompt_tokens'] or '?'} (estimated {entry['estimated_prompt_tokens']}), "
+          f"completion {entry['completion_tokens'] or '?'}/{payload.get('max_tokens')}, "
+          f"{count_words(content)}{f'/{target}' if target else ''} words, finish_reason {finish_reason}.")
+
+    continuations = 0
+    while finish_reason == "length" and continuations < TOKEN_BUDGET_MAX_CONTINUATIONS:
+        continuations += 1
+        missing_words = max(0, (target or 0) - count_words(content))
+        max_tokens = max(TOKEN_BUDGET_MIN_CONTINUATION_TOKENS, choose_max_tokens(prompt, missing_words) if missing_words else 0)
+        print(f"✂️ Article truncated by max_tokens: continuation {continuations}/{TOKEN_BUDGET_MAX_CONTINUATIONS} ({max_tokens} tokens)...")
+        try:
+            added, finish_reason, usage, continuation = _continue(api_url, headers, payload, content, max_tokens)
+        except (requests.exceptions.RequestException, ValueError, KeyError, IndexError) as e:
+            print(f"⚠️ Continuation failed, the truncated article is kept : {e}")
+            break
+        record_usage(blog, continuation, usage, finish_reason, kind="continuation")
+        content += added
+
+    if finish_reason == "length":
+        content = trim_incomplete(content)
+        print(f"⚠️ Article still truncated: cut after its last complete sentence ({count_words(content)} words).")
+    elif continuations:
+        print(f"✅ Article completed after {continuations} continuation(s): {count_words(content)} words.")
+    return content.strip()